@@ -0,0 +1,154 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+const WORKER_SCRIPT = path.resolve(__dirname, '../otodom_parser/stats_worker.py');
+const REQUEST_TIMEOUT_MS = 10000;
+
+// One resident Python process answering newline-delimited JSON requests
+class PythonStatsWorker {
+  constructor(pythonCommand) {
+    this.pythonCommand = pythonCommand;
+    this.nextId = 1;
+    this.pending = new Map();
+    this.alive = true;
+
+    this.process = spawn(this.pythonCommand, [WORKER_SCRIPT], {
+      env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
+    });
+    this.ready = new Promise((resolve, reject) => {
+      this.markReady = resolve;
+      this.failStartup = reject;
+    });
+    // Requests queued before the worker is ready must not crash the process
+    this.ready.catch(() => {});
+
+    readline.createInterface({ input: this.process.stdout }).on('line', (line) => this.handleLine(line));
+
+    this.process.stderr.on('data', (data) => {
+      console.error(`Stats worker: ${data}`);
+    });
+
+    this.process.stdin.on('error', (err) => this.shutdown(err));
+    this.process.on('error', (err) => this.shutdown(err));
+    this.process.on('exit', (code) => this.shutdown(new Error(`Stats worker exited with code ${code}`)));
+  }
+
+  handleLine(line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (err) {
+      console.error('Stats worker sent invalid JSON:', line);
+      return;
+    }
+
+    if (message.ready) {
+      this.markReady();
+      return;
+    }
+
+    const request = this.pending.get(message.id);
+    if (!request) {
+      return;
+    }
+    this.pending.delete(message.id);
+    clearTimeout(request.timer);
+
+    if (message.error) {
+      request.reject(new Error(message.error));
+    } else {
+      request.resolve(message.result);
+    }
+  }
+
+  call(functionName, args) {
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Stats worker timed out running ${functionName}`));
+      }, REQUEST_TIMEOUT_MS);
+      this.pending.set(id, { resolve, reject, timer });
+
+      this.ready
+        .then(() => {
+          this.process.stdin.write(JSON.stringify({ id, fn: functionName, args }) + '\n');
+        })
+        .catch((err) => {
+          clearTimeout(timer);
+          this.pending.delete(id);
+          reject(err);
+        });
+    });
+  }
+
+  shutdown(err) {
+    if (!this.alive) {
+      return;
+    }
+    this.alive = false;
+    this.failStartup(err);
+    for (const request of this.pending.values()) {
+      clearTimeout(request.timer);
+      request.reject(err);
+    }
+    this.pending.clear();
+  }
+}
+
+// Create and migrate the schema once, so the read-only workers never do it concurrently
+const setupDatabase = (pythonCommand) => new Promise((resolve) => {
+  const setup = spawn(pythonCommand, [WORKER_SCRIPT, '--setup'], {
+    env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
+  });
+  setup.stderr.on('data', (data) => {
+    console.error(`Stats database setup: ${data}`);
+  });
+  // Workers still start on failure and report the missing rollup per request
+  setup.on('error', (err) => {
+    console.error('Stats database setup failed:', err);
+    resolve();
+  });
+  setup.on('exit', (code) => {
+    if (code !== 0) {
+      console.error(`Stats database setup exited with code ${code}`);
+    }
+    resolve();
+  });
+});
+
+// Small pool of stats workers; dead workers are replaced on the next request
+class PythonStatsPool {
+  constructor(size = 2, pythonCommand = 'python') {
+    this.size = Math.max(1, size);
+    this.pythonCommand = pythonCommand;
+    this.workers = [];
+    this.setup = null;
+  }
+
+  pickWorker() {
+    this.workers = this.workers.filter((worker) => worker.alive);
+    while (this.workers.length < this.size) {
+      this.workers.push(new PythonStatsWorker(this.pythonCommand));
+    }
+    // Least busy worker first
+    return this.workers.reduce((best, worker) => (worker.pending.size < best.pending.size ? worker : best));
+  }
+
+  call(functionName, args = []) {
+    if (!this.setup) {
+      this.setup = setupDatabase(this.pythonCommand);
+    }
+    return this.setup.then(() => this.pickWorker().call(functionName, args));
+  }
+
+  close() {
+    for (const worker of this.workers) {
+      worker.process.kill();
+    }
+    this.workers = [];
+  }
+}
+
+module.exports = { PythonStatsPool };
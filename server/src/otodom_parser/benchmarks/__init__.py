@@ -0,0 +1,5 @@
+"""
+Standalone performance benchmarks for the Otodom parser.
+
+Run from ``server/src``, e.g. ``python -m otodom_parser.benchmarks.bench_page_extract``.
+"""
@@ -0,0 +1,63 @@
+"""
+Benchmark: tiered area extraction on detail pages built from
+tests/fixtures/sample_card.html.
+
+Each variant removes what the cheaper tiers look for, so that every tier is
+timed on its own. The html.parser column is the cost of the
+BeautifulSoup(page, "html.parser") parse alone, which the previous extractor
+paid on every page before looking for the area.
+
+    python -m otodom_parser.benchmarks.bench_area_extractor [--padding 40]
+"""
+import argparse
+import re
+
+from bs4 import BeautifulSoup
+
+from otodom_parser.benchmarks.common import TEST_FIXTURES_DIR, best_of, print_table
+from otodom_parser.html_area_extractor import extract_area
+from otodom_parser.scraper.offer_parser import to_float
+
+SAMPLE_CARD = TEST_FIXTURES_DIR / "sample_card.html"
+
+
+def detail_page(padding: int) -> str:
+    """The sample card with its "similar offers" section repeated to the size of a real detail page"""
+    page = SAMPLE_CARD.read_text(encoding="utf-8")
+    similar = re.search(r"<section><h2>Podobne.*?</section>", page, re.DOTALL).group(0)
+    return page.replace(similar, similar * padding)
+
+
+def variants(page: str):
+    """(name, page) pairs, each one found by the next tier"""
+    no_ld = re.sub(r'<script type="application/ld\+json">.*?</script>', "", page, flags=re.DOTALL)
+    no_markers = no_ld.replace('data-testid="ad-parameters-item-area"', "")
+    # Unit dropped: only the table row of the tree tier is left
+    table = no_markers.replace("58,4 m²", "").replace(
+        "</main>", "<table><tr><td>Powierzchnia</td><td>58,4</td></tr></table></main>")
+    # Number and unit in separate tags: only the joined text of a div has both
+    split = no_markers.replace("58,4 m²", "58,4<i>m</i><i>²</i>")
+    return [("full page", page), ("no JSON-LD", no_ld), ("no parameter marker", no_markers),
+            ("table row only", table), ("split unit", split)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--padding", type=int, default=40, help="Copies of the similar-offers section")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for name, page in variants(detail_page(args.padding)):
+        data = page.encode("utf-8")
+        area, tier = extract_area(data, to_float)
+        tiered = best_of(lambda: extract_area(data, to_float), repeat=args.repeat)
+        soup = best_of(lambda: BeautifulSoup(page, "html.parser"), repeat=args.repeat)
+        rows.append((name, f"{len(data) // 1024} KiB", tier, area, f"{tiered * 1000:.2f}",
+                     f"{soup * 1000:.2f}", f"{soup / tiered:.1f}x"))
+
+    print_table(["page", "size", "tier", "area", "tiered ms", "html.parser ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark: district filtering with many district slugs.
+
+Filters the same parsed offers with should_skip_offer (every filter string
+lowercased and checked per offer) and with a DistrictMatcher compiled once,
+for a growing number of slugs. Both must skip the same offers.
+
+    python -m otodom_parser.benchmarks.bench_district_filter [--offers 20000]
+"""
+import argparse
+import random
+
+from otodom_parser.benchmarks.common import best_of, print_table
+from otodom_parser.scraper.filters import DistrictMatcher, should_skip_offer
+
+SEGMENTS = ["mokotow", "wola", "ochota", "praga", "bemowo", "ursus", "wlochy", "bielany", "zoliborz",
+            "targowek", "ursynow", "wawer", "wesola", "bialoleka", "rembertow", "srodmiescie"]
+
+
+def make_districts(count: int, rng: random.Random):
+    return [f"{rng.choice(SEGMENTS)}-{rng.choice(SEGMENTS)}-{rng.randint(0, 999)}" for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=20_000)
+    args = parser.parse_args()
+    rng = random.Random(7)
+    offers = [{"district": d, "district_parent": p}
+              for d, p in zip(make_districts(args.offers, rng), make_districts(args.offers, rng))]
+
+    rows = []
+    for slug_count in (1, 10, 100, 500):
+        slugs = make_districts(slug_count, rng)
+        for mode in ("prefix", "exact"):
+            matcher = DistrictMatcher(slugs, mode)
+            expected = [should_skip_offer(offer, slugs, mode) for offer in offers]
+            assert [matcher.should_skip(o["district"], o["district_parent"]) for o in offers] == expected
+            before = best_of(lambda: [should_skip_offer(offer, slugs, mode) for offer in offers], repeat=3)
+            after = best_of(lambda: [matcher.should_skip(o["district"], o["district_parent"]) for o in offers], repeat=3)
+            rows.append((slug_count, mode, f"{len(offers) / before:,.0f}", f"{len(offers) / after:,.0f}",
+                         f"{before / after:.1f}x"))
+    print_table(["slugs", "mode", "before offers/s", "after offers/s", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
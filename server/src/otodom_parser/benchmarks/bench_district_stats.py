@@ -0,0 +1,138 @@
+"""
+Benchmark: get_city_district_stats on a large synthetic listings table.
+
+"before" is the original N+1 implementation (one GROUP BY over parents, then
+one GROUP BY per parent over raw listings). "after" is the current db function,
+which reads the listing_aggregates rollup. Both are checked for identical
+output and the SQL statements each one runs are counted. The one-off cost of
+building the rollup from the listings table is reported separately.
+
+    python -m otodom_parser.benchmarks.bench_district_stats [--rows 1000000]
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from otodom_parser import db
+from otodom_parser.benchmarks.common import print_table
+from otodom_parser.db_connection import connect
+
+PARENTS = 18
+CHILDREN_PER_PARENT = 8
+
+LEGACY_LEVEL_SQL = '''
+SELECT {column} AS district, COUNT(*) AS count, ROUND(AVG(price_per_sqm), 0) AS avg_ppsqm,
+    COUNT(CASE WHEN rooms = '1' THEN 1 END) AS room1_count,
+    ROUND(AVG(CASE WHEN rooms = '1' THEN price_per_sqm END), 0) AS room1_avg,
+    COUNT(CASE WHEN rooms = '2' THEN 1 END) AS room2_count,
+    ROUND(AVG(CASE WHEN rooms = '2' THEN price_per_sqm END), 0) AS room2_avg,
+    COUNT(CASE WHEN rooms IS NOT NULL AND rooms != '1' AND rooms != '2' THEN 1 END) AS room3plus_count,
+    ROUND(AVG(CASE WHEN rooms IS NOT NULL AND rooms != '1' AND rooms != '2' THEN price_per_sqm END), 0) AS room3plus_avg
+FROM listings WHERE {where} GROUP BY {column} ORDER BY avg_ppsqm DESC
+'''
+
+
+def _legacy_shape(row):
+    data = dict(row)
+    data["rooms"] = {
+        "1": {"count": data.pop("room1_count") or 0, "avg_ppsqm": data.pop("room1_avg")},
+        "2": {"count": data.pop("room2_count") or 0, "avg_ppsqm": data.pop("room2_avg")},
+        "3+": {"count": data.pop("room3plus_count") or 0, "avg_ppsqm": data.pop("room3plus_avg")},
+    }
+    return data
+
+
+def legacy_get_city_district_stats(city):
+    """The N+1 implementation get_city_district_stats replaced"""
+    conn = db.get_connection()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute(LEGACY_LEVEL_SQL.format(column="district_parent", where="city = ? AND district_parent IS NOT NULL"), (city,))
+    results = []
+    for row in cursor.fetchall():
+        parent = _legacy_shape(row)
+        cursor.execute(LEGACY_LEVEL_SQL.format(column="district", where="city = ? AND district_parent = ?"),
+                       (city, parent["district"]))
+        parent["child_districts"] = [_legacy_shape(child) for child in cursor.fetchall()]
+        results.append(parent)
+    conn.close()
+    return results
+
+
+def build_table(db_file: Path, rows: int, seed: int = 1):
+    rng = random.Random(seed)
+    conn = connect(db_file)
+    conn.execute('''CREATE TABLE listings (id INTEGER PRIMARY KEY AUTOINCREMENT, city TEXT NOT NULL,
+        district TEXT NOT NULL, district_parent TEXT NOT NULL, area REAL NOT NULL, price_per_sqm REAL NOT NULL,
+        floor INTEGER, rooms INTEGER, scraped_at TEXT)''')
+
+    def generate():
+        for _ in range(rows):
+            parent = rng.randrange(PARENTS)
+            child = rng.randrange(CHILDREN_PER_PARENT)
+            yield ("warszawa", f"district-{parent}-{child}", f"district-{parent}", round(rng.uniform(20, 120), 2),
+                   rng.randint(8000, 30000), rng.randint(0, 10), rng.choice([None, 0, 1, 2, 3, 4]))
+
+    with conn:
+        conn.executemany("INSERT INTO listings (city, district, district_parent, area, price_per_sqm, floor, rooms) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)", generate())
+    conn.close()
+
+
+def normalized(results):
+    """Order districts by name: ties in avg_ppsqm have no defined order in either implementation"""
+    return sorted(
+        (dict(district, child_districts=sorted(district["child_districts"], key=lambda c: c["district"]))
+         for district in results),
+        key=lambda d: d["district"]
+    )
+
+
+def measure(func):
+    """Run func("warszawa") and return (result, seconds, statements executed)"""
+    statements = []
+    original = db.get_connection
+
+    def traced_connection():
+        conn = original()
+        conn.set_trace_callback(lambda sql: statements.append(sql) if sql.lstrip().upper().startswith("SELECT") else None)
+        return conn
+
+    with patch.object(db, "get_connection", traced_connection):
+        start = time.perf_counter()
+        result = func("warszawa")
+        elapsed = time.perf_counter() - start
+    return result, elapsed, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / "district_stats.db"
+        print(f"Building {args.rows:,} synthetic listings...")
+        build_table(db_file, args.rows)
+        with patch.object(db, "db_path", db_file):
+            start = time.perf_counter()
+            db.setup_database()
+            rollup_s = time.perf_counter() - start
+            before, before_s, before_q = measure(legacy_get_city_district_stats)
+            after, after_s, after_q = measure(db.get_city_district_stats)
+
+    assert normalized(before) == normalized(after), "rollup result differs from the N+1 result"
+    print_table(
+        ["implementation", "queries", "seconds"],
+        [("N+1 (before)", before_q, f"{before_s:.2f}"), ("rollup (after)", after_q, f"{after_s:.4f}")],
+    )
+    print(f"\none-off rollup build: {rollup_s:.2f}s")
+    print(f"\nspeedup: {before_s / after_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: offers parsed per second.
+
+Parses every offer of the fixture pages with parse_offer (OfferRecord),
+parse_offer_json (the dict wrapper) and offers_to_rows (parse, filter and
+build the listing rows). Logging stays at INFO, as in a normal scrape, so
+the per-offer debug messages are skipped.
+
+    python -m otodom_parser.benchmarks.bench_offer_parser [--offers 100000]
+"""
+import argparse
+import json
+import logging
+
+from otodom_parser.benchmarks.common import best_of, load_fixture_pages, print_table
+from otodom_parser.scraper.filters import DistrictMatcher
+from otodom_parser.scraper.offer_parser import parse_offer, parse_offer_json
+from otodom_parser.scraper.page_extract import extract_offers, find_next_data
+from otodom_parser.scraper.page_parser import offers_to_rows
+
+
+def load_offers():
+    offers = []
+    for _, raw in load_fixture_pages():
+        next_data = find_next_data(raw)
+        if next_data is not None:
+            offers.extend(extract_offers(json.loads(next_data), html=raw))
+    return offers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=100_000, help="Number of offers to parse per round")
+    args = parser.parse_args()
+    # Fixtures without offers log warnings, keep them out of the table
+    logging.basicConfig(level=logging.ERROR)
+    fixtures = load_offers()
+    logging.getLogger().setLevel(logging.INFO)
+    offers = [fixtures[i % len(fixtures)] for i in range(args.offers)]
+    print(f"Parsing {len(offers)} offers ({len(fixtures)} distinct fixture offers)")
+
+    modes = [
+        ("parse_offer", lambda: [parse_offer(offer) for offer in offers]),
+        ("parse_offer_json", lambda: [parse_offer_json(offer) for offer in offers]),
+        ("offers_to_rows", lambda: offers_to_rows(offers)),
+        ("offers_to_rows (district filter)", lambda: offers_to_rows(offers, DistrictMatcher(["mokotow", "krzyki"]))),
+    ]
+    rows = []
+    for name, run in modes:
+        seconds = best_of(run, repeat=3)
+        rows.append((name, f"{seconds:.3f}", f"{len(offers) / seconds:,.0f}", f"{seconds / len(offers) * 1e6:.2f}"))
+    print_table(["mode", "seconds", "offers/s", "us/offer"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Benchmark: per-page extraction time of __NEXT_DATA__ and the listing count.
+
+"before" is the previous scrape_page path: a full html.parser soup, soup.find
+for the script tag and a regex over str(soup). "after" slices the payload and
+the count straight out of the raw bytes.
+
+    python -m otodom_parser.benchmarks.bench_page_extract
+"""
+import json
+import re
+
+from bs4 import BeautifulSoup
+
+from otodom_parser.benchmarks.common import best_of, load_fixture_pages, print_table
+from otodom_parser.scraper.page_extract import find_next_data, find_total_listings
+
+
+def extract_with_soup(raw: bytes):
+    soup = BeautifulSoup(raw.decode("utf-8"), "html.parser")
+    data = json.loads(soup.find("script", id="__NEXT_DATA__").string)
+    match = re.search(r'Zobacz (\d+) ogłoszeń', str(soup))
+    return data, int(match.group(1)) if match else None
+
+
+def extract_fast(raw: bytes):
+    return json.loads(find_next_data(raw)), find_total_listings(raw)
+
+
+def main():
+    rows = []
+    for name, raw in load_fixture_pages():
+        assert extract_with_soup(raw) == extract_fast(raw), name
+        repeat = 3 if len(raw) > 100_000 else 20
+        before = best_of(lambda: extract_with_soup(raw), repeat=repeat)
+        after = best_of(lambda: extract_fast(raw), repeat=repeat)
+        rows.append((name, f"{len(raw) / 1024:.1f}", f"{before * 1000:.3f}", f"{after * 1000:.3f}", f"{before / after:.1f}x"))
+    print_table(["page", "KB", "before ms", "after ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
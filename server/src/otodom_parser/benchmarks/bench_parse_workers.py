@@ -0,0 +1,67 @@
+"""
+Benchmark: page decoding throughput with --parse-workers.
+
+Replays the fixture pages (the real result page and the JSON test fixtures
+wrapped as pages) through parse_page, first inline in this process and then
+in a ProcessPoolExecutor with 1, 2, 4... workers up to the CPU count. Every
+mode is checked for identical rows.
+
+    python -m otodom_parser.benchmarks.bench_parse_workers [--pages 400]
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from otodom_parser.benchmarks.common import load_fixture_pages, print_table
+from otodom_parser.scraper.page_parser import parse_page
+
+
+def worker_counts(max_workers: int):
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def run_inline(pages):
+    return [parse_page(raw) for raw in pages]
+
+
+def run_pool(pages, workers):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_page, pages, chunksize=4))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=400, help="Number of pages to replay")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    # Several JSON fixtures have no offers; keep their warnings out of the table
+    logging.basicConfig(level=logging.ERROR)
+
+    fixtures = [raw for _, raw in load_fixture_pages()]
+    pages = [fixtures[i % len(fixtures)] for i in range(args.pages)]
+    print(f"Replaying {len(pages)} pages ({sum(map(len, pages)) / 1024 / 1024:.1f} MB), {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    expected = run_inline(pages)
+    inline_s = time.perf_counter() - start
+    rows = [("inline", f"{inline_s:.2f}", f"{len(pages) / inline_s:.0f}", "1.0x")]
+
+    for workers in worker_counts(args.max_workers):
+        start = time.perf_counter()
+        result = run_pool(pages, workers)
+        elapsed = time.perf_counter() - start
+        assert result == expected, f"{workers} workers returned different rows"
+        rows.append((f"{workers} processes", f"{elapsed:.2f}", f"{len(pages) / elapsed:.0f}", f"{inline_s / elapsed:.1f}x"))
+
+    print_table(["mode", "seconds", "pages/s", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: cost of a timing span around the parse of one result page, with
+the profiler off and on, against the bare call.
+
+    python -m otodom_parser.benchmarks.bench_profiler [--number 200]
+"""
+import argparse
+import json
+
+from otodom_parser.benchmarks.common import SCRAPER_FIXTURES_DIR, best_of, print_table
+from otodom_parser.scraper.page_extract import extract_offers, find_next_data
+from otodom_parser.scraper.page_parser import offers_to_rows
+from otodom_parser.scraper.profiling import Profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200, help="Calls per round")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    page = (SCRAPER_FIXTURES_DIR / "listing_page_1.html").read_bytes()
+    offers = extract_offers(json.loads(find_next_data(page)))
+    profiler = Profiler()
+
+    def spanned():
+        with profiler.span("parse.offers_to_rows"):
+            offers_to_rows(offers)
+
+    def empty_span():
+        with profiler.span("empty"):
+            pass
+
+    rows = []
+    bare = best_of(lambda: offers_to_rows(offers), repeat=args.repeat, number=args.number)
+    rows.append(("bare call", f"{bare * 1e6:.1f}", "", ""))
+    for enabled in (False, True):
+        if enabled:
+            profiler.start()
+        parse = best_of(spanned, repeat=args.repeat, number=args.number)
+        span_only = best_of(empty_span, repeat=args.repeat, number=args.number * 100)
+        profiler.stop()
+        label = "profiler on" if enabled else "profiler off"
+        rows.append((label, f"{parse * 1e6:.1f}", f"{span_only * 1e9:.0f}", f"{100 * (parse - bare) / bare:+.2f}%"))
+
+    print_table(["variant", "page parse us", "empty span ns", "overhead"], rows)
+
+
+if __name__ == "__main__":
+    main()
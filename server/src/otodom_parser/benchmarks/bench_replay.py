@@ -0,0 +1,75 @@
+"""
+Benchmark: network-free scrape throughput with --replay.
+
+Saves the fixture result page as pages 1..N of several cities, then replays
+them through the full fetch/decode/parse/write pipeline into a temporary
+database, once with parsing in threads and once per --parse-workers value.
+The stored rows are checked to be identical across modes.
+
+    python -m otodom_parser.benchmarks.bench_replay [--cities 4] [--pages 8] [--parse-workers 2]
+"""
+import argparse
+import logging
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from otodom_parser.benchmarks.common import SCRAPER_FIXTURES_DIR, print_table
+from otodom_parser.scraper.scraper import CITIES, OtodomScraper
+from otodom_parser.scraper.storage import ListingWriter
+
+
+def save_pages(directory: Path, cities: int, pages: int):
+    body = (SCRAPER_FIXTURES_DIR / "listing_page_1.html").read_bytes()
+    for city in CITIES[:cities]:
+        for page in range(1, pages + 1):
+            (directory / f"{city}__{page}.html").write_bytes(body)
+
+
+def run(source: Path, db_file: Path, parse_workers: int):
+    """Replay every saved page and return (seconds, stored rows)"""
+    with patch("otodom_parser.scraper.scraper.setup_database"):
+        scraper = OtodomScraper(preserve=True, replay=source, parse_workers=parse_workers)
+    scraper.writer = ListingWriter(db_file)
+    start = time.perf_counter()
+    assert scraper.start_scraping() is True
+    elapsed = time.perf_counter() - start
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute("SELECT city, district, district_parent, area, price_per_sqm, floor, rooms "
+                        "FROM listings ORDER BY 1, 2, 3, 4, 5, 6, 7").fetchall()
+    conn.close()
+    return elapsed, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=8, help="Pages per city (the fixture announces 8)")
+    parser.add_argument("--parse-workers", type=int, nargs="*", default=[2])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "pages"
+        source.mkdir()
+        save_pages(source, args.cities, args.pages)
+        page_count = args.cities * args.pages
+
+        results = []
+        expected = None
+        for parse_workers in [0] + args.parse_workers:
+            elapsed, rows = run(source, Path(tmp) / f"replay_{parse_workers}.db", parse_workers)
+            if expected is None:
+                expected = rows
+            assert rows == expected, f"--parse-workers {parse_workers} stored different rows"
+            mode = "threads" if parse_workers == 0 else f"{parse_workers} parse workers"
+            results.append((mode, page_count, len(rows), f"{elapsed:.2f}",
+                            f"{page_count / elapsed:.0f}", f"{len(rows) / elapsed:.0f}"))
+
+    print_table(["mode", "pages", "rows", "seconds", "pages/s", "rows/s"], results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: writing and evicting offers in ScraperDB.
+
+Compares per-offer insert_offer calls with one upsert_offers batch, then
+evicts a tenth of the offers through the temporary-table clear_old_offers
+and the scraped_at generation delete. The old NOT IN (?, ?, ...) statement
+is run too while the kept ids fit in SQLite's bound-parameter limit.
+
+    python -m otodom_parser.benchmarks.bench_scraper_db [--offers 500000] [--per-offer 5000]
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from otodom_parser.benchmarks.common import print_table
+from otodom_parser.db_connection import connect
+from otodom_parser.db_scraper import ScraperDB
+
+CITIES = ["warszawa", "krakow", "wroclaw", "gdansk", "poznan"]
+DISTRICTS = ["srodmiescie", "mokotow", "wola", "krowodrza", "oliwa", "jezyce"]
+
+
+def synthetic_offers(count: int, scraped_at: float, seed: int = 1):
+    """Generate ``count`` plausible offer dicts with ids 0..count-1"""
+    rng = random.Random(seed)
+    for i in range(count):
+        area = round(rng.uniform(20, 120), 2)
+        yield {
+            "id": str(i),
+            "title": f"Mieszkanie {i}",
+            "url": f"https://www.otodom.pl/pl/oferta/{i}",
+            "city": rng.choice(CITIES),
+            "district": rng.choice(DISTRICTS),
+            "price": round(area * rng.randint(7000, 30000), 2),
+            "currency": "PLN",
+            "rooms": rng.choice([1, 2, 3, 4]),
+            "area": area,
+            "floor": rng.randint(0, 10),
+            "scraped_at": scraped_at,
+        }
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def not_in_list(db_file: Path, keep_ids) -> float:
+    """The previous clear_old_offers statement, one bound parameter per kept id"""
+    conn = connect(db_file)
+    start = time.perf_counter()
+    with conn:
+        conn.execute(f"DELETE FROM offers WHERE id NOT IN ({','.join('?' * len(keep_ids))})", keep_ids)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=500_000)
+    parser.add_argument("--per-offer", type=int, default=5_000, help="Offers written one call each (extrapolated)")
+    args = parser.parse_args()
+    keep = args.offers - args.offers // 10
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        per_offer_db = ScraperDB(tmp / "per_offer.db")
+        per_offer = timed(lambda: [per_offer_db.insert_offer(offer)
+                                   for offer in synthetic_offers(args.per_offer, 1.0)])
+        rows.append(("insert_offer", args.per_offer, f"{per_offer:.2f}", f"{args.per_offer / per_offer:,.0f}"))
+
+        scraper_db = ScraperDB(tmp / "offers.db")
+        insert = timed(lambda: scraper_db.upsert_offers(synthetic_offers(args.offers, 1.0)))
+        rows.append(("upsert_offers (insert)", args.offers, f"{insert:.2f}", f"{args.offers / insert:,.0f}"))
+        update = timed(lambda: scraper_db.upsert_offers(synthetic_offers(keep, 2.0, seed=2)))
+        rows.append(("upsert_offers (update)", keep, f"{update:.2f}", f"{keep / update:,.0f}"))
+
+        # The second generation rewrote 90% of the offers
+        generation = timed(lambda: scraper_db.clear_offers_scraped_before(2.0))
+        rows.append(("clear_offers_scraped_before", args.offers - keep, f"{generation:.2f}",
+                     f"{(args.offers - keep) / generation:,.0f}"))
+
+        scraper_db.upsert_offers(synthetic_offers(args.offers, 1.0))
+        keep_ids = [str(i) for i in range(keep)]
+        temp_table = timed(lambda: scraper_db.clear_old_offers(exclude_ids=keep_ids))
+        rows.append(("clear_old_offers (temp table)", args.offers - keep, f"{temp_table:.2f}",
+                     f"{(args.offers - keep) / temp_table:,.0f}"))
+
+        scraper_db.upsert_offers(synthetic_offers(args.offers, 1.0))
+        try:
+            legacy = not_in_list(scraper_db.db_path, keep_ids)
+            rows.append(("NOT IN (?, ...) list", args.offers - keep, f"{legacy:.2f}",
+                         f"{(args.offers - keep) / legacy:,.0f}"))
+        except sqlite3.OperationalError as e:
+            rows.append(("NOT IN (?, ...) list", args.offers - keep, "failed", str(e)))
+
+    print_table(["path", "offers", "seconds", "offers/s"], rows)
+    print(f"\nupsert speedup over insert_offer: {(args.offers / insert) / (args.per_offer / per_offer):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
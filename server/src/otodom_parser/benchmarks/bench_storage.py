@@ -0,0 +1,75 @@
+"""
+Benchmark: inserting synthetic listings through the per-row insert_listing
+path and through the batched ListingWriter.
+
+    python -m otodom_parser.benchmarks.bench_storage [--rows 100000] [--batch-size 500]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from otodom_parser.benchmarks.common import print_table
+from otodom_parser.scraper import storage
+from otodom_parser.scraper.storage import ListingWriter, insert_listing
+
+CITIES = ["warszawa", "krakow", "wroclaw", "gdansk", "poznan"]
+DISTRICTS = ["srodmiescie", "mokotow", "wola", "krowodrza", "oliwa", "jezyce"]
+
+
+def synthetic_listings(count: int, seed: int = 1):
+    """Generate keyword arguments for ``count`` plausible listings"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        district = rng.choice(DISTRICTS)
+        yield dict(
+            city=rng.choice(CITIES),
+            district=district,
+            district_parent=district,
+            area=round(rng.uniform(20, 120), 2),
+            price_per_sqm=rng.randint(7000, 30000),
+            floor=rng.randint(0, 10),
+            rooms=rng.choice([None, 1, 2, 3, 4]),
+        )
+
+
+def run_per_row(db_file: Path, rows: int) -> float:
+    with patch.object(storage, "db_path", db_file):
+        start = time.perf_counter()
+        for listing in synthetic_listings(rows):
+            insert_listing(**listing)
+        return time.perf_counter() - start
+
+
+def run_batched(db_file: Path, rows: int, batch_size: int) -> float:
+    start = time.perf_counter()
+    with ListingWriter(db_file, batch_size=batch_size) as writer:
+        for listing in synthetic_listings(rows):
+            writer.add(**listing)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        per_row = run_per_row(Path(tmp) / "per_row.db", args.rows)
+        batched = run_batched(Path(tmp) / "batched.db", args.rows, args.batch_size)
+
+    print_table(
+        ["path", "rows", "seconds", "rows/s"],
+        [
+            ("insert_listing", args.rows, f"{per_row:.2f}", f"{args.rows / per_row:,.0f}"),
+            (f"ListingWriter(batch={args.batch_size})", args.rows, f"{batched:.2f}", f"{args.rows / batched:,.0f}"),
+        ],
+    )
+    print(f"\nspeedup: {per_row / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Helpers shared by the benchmark scripts
+"""
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+PACKAGE_DIR = Path(__file__).resolve().parents[1]
+SCRAPER_FIXTURES_DIR = PACKAGE_DIR / "scraper" / "fixtures"
+TEST_FIXTURES_DIR = PACKAGE_DIR / "tests" / "fixtures"
+
+
+def best_of(func: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """Return the best wall time in seconds of ``number`` calls, over ``repeat`` rounds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def load_fixture_pages() -> List[Tuple[str, bytes]]:
+    """Real result page plus every JSON test fixture wrapped as a __NEXT_DATA__ page"""
+    pages = [("listing_page_1.html", (SCRAPER_FIXTURES_DIR / "listing_page_1.html").read_bytes())]
+    for fixture in sorted(TEST_FIXTURES_DIR.glob("*.json")):
+        payload = fixture.read_text(encoding="utf-8")
+        html = ('<html><head><meta name="description" content="Zobacz 36 ogłoszeń"></head><body>'
+                f'<script id="__NEXT_DATA__" type="application/json">{payload}</script></body></html>')
+        pages.append((fixture.name, html.encode("utf-8")))
+    return pages
+
+
+def print_table(headers: List[str], rows: List[Tuple]):
+    """Print rows as a plain-text table with right-aligned columns"""
+    cells = [[str(h) for h in headers]] + [[str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for idx, row in enumerate(cells):
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+        if idx == 0:
+            print("  ".join("-" * width for width in widths))
@@ -0,0 +1,5 @@
+"""
+pytest-benchmark regression suite with a stored throughput baseline.
+
+Run from ``server/src``, e.g. ``python -m pytest otodom_parser/benchmarks/suite``.
+"""
@@ -0,0 +1,128 @@
+"""
+Throughput baseline for the benchmark suite.
+
+Every benchmark reports its items per second through the ``throughput``
+fixture, which compares it with ``baseline.json`` and fails the test when it
+dropped by more than the threshold. Throughput only compares on the same
+kind of machine, so the baseline records where it was measured; on any other
+machine the benchmarks are skipped until the baseline is rewritten there
+with ``--bench-update-baseline``.
+"""
+import json
+import logging
+import os
+import platform
+from pathlib import Path
+
+import pytest
+
+SUITE_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = SUITE_DIR / "baseline.json"
+# Allowed throughput drop against the scaled baseline
+DEFAULT_THRESHOLD = 0.3
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("otodom benchmarks")
+    group.addoption("--bench-baseline", default=str(BASELINE_PATH), help="Baseline JSON file (default: suite/baseline.json)")
+    group.addoption("--bench-threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="Fail when throughput drops by more than this fraction (default: 0.3)")
+    group.addoption("--bench-update-baseline", action="store_true", help="Write the measured throughput as the new baseline")
+
+
+def _named(config) -> bool:
+    """Whether the suite or one of its files was named on the command line"""
+    for arg in config.args:
+        path = Path(config.invocation_params.dir, arg.split("::")[0]).resolve()
+        if path == SUITE_DIR or SUITE_DIR in path.parents:
+            return True
+    return False
+
+
+def pytest_collection_modifyitems(config, items):
+    # A plain test run of the package skips the benchmarks
+    if _named(config):
+        return
+    skip = pytest.mark.skip(reason="benchmark suite, run with: python -m pytest otodom_parser/benchmarks/suite")
+    for item in items:
+        if SUITE_DIR in Path(str(item.fspath)).parents:
+            item.add_marker(skip)
+
+
+def machine() -> str:
+    """Platform, interpreter minor version and CPU count the throughput was measured with"""
+    version = ".".join(platform.python_version_tuple()[:2])
+    return (f"{platform.system()}-{platform.python_implementation()}-{version}-"
+            f"{platform.machine()}-{os.cpu_count()}cpu")
+
+
+class Baseline:
+    """Stored and measured throughput of the benchmarks"""
+
+    def __init__(self, path: Path, threshold: float, update: bool):
+        self.path = path
+        self.threshold = threshold
+        self.update = update
+        self.machine = machine()
+        self.measured = {}
+        self.stored = {}
+        self.stored_machine = None
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError as e:
+                logging.error(f"Ignoring unreadable baseline {path}: {str(e)}")
+                data = {}
+            self.stored_machine = data.get("machine")
+            self.stored = data.get("benchmarks", {})
+
+    def check(self, name: str, items_per_s: float):
+        """Record a measurement and fail the test if it regressed against a baseline from this machine"""
+        self.measured[name] = {"items_per_s": round(items_per_s, 1)}
+        if self.update:
+            return
+        if self.stored_machine != self.machine:
+            pytest.skip(f"Baseline {self.path.name} was measured on {self.stored_machine}, not {self.machine}; "
+                        f"throughput cannot be compared, re-baseline with --bench-update-baseline")
+        stored = self.stored.get(name)
+        if stored is None:
+            pytest.fail(f"{name} has no baseline in {self.path.name}, add it with --bench-update-baseline")
+        expected = stored["items_per_s"]
+        if items_per_s < expected * (1 - self.threshold):
+            pytest.fail(f"{name}: {items_per_s:,.0f} items/s is {100 * (1 - items_per_s / expected):.0f}% below "
+                        f"the baseline of {expected:,.0f} items/s (threshold {100 * self.threshold:.0f}%)")
+
+    def save(self):
+        # A run of part of the suite keeps the other entries measured on this machine
+        benchmarks = dict(self.stored) if self.stored_machine == self.machine else {}
+        benchmarks.update(self.measured)
+        data = {"machine": self.machine, "benchmarks": dict(sorted(benchmarks.items()))}
+        self.path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+@pytest.fixture(scope="session")
+def baseline(request):
+    config = request.config
+    store = Baseline(Path(config.getoption("--bench-baseline")), config.getoption("--bench-threshold"),
+                     config.getoption("--bench-update-baseline"))
+    yield store
+    if store.update and store.measured:
+        store.save()
+
+
+@pytest.fixture
+def throughput(request, benchmark, baseline):
+    """
+    Call with the number of items one benchmark round handles, after running the benchmark
+
+    Returns:
+        Items per second at the median round time, None when benchmarks are disabled
+    """
+    def check(items: int):
+        if benchmark.stats is None:
+            return None
+        items_per_s = items / benchmark.stats.stats.median
+        benchmark.extra_info["items_per_s"] = round(items_per_s, 1)
+        baseline.check(request.node.name, items_per_s)
+        return items_per_s
+    return check
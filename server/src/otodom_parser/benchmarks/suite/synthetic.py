@@ -0,0 +1,101 @@
+"""
+Synthetic offers, result pages and listings tables for the benchmark suite,
+in the shapes of the test fixtures
+"""
+import json
+import random
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from otodom_parser.benchmarks.bench_district_stats import build_table
+
+CITIES = ["warszawa", "krakow", "wroclaw", "gdansk", "poznan", "lodz"]
+DISTRICTS = ["mokotow", "wola", "srodmiescie", "krzyki", "psie-pole", "podgorze", "oliwa", "jezyce",
+             "bemowo", "ursynow", "zoliborz", "bielany"]
+FLOORS = ["GROUND", "FIRST", "SECOND", "THIRD", "FOURTH", "FIFTH", "TENTH"]
+ROOMS = ["ONE", "TWO", "THREE", "FOUR", "FIVE"]
+
+
+def search_ad(i: int, rng: random.Random) -> dict:
+    """Offer in the searchAds.items shape of tests/fixtures/item_searchAds.json"""
+    city, district = rng.choice(CITIES), rng.choice(DISTRICTS)
+    area = round(rng.uniform(20, 120), 2)
+    price = rng.randint(7000, 30000) * area
+    return {
+        "id": str(60_000_000 + i),
+        "slug": f"mieszkanie-{district}-ID{i}",
+        "areaInSquareMeters": area,
+        "pricePerSquareMeter": {"value": round(price / area)},
+        "totalPrice": {"value": round(price)},
+        "floorNumber": rng.choice(FLOORS),
+        "roomsNumber": rng.choice(ROOMS),
+        "location": {
+            "address": {"city": {"name": city.capitalize()}},
+            "reverseGeocoding": {"locations": [
+                {"id": f"mazowieckie/{city}"},
+                {"id": f"mazowieckie/{city}/{city}/{city}/{district}"},
+            ]},
+        },
+    }
+
+
+def v3_item(i: int, rng: random.Random) -> dict:
+    """Offer in the dehydratedState searchAds.items shape of tests/fixtures/next_data_v3.json"""
+    return {
+        "id": str(65_000_000 + i),
+        "areaInM2": round(rng.uniform(20, 120), 1),
+        "pricePerSqm": rng.randint(7000, 30000),
+        "floorNumber": rng.randint(0, 10),
+        "location": {"city": rng.choice(CITIES).capitalize(), "district": rng.choice(DISTRICTS)},
+    }
+
+
+def v4_item(i: int, rng: random.Random) -> dict:
+    """Offer in the dehydratedState searchAds.results shape of tests/fixtures/next_data_v4.json"""
+    area = round(rng.uniform(20, 120), 1)
+    return {
+        "id": str(65_900_000 + i),
+        "areaInM2": area,
+        "price": round(rng.randint(7000, 30000) * area),
+        "floorNumber": rng.randint(0, 10),
+        "location": {"city": rng.choice(CITIES).capitalize(), "district": rng.choice(DISTRICTS)},
+    }
+
+
+SHAPES: Dict[str, Callable[[int, random.Random], dict]] = {
+    "searchAds": search_ad,
+    "v3": v3_item,
+    "v4": v4_item,
+}
+
+
+def synthetic_offers(count: int, shape: str = "searchAds", seed: int = 1) -> List[dict]:
+    """``count`` offers of one of the SHAPES, the same for the same seed"""
+    rng = random.Random(seed)
+    make = SHAPES[shape]
+    return [make(i, rng) for i in range(count)]
+
+
+def next_data(offers: List[dict], container: str = "adSearchResult") -> dict:
+    """__NEXT_DATA__ JSON with the offers under pageProps.<container>.searchAds.items"""
+    return {"props": {"pageProps": {container: {
+        "searchAds": {"items": offers, "pagination": {"totalItems": len(offers), "itemsPerPage": 36}}
+    }}}}
+
+
+def result_page(offers: List[dict], container: str = "adSearchResult") -> bytes:
+    """Result page HTML carrying the offers in its __NEXT_DATA__ script"""
+    payload = json.dumps(next_data(offers, container), ensure_ascii=False)
+    return ('<html><head><meta name="description" content="Zobacz 36 ogłoszeń"></head><body>'
+            f'<script id="__NEXT_DATA__" type="application/json">{payload}</script></body></html>').encode("utf-8")
+
+
+def parsed_offers(count: int, seed: int = 1) -> List[Tuple[str, str]]:
+    """(district, district_parent) pairs of parsed offers, the input of DistrictMatcher.should_skip"""
+    rng = random.Random(seed)
+    return [(rng.choice(DISTRICTS), rng.choice(DISTRICTS)) for _ in range(count)]
+
+
+def listings_table(db_file: Path, rows: int, seed: int = 1):
+    """Listings table of ``rows`` rows over 18 parent districts of warszawa, see bench_district_stats"""
+    build_table(db_file, rows, seed)
@@ -0,0 +1,82 @@
+import json
+import logging
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from otodom_parser.benchmarks.bench_area_extractor import detail_page, variants
+from otodom_parser.benchmarks.suite.synthetic import SHAPES, parsed_offers, result_page, synthetic_offers
+from otodom_parser.html_area_extractor import extract_area_from_html
+from otodom_parser.scraper.filters import DistrictMatcher
+from otodom_parser.scraper.offer_parser import parse_offer, to_float
+from otodom_parser.scraper.page_extract import extract_offers, find_next_data
+from otodom_parser.scraper.page_parser import offers_to_rows
+
+OFFERS = 5000
+PAGES = 50
+DISTRICT_FILTER = ["mokotow", "krzyki", "oliwa"]
+
+
+@pytest.fixture(autouse=True)
+def info_logging():
+    # As in a normal scrape: the per-offer debug messages are not formatted
+    level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.INFO)
+    yield
+    logging.getLogger().setLevel(level)
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_parse_offer(benchmark, throughput, shape):
+    offers = synthetic_offers(OFFERS, shape)
+    parsed = benchmark(lambda: [parse_offer(offer) for offer in offers])
+    assert all(record is not None for record in parsed)
+    throughput(len(offers))
+
+
+@pytest.mark.parametrize("mode", ["prefix", "exact"])
+def test_offers_to_rows(benchmark, throughput, mode):
+    # The parse stage: parse, filter by district and build the listing rows
+    offers = synthetic_offers(OFFERS)
+    matcher = DistrictMatcher(DISTRICT_FILTER, mode)
+    rows = benchmark(offers_to_rows, offers, matcher, [])
+    assert 0 < len(rows) < len(offers)
+    throughput(len(offers))
+
+
+@pytest.mark.parametrize("mode", ["prefix", "exact"])
+def test_district_matcher(benchmark, throughput, mode):
+    offers = parsed_offers(OFFERS * 4)
+    matcher = DistrictMatcher(DISTRICT_FILTER, mode)
+    skip = matcher.should_skip
+    skipped = benchmark(lambda: sum(skip(district, parent) for district, parent in offers))
+    assert 0 < skipped < len(offers)
+    throughput(len(offers))
+
+
+@pytest.mark.parametrize("container", ["adSearchResult", "data"])
+def test_find_next_data(benchmark, throughput, container):
+    pages = [result_page(synthetic_offers(36, seed=page), container) for page in range(PAGES)]
+    found = benchmark(lambda: [find_next_data(page) for page in pages])
+    assert all(payload is not None for payload in found)
+    throughput(len(pages))
+
+
+@pytest.mark.parametrize("container", ["adSearchResult", "data"])
+def test_extract_offers(benchmark, throughput, container):
+    # Each page is decoded the way the decode stage does it: slice, json.loads, extract
+    pages = [result_page(synthetic_offers(36, seed=page), container) for page in range(PAGES)]
+
+    def decode():
+        return sum(len(extract_offers(json.loads(find_next_data(page)), html=page)) for page in pages)
+
+    assert benchmark(decode) == 36 * PAGES
+    throughput(36 * PAGES)
+
+
+@pytest.mark.parametrize("variant", ["full page", "no JSON-LD", "no parameter marker", "table row only"])
+def test_extract_area_from_html(benchmark, throughput, variant):
+    page = dict(variants(detail_page(padding=40)))[variant].encode("utf-8")
+    assert benchmark(extract_area_from_html, page, to_float) == 58.4
+    throughput(1)
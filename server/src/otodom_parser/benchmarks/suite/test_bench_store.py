@@ -0,0 +1,76 @@
+import itertools
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from otodom_parser import db
+from otodom_parser.benchmarks.bench_storage import synthetic_listings
+from otodom_parser.benchmarks.suite.synthetic import listings_table
+from otodom_parser.scraper import storage
+from otodom_parser.scraper.storage import ListingWriter
+
+STATS_ROWS = 100_000
+# Listings on one result page
+PAGE_ROWS = 36
+
+
+@pytest.fixture
+def listings_db(tmp_path):
+    db_file = tmp_path / "listings.db"
+    with patch.object(storage, "db_path", db_file), patch.object(db, "db_path", db_file):
+        yield db_file
+
+
+@pytest.fixture(scope="module")
+def stats_db(tmp_path_factory):
+    db_file = tmp_path_factory.mktemp("stats") / "district_stats.db"
+    listings_table(db_file, STATS_ROWS)
+    with patch.object(db, "db_path", db_file):
+        # Builds the listing_aggregates rollup from the listings table
+        db.setup_database()
+        yield db_file
+
+
+@pytest.mark.parametrize("offers", ["new", "unchanged"])
+def test_listing_writer_write_page(benchmark, throughput, listings_db, offers):
+    # The incremental write stage: one transaction per page, upserted by offer id
+    listings = [tuple(row.values()) for row in synthetic_listings(PAGE_ROWS)]
+    ids = itertools.count()
+    writer = ListingWriter(listings_db)
+
+    def page():
+        if offers == "new":
+            return [listing + (str(next(ids)),) for listing in listings]
+        return [listing + (str(i),) for i, listing in enumerate(listings)]
+
+    writer.write_page(page())
+    written, unchanged = benchmark(lambda: writer.write_page(page()))
+    assert (written, unchanged) == ((PAGE_ROWS, 0) if offers == "new" else (0, PAGE_ROWS))
+    writer.close()
+    throughput(PAGE_ROWS)
+
+
+def test_listing_writer_batch(benchmark, throughput, listings_db):
+    rows = list(synthetic_listings(1000))
+    # One transaction per page, as in the write stage
+    writer = ListingWriter(listings_db, batch_size=len(rows) + 1)
+
+    def write_page():
+        for row in rows:
+            writer.add(**row)
+        return writer.flush()
+
+    assert benchmark(write_page) == len(rows)
+    writer.close()
+    throughput(len(rows))
+
+
+def test_get_city_district_stats(benchmark, throughput, stats_db, monkeypatch):
+    # The autouse isolated_db fixture points db_path at an empty file for every test
+    monkeypatch.setattr(db, "db_path", stats_db)
+    stats = benchmark(db.get_city_district_stats, "warszawa")
+    assert len(stats) == 18
+    assert sum(parent["count"] for parent in stats) == STATS_ROWS
+    throughput(1)
@@ -0,0 +1,19 @@
+import sys
+import pathlib
+
+import pytest
+
+# Add the parent directory to the path to make the package importable
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from otodom_parser import db, db_scraper
+from otodom_parser.scraper import storage
+
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    """Point the default database path at a temporary file, so tests never write to the tracked otodom.db"""
+    db_file = tmp_path / "otodom.db"
+    for module in (db, db_scraper, storage):
+        monkeypatch.setattr(module, "db_path", db_file)
+    return db_file
@@ -1,17 +1,143 @@
 import sqlite3
 import logging
+import math
 import os
 from datetime import datetime
 from pathlib import Path
 
-# Database file path - ensure it's created in the server/ directory
-db_path = Path(__file__).resolve().parent / 'otodom.db'  # /server/src/otodom_parser/otodom.db
+try:
+    from .db_connection import connect, sync_indexes
+except ImportError:  # imported as a top-level module (e.g. by the Node.js stats route)
+    from db_connection import connect, sync_indexes
+
+# Database file path - ensure it's created in the server/ directory, OTODOM_DB_PATH overrides it
+db_path = Path(os.getenv('OTODOM_DB_PATH') or Path(__file__).resolve().parent / 'otodom.db')  # /server/src/otodom_parser/otodom.db
 db_path.touch(exist_ok=True)  # creates file if absent
 
+# Indexes maintained by setup_database. The first one covers every stats query
+# (city filter, parent/district grouping, room buckets and the averaged price)
+LISTINGS_INDEXES = {
+    "idx_listings_city_district_rooms_ppsm": "city, district_parent, district, rooms, price_per_sqm",
+    "idx_listings_scraped_at": "scraped_at",
+}
+
+# Columns of the incremental mode: the Otodom offer id, a hash of the stored fields,
+# whether the offer is still in the search results and when it was last seen there
+LISTINGS_OFFER_COLUMNS = {
+    "offer_id": "TEXT",
+    "content_hash": "TEXT",
+    "active": "INTEGER NOT NULL DEFAULT 1",
+    "last_seen_at": "TEXT",
+}
+
+# Not in LISTINGS_INDEXES since sync_indexes only manages plain indexes. Rows
+# stored before offer ids were kept have NULL and are not deduplicated.
+LISTINGS_OFFER_ID_INDEX_SQL = '''
+CREATE UNIQUE INDEX IF NOT EXISTS uq_listings_offer_id ON listings (offer_id) WHERE offer_id IS NOT NULL
+'''
+
+# Rollup of listings per (city, parent district, district, room bucket). Readers
+# derive averages from n/sum_ppsm and variances from sum_sq_ppsm without touching
+# the listings table. NULL keys are stored as '' so they take part in the primary key.
+LISTING_AGGREGATES_SQL = '''
+CREATE TABLE IF NOT EXISTS listing_aggregates (
+    city TEXT NOT NULL,
+    district_parent TEXT NOT NULL,
+    district TEXT NOT NULL,
+    room_bucket TEXT NOT NULL,   -- 'unknown', '0', '1', '2' or '3+'
+    n INTEGER NOT NULL,
+    sum_ppsm REAL NOT NULL,
+    sum_sq_ppsm REAL NOT NULL,
+    PRIMARY KEY (city, district_parent, district, room_bucket)
+) WITHOUT ROWID
+'''
+
+UPSERT_AGGREGATE_SQL = '''
+INSERT INTO listing_aggregates (city, district_parent, district, room_bucket, n, sum_ppsm, sum_sq_ppsm)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (city, district_parent, district, room_bucket) DO UPDATE SET
+    n = n + excluded.n,
+    sum_ppsm = sum_ppsm + excluded.sum_ppsm,
+    sum_sq_ppsm = sum_sq_ppsm + excluded.sum_sq_ppsm
+'''
+
+REBUILD_AGGREGATES_SQL = '''
+INSERT INTO listing_aggregates (city, district_parent, district, room_bucket, n, sum_ppsm, sum_sq_ppsm)
+SELECT
+    IFNULL(city, ''),
+    IFNULL(district_parent, ''),
+    IFNULL(district, ''),
+    CASE WHEN rooms IS NULL THEN 'unknown'
+         WHEN rooms >= 3 THEN '3+'
+         WHEN rooms = 2 THEN '2'
+         WHEN rooms = 1 THEN '1'
+         ELSE '0'
+    END,
+    COUNT(*),
+    TOTAL(price_per_sqm),
+    TOTAL(price_per_sqm * price_per_sqm)
+FROM listings
+WHERE active = 1
+GROUP BY 1, 2, 3, 4
+'''
+
+def room_bucket(rooms):
+    """Rollup bucket of a room count, matching the CASE in REBUILD_AGGREGATES_SQL"""
+    if rooms is None:
+        return 'unknown'
+    if rooms >= 3:
+        return '3+'
+    if rooms in (1, 2):
+        return str(rooms)
+    return '0'
+
+def add_to_listing_aggregates(cursor, listings, sign=1):
+    """
+    Fold newly inserted listings into the rollup; run it in the transaction of the insert
+    
+    Args:
+        cursor: Cursor of the connection that inserted the listings
+        listings: Iterable of (city, district, district_parent, price_per_sqm, rooms)
+        sign: -1 to take the listings out of the rollup (updated or deactivated rows)
+    """
+    deltas = {}
+    for city, district, district_parent, price_per_sqm, rooms in listings:
+        key = (city or '', district_parent or '', district or '', room_bucket(rooms))
+        delta = deltas.setdefault(key, [0, 0.0, 0.0])
+        delta[0] += sign
+        delta[1] += sign * price_per_sqm
+        delta[2] += sign * price_per_sqm * price_per_sqm
+    cursor.executemany(UPSERT_AGGREGATE_SQL, [key + tuple(delta) for key, delta in deltas.items()])
+    if sign < 0:
+        cursor.execute('DELETE FROM listing_aggregates WHERE n <= 0')
+
+def migrate_listings(cursor):
+    """Add the incremental-mode columns and the offer id index to the listings table"""
+    cursor.execute("PRAGMA table_info(listings)")
+    columns = [column[1] for column in cursor.fetchall()]
+    for name, definition in LISTINGS_OFFER_COLUMNS.items():
+        if name not in columns:
+            cursor.execute(f'ALTER TABLE listings ADD COLUMN {name} {definition}')
+    cursor.execute(LISTINGS_OFFER_ID_INDEX_SQL)
+
+def rebuild_listing_aggregates(cursor):
+    """Recompute the whole rollup from the listings table"""
+    cursor.execute('DELETE FROM listing_aggregates')
+    cursor.execute(REBUILD_AGGREGATES_SQL)
+
+def ensure_listing_aggregates(cursor):
+    """Create the rollup table, filling it from existing listings the first time"""
+    cursor.execute(LISTING_AGGREGATES_SQL)
+    cursor.execute('SELECT EXISTS (SELECT 1 FROM listing_aggregates), EXISTS (SELECT 1 FROM listings)')
+    has_aggregates, has_listings = cursor.fetchone()
+    if has_listings and not has_aggregates:
+        logging.info("Building listing_aggregates from existing listings")
+        rebuild_listing_aggregates(cursor)
+
 def get_connection():
     """Get a connection to the SQLite database"""
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         return conn
     except sqlite3.Error as e:
         logging.error(f"Database connection error: {str(e)}")
@@ -34,7 +160,11 @@ def setup_database():
             price_per_sqm REAL NOT NULL, -- zł
             floor INTEGER,               -- 0 = parter
             rooms INTEGER,               -- number of rooms
-            scraped_at TEXT              -- ISO timestamp
+            scraped_at TEXT,             -- ISO timestamp
+            offer_id TEXT,               -- Otodom offer id
+            content_hash TEXT,           -- hash of the stored fields
+            active INTEGER NOT NULL DEFAULT 1,  -- 0 = gone from the search results
+            last_seen_at TEXT            -- ISO timestamp
         )
         ''')
         
@@ -45,6 +175,10 @@ def setup_database():
             cursor.execute('ALTER TABLE listings ADD COLUMN district_parent TEXT')
         if 'rooms' not in columns:
             cursor.execute('ALTER TABLE listings ADD COLUMN rooms INTEGER')
+        migrate_listings(cursor)
+        
+        sync_indexes(cursor, 'listings', LISTINGS_INDEXES)
+        ensure_listing_aggregates(cursor)
         
         conn.commit()
         conn.close()
@@ -59,6 +193,8 @@ def clear_listings():
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute('DELETE FROM listings')
+        cursor.execute(LISTING_AGGREGATES_SQL)
+        cursor.execute('DELETE FROM listing_aggregates')
         conn.commit()
         conn.close()
         logging.info("Cleared all listings from database")
@@ -83,6 +219,7 @@ def insert_listing(city, district, district_parent, area, price_per_sqm, floor,
         INSERT INTO listings (city, district, district_parent, area, price_per_sqm, floor, rooms, scraped_at)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (city, district, district_parent, area, price_per_sqm, floor, rooms, timestamp))
+        add_to_listing_aggregates(cursor, [(city, district, district_parent, price_per_sqm, rooms)])
         
         conn.commit()
         conn.close()
@@ -99,9 +236,9 @@ def get_city_stats():
         
         cursor.execute('''
         SELECT city,
-               ROUND(AVG(price_per_sqm), 0) AS avg_price_sqm,
-               COUNT(*) AS listing_count
-        FROM listings
+               ROUND(SUM(sum_ppsm) / SUM(n), 0) AS avg_price_sqm,
+               SUM(n) AS listing_count
+        FROM listing_aggregates
         GROUP BY city
         ORDER BY avg_price_sqm DESC
         ''')
@@ -136,7 +273,7 @@ def get_all_cities():
         conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT DISTINCT city FROM listings ORDER BY city')
+        cursor.execute("SELECT DISTINCT city FROM listing_aggregates WHERE city != '' ORDER BY city")
         cities = [row[0] for row in cursor.fetchall()]
         
         conn.close()
@@ -145,116 +282,84 @@ def get_all_cities():
         logging.error(f"Error getting cities: {str(e)}")
         return []
 
+# Room buckets of the district stats; rooms other than 1 and 2 (including studios) count as "3+"
+ROOM_KEYS = ("1", "2", "3+")
+ROOM_KEY_BY_BUCKET = {"1": "1", "2": "2", "3+": "3+", "0": "3+"}
+
+DISTRICT_ROOM_SUMS_SQL = '''
+SELECT
+    district_parent,
+    district,
+    room_bucket,
+    n,
+    sum_ppsm
+FROM
+    listing_aggregates
+WHERE
+    city = ? AND district_parent != ''
+'''
+
+def _round_avg(total, count):
+    """Average rounded half away from zero, matching SQLite's ROUND(AVG(x), 0)"""
+    if not count:
+        return None
+    avg = total / count
+    return float(math.floor(avg + 0.5)) if avg >= 0 else float(math.ceil(avg - 0.5))
+
+def _new_bucket():
+    return {"count": 0, "total": 0.0, "rooms": {key: [0, 0.0] for key in ROOM_KEYS}}
+
+def _finish_bucket(name, bucket):
+    """Turn accumulated sums into the API shape of a district"""
+    return {
+        "district": name,
+        "count": bucket["count"],
+        "avg_ppsqm": _round_avg(bucket["total"], bucket["count"]),
+        "rooms": {
+            key: {"count": count, "avg_ppsqm": _round_avg(total, count)}
+            for key, (count, total) in bucket["rooms"].items()
+        },
+    }
+
+def _by_avg_desc(item):
+    # SQLite sorts NULL last in DESC order
+    return (item["avg_ppsqm"] is None, -(item["avg_ppsqm"] or 0))
+
 def get_city_district_stats(city):
-    """Get district statistics for a specific city, including room breakdowns, aggregated by parent district"""
+    """Get district statistics for a specific city, including room breakdowns, aggregated by parent district
+    
+    The listing_aggregates rollup holds count and sum per (parent, district, room bucket);
+    parent and child statistics are folded from those partial sums in Python.
+    """
     try:
         conn = get_connection()
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
+        cursor.execute(DISTRICT_ROOM_SUMS_SQL, (city,))
+        rows = cursor.fetchall()
+        conn.close()
         
-        # Execute a query that gets all needed stats grouped by district_parent
-        cursor.execute('''
-        SELECT 
-            district_parent AS district,
-            COUNT(*) AS count,
-            ROUND(AVG(price_per_sqm), 0) AS avg_ppsqm,
-            
-            COUNT(CASE WHEN rooms = '1' THEN 1 END) AS room1_count,
-            ROUND(AVG(CASE WHEN rooms = '1' THEN price_per_sqm END), 0) AS room1_avg,
-            
-            COUNT(CASE WHEN rooms = '2' THEN 1 END) AS room2_count,
-            ROUND(AVG(CASE WHEN rooms = '2' THEN price_per_sqm END), 0) AS room2_avg,
-            
-            COUNT(CASE WHEN rooms IS NOT NULL AND rooms != '1' AND rooms != '2' THEN 1 END) AS room3plus_count,
-            ROUND(AVG(CASE WHEN rooms IS NOT NULL AND rooms != '1' AND rooms != '2' THEN price_per_sqm END), 0) AS room3plus_avg
-        FROM 
-            listings
-        WHERE 
-            city = ? AND district_parent IS NOT NULL
-        GROUP BY 
-            district_parent
-        ORDER BY 
-            avg_ppsqm DESC
-        ''', (city,))
+        parents = {}
+        for district_parent, district, bucket, count, total in rows:
+            room_key = ROOM_KEY_BY_BUCKET.get(bucket)
+            parent = parents.setdefault(district_parent, (_new_bucket(), {}))
+            child = parent[1].setdefault(district, _new_bucket())
+            for sums in (parent[0], child):
+                sums["count"] += count
+                sums["total"] += total
+                if room_key is not None:
+                    sums["rooms"][room_key][0] += count
+                    sums["rooms"][room_key][1] += total
         
-        rows = cursor.fetchall()
         results = []
-        
-        for row in rows:
-            # Convert SQLite Row to dictionary and restructure for the API
-            district_data = dict(row)
-            
-            # Create nested room stats structure
-            district_data["rooms"] = {
-                "1": {
-                    "count": district_data.pop("room1_count") or 0,
-                    "avg_ppsqm": district_data.pop("room1_avg")
-                },
-                "2": {
-                    "count": district_data.pop("room2_count") or 0,
-                    "avg_ppsqm": district_data.pop("room2_avg")
-                },
-                "3+": {
-                    "count": district_data.pop("room3plus_count") or 0,
-                    "avg_ppsqm": district_data.pop("room3plus_avg")
-                }
-            }
-            
-            # Get all child districts for this parent district
-            cursor.execute('''
-            SELECT 
-                district,
-                COUNT(*) AS count,
-                ROUND(AVG(price_per_sqm), 0) AS avg_ppsqm,
-                
-                COUNT(CASE WHEN rooms = '1' THEN 1 END) AS room1_count,
-                ROUND(AVG(CASE WHEN rooms = '1' THEN price_per_sqm END), 0) AS room1_avg,
-                
-                COUNT(CASE WHEN rooms = '2' THEN 1 END) AS room2_count,
-                ROUND(AVG(CASE WHEN rooms = '2' THEN price_per_sqm END), 0) AS room2_avg,
-                
-                COUNT(CASE WHEN rooms IS NOT NULL AND rooms != '1' AND rooms != '2' THEN 1 END) AS room3plus_count,
-                ROUND(AVG(CASE WHEN rooms IS NOT NULL AND rooms != '1' AND rooms != '2' THEN price_per_sqm END), 0) AS room3plus_avg
-            FROM 
-                listings
-            WHERE 
-                city = ? AND district_parent = ?
-            GROUP BY 
-                district
-            ORDER BY 
-                avg_ppsqm DESC
-            ''', (city, district_data['district']))
-            
-            child_rows = cursor.fetchall()
-            child_districts = []
-            
-            for child_row in child_rows:
-                child_data = dict(child_row)
-                
-                # Create nested room stats structure for child district
-                child_data["rooms"] = {
-                    "1": {
-                        "count": child_data.pop("room1_count") or 0,
-                        "avg_ppsqm": child_data.pop("room1_avg")
-                    },
-                    "2": {
-                        "count": child_data.pop("room2_count") or 0,
-                        "avg_ppsqm": child_data.pop("room2_avg")
-                    },
-                    "3+": {
-                        "count": child_data.pop("room3plus_count") or 0,
-                        "avg_ppsqm": child_data.pop("room3plus_avg")
-                    }
-                }
-                
-                child_districts.append(child_data)
-            
-            # Add child districts to parent district data
-            district_data["child_districts"] = child_districts
-            
+        for parent_name, (parent_bucket, children) in parents.items():
+            district_data = _finish_bucket(parent_name, parent_bucket)
+            district_data["child_districts"] = sorted(
+                (_finish_bucket(name, bucket) for name, bucket in children.items()),
+                key=_by_avg_desc
+            )
             results.append(district_data)
         
-        conn.close()
+        results.sort(key=_by_avg_desc)
         return results
     except sqlite3.Error as e:
         logging.error(f"Error getting district stats: {str(e)}")
@@ -270,10 +375,10 @@ def get_city_stats(city):
         cursor.execute('''
         SELECT
             city,
-            ROUND(AVG(price_per_sqm), 0) AS avg_price_sqm,
-            COUNT(*) AS listing_count
+            ROUND(SUM(sum_ppsm) / SUM(n), 0) AS avg_price_sqm,
+            SUM(n) AS listing_count
         FROM 
-            listings
+            listing_aggregates
         WHERE
             city = ?
         GROUP BY
@@ -0,0 +1,81 @@
+"""
+Central SQLite connection factory used by every Python reader and writer of otodom.db.
+
+Connections are opened in WAL mode so the Node.js API can keep reading while a
+scrape is writing. The PRAGMA profile can be overridden with environment
+variables named ``OTODOM_DB_<PRAGMA>`` (e.g. ``OTODOM_DB_SYNCHRONOUS=FULL``)
+or programmatically with ``configure_pragmas``.
+"""
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Union
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",        # readers no longer block on the writer
+    "synchronous": "NORMAL",      # safe with WAL, fsync only at checkpoints
+    "cache_size": -65536,         # negative values are KiB, i.e. 64 MiB page cache
+    "temp_store": "MEMORY",
+    "mmap_size": 268435456,       # 256 MiB memory-mapped I/O
+    "busy_timeout": 5000,         # ms to wait for a lock instead of failing immediately
+}
+
+ENV_PREFIX = "OTODOM_DB_"
+
+_overrides: Dict[str, Union[str, int]] = {}
+
+
+def configure_pragmas(**pragmas):
+    """Override PRAGMA values for all connections opened afterwards"""
+    _overrides.update({name.lower(): value for name, value in pragmas.items()})
+
+
+def pragma_profile() -> Dict[str, Union[str, int]]:
+    """Return the effective PRAGMA profile: defaults, then environment, then configure_pragmas"""
+    profile = dict(DEFAULT_PRAGMAS)
+    for name in DEFAULT_PRAGMAS:
+        env_value = os.getenv(ENV_PREFIX + name.upper())
+        if env_value:
+            profile[name] = env_value
+    profile.update(_overrides)
+    return profile
+
+
+def connect(path: Union[str, Path], **kwargs) -> sqlite3.Connection:
+    """
+    Open a SQLite connection with the tuned PRAGMA profile applied
+
+    Args:
+        path: Database file
+        **kwargs: Extra arguments for sqlite3.connect (e.g. check_same_thread)
+
+    Returns:
+        The configured connection
+    """
+    conn = sqlite3.connect(path, **kwargs)
+    for name, value in pragma_profile().items():
+        try:
+            conn.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.Error as e:
+            logging.warning(f"Could not apply PRAGMA {name}={value}: {str(e)}")
+    return conn
+
+
+def sync_indexes(cursor: sqlite3.Cursor, table: str, indexes: Dict[str, str]):
+    """
+    Create the managed indexes of a table and drop managed ones that are no longer listed
+
+    Args:
+        cursor: Cursor of an open connection
+        table: Table the indexes belong to
+        indexes: Mapping of index name (prefixed ``idx_<table>_``) to its column list
+    """
+    prefix = f"idx_{table}_"
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,))
+    for (name,) in cursor.fetchall():
+        if name.startswith(prefix) and name not in indexes:
+            logging.info(f"Dropping obsolete index {name}")
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, columns in indexes.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
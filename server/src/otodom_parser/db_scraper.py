@@ -3,10 +3,41 @@ import logging
 import time
 from pathlib import Path
 
+try:
+    from .db_connection import connect, sync_indexes
+except ImportError:  # imported as a top-level module
+    from db_connection import connect, sync_indexes
+
 # Database file path - ensure it's in the same location as db.py
 db_path = Path(__file__).resolve().parent / 'otodom.db'  # /server/src/otodom_parser/otodom.db
 db_path.touch(exist_ok=True)  # creates file if absent
 
+# Indexes maintained by setup_database for the filters and ordering used by the queries below
+OFFERS_INDEXES = {
+    "idx_offers_scraped_at": "scraped_at",
+    "idx_offers_city_district_scraped_at": "city, district, scraped_at",
+    "idx_offers_district_scraped_at": "district, scraped_at",
+}
+
+# Columns of the offers table in insert order; "id" is the conflict key
+OFFER_COLUMNS = (
+    "id", "title", "url", "city", "district", "street", "price", "currency",
+    "rooms", "area", "rent", "deposit", "floor", "building_floors", "building_type",
+    "lat", "lon", "image", "created_at", "scraped_at",
+)
+
+UPSERT_OFFER_SQL = (
+    f"INSERT INTO offers ({', '.join(OFFER_COLUMNS)}) VALUES ({', '.join('?' * len(OFFER_COLUMNS))}) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in OFFER_COLUMNS[1:])
+)
+
+
+def offer_values(offer):
+    """Parameters of UPSERT_OFFER_SQL for one offer dict"""
+    return (offer["id"],) + tuple(offer.get(column) for column in OFFER_COLUMNS[1:])
+
+
 class ScraperDB:
     def __init__(self, db_path_param=None):
         """Initialize the database connection"""
@@ -17,7 +48,7 @@ class ScraperDB:
     def get_connection(self):
         """Get a connection to the SQLite database"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect(self.db_path)
             return conn
         except sqlite3.Error as e:
             logging.error(f"Database connection error: {str(e)}")
@@ -72,6 +103,8 @@ class ScraperDB:
             for col_name, col_type in required_columns.items():
                 if col_name not in columns:
                     cursor.execute(f'ALTER TABLE offers ADD COLUMN {col_name} {col_type}')
+            
+            sync_indexes(cursor, 'offers', OFFERS_INDEXES)
                     
             conn.commit()
             conn.close()
@@ -80,99 +113,30 @@ class ScraperDB:
             logging.error(f"Database setup error: {str(e)}")
             raise
             
-    def insert_offer(self, offer):
-        """Insert or update an offer in the database"""
+    def upsert_offers(self, offers):
+        """
+        Insert or update many offers with one executemany in one transaction
+        
+        Args:
+            offers: Iterable of offer dicts, each with an "id"
+            
+        Returns:
+            Number of offers written, 0 if the transaction failed
+        """
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Check if offer already exists
-            cursor.execute("SELECT id FROM offers WHERE id = ?", (offer["id"],))
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing offer
-                cursor.execute('''
-                UPDATE offers SET
-                    title = ?,
-                    url = ?,
-                    city = ?,
-                    district = ?,
-                    street = ?,
-                    price = ?,
-                    currency = ?,
-                    rooms = ?,
-                    area = ?,
-                    rent = ?,
-                    deposit = ?,
-                    floor = ?,
-                    building_floors = ?,
-                    building_type = ?,
-                    lat = ?,
-                    lon = ?,
-                    image = ?,
-                    created_at = ?,
-                    scraped_at = ?
-                WHERE id = ?
-                ''', (
-                    offer.get("title"),
-                    offer.get("url"),
-                    offer.get("city"),
-                    offer.get("district"),
-                    offer.get("street"),
-                    offer.get("price"),
-                    offer.get("currency"),
-                    offer.get("rooms"),
-                    offer.get("area"),
-                    offer.get("rent"),
-                    offer.get("deposit"),
-                    offer.get("floor"),
-                    offer.get("building_floors"),
-                    offer.get("building_type"),
-                    offer.get("lat"),
-                    offer.get("lon"),
-                    offer.get("image"),
-                    offer.get("created_at"),
-                    offer.get("scraped_at"),
-                    offer["id"]
-                ))
-            else:
-                # Insert new offer
-                cursor.execute('''
-                INSERT INTO offers (
-                    id, title, url, city, district, street, price, currency,
-                    rooms, area, rent, deposit, floor, building_floors, building_type,
-                    lat, lon, image, created_at, scraped_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    offer["id"],
-                    offer.get("title"),
-                    offer.get("url"),
-                    offer.get("city"),
-                    offer.get("district"),
-                    offer.get("street"),
-                    offer.get("price"),
-                    offer.get("currency"),
-                    offer.get("rooms"),
-                    offer.get("area"),
-                    offer.get("rent"),
-                    offer.get("deposit"),
-                    offer.get("floor"),
-                    offer.get("building_floors"),
-                    offer.get("building_type"),
-                    offer.get("lat"),
-                    offer.get("lon"),
-                    offer.get("image"),
-                    offer.get("created_at"),
-                    offer.get("scraped_at")
-                ))
-                
-            conn.commit()
+            with conn:
+                cursor = conn.executemany(UPSERT_OFFER_SQL, (offer_values(offer) for offer in offers))
+                written = cursor.rowcount
             conn.close()
-            return True
-        except sqlite3.Error as e:
-            logging.error(f"Error inserting offer {offer.get('id')}: {str(e)}")
-            return False
+            return written
+        except (sqlite3.Error, KeyError) as e:
+            logging.error(f"Error upserting offers: {str(e)}")
+            return 0
+    
+    def insert_offer(self, offer):
+        """Insert or update an offer in the database"""
+        return self.upsert_offers([offer]) == 1
             
     def get_recent_ids(self, cutoff_time):
         """Get IDs of offers scraped after the cutoff time"""
@@ -188,22 +152,51 @@ class ScraperDB:
         except sqlite3.Error as e:
             logging.error(f"Error getting recent IDs: {str(e)}")
             return []
+    
+    def clear_offers_scraped_before(self, cutoff_time):
+        """
+        Delete offers that were not written since a scrape generation started
+        
+        A scrape that upserts every offer it sees with ``scraped_at`` set to its
+        start time (or later) can evict the rest with one indexed range delete.
+        
+        Args:
+            cutoff_time: ``scraped_at`` of the current generation
+            
+        Returns:
+            Number of offers deleted
+        """
+        try:
+            conn = self.get_connection()
+            with conn:
+                deleted_count = conn.execute("DELETE FROM offers WHERE scraped_at < ?", (cutoff_time,)).rowcount
+            conn.close()
+            
+            logging.info(f"Cleared {deleted_count} offers scraped before {cutoff_time}")
+            return deleted_count
+        except sqlite3.Error as e:
+            logging.error(f"Error clearing old offers: {str(e)}")
+            return 0
             
     def clear_old_offers(self, exclude_ids=None):
         """Clear old offers from the database, optionally excluding specific IDs"""
         try:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if exclude_ids and len(exclude_ids) > 0:
-                # Create placeholders for the SQL query
-                placeholders = ','.join(['?'] * len(exclude_ids))
-                cursor.execute(f"DELETE FROM offers WHERE id NOT IN ({placeholders})", exclude_ids)
-            else:
-                cursor.execute("DELETE FROM offers")
-                
-            deleted_count = cursor.rowcount
-            conn.commit()
+            with conn:
+                cursor = conn.cursor()
+                if exclude_ids:
+                    # Kept ids go into a temporary table instead of one bound parameter each,
+                    # which would hit SQLite's variable limit on large scrapes
+                    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS keep_offer_ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+                    cursor.execute("DELETE FROM temp.keep_offer_ids")
+                    cursor.executemany("INSERT OR IGNORE INTO temp.keep_offer_ids (id) VALUES (?)",
+                                       ((offer_id,) for offer_id in exclude_ids))
+                    cursor.execute("DELETE FROM offers WHERE id NOT IN (SELECT id FROM temp.keep_offer_ids)")
+                    deleted_count = cursor.rowcount
+                    cursor.execute("DROP TABLE temp.keep_offer_ids")
+                else:
+                    cursor.execute("DELETE FROM offers")
+                    deleted_count = cursor.rowcount
             conn.close()
             
             logging.info(f"Cleared {deleted_count} old offers from database")
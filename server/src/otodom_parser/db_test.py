@@ -1,5 +1,7 @@
+import tempfile
 import unittest
 import sqlite3
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 import db
 
@@ -13,19 +15,18 @@ class TestDbFunctions(unittest.TestCase):
         mock_conn.cursor.return_value = mock_cursor
         mock_get_connection.return_value = mock_conn
         
-        # Mock fetchall to return sample data
+        # Mock fetchall to return per (parent, district, room bucket) sums
         mock_cursor.fetchall.return_value = [
-            {"district": "mokotow", "count": 10, "avg_ppsqm": 15000, 
-             "room1_count": 2, "room1_avg": 16000, 
-             "room2_count": 5, "room2_avg": 15500, 
-             "room3plus_count": 3, "room3plus_avg": 14000}
+            ("mokotow", "stary-mokotow", "1", 2, 32000.0),
+            ("mokotow", "stary-mokotow", "2", 5, 77500.0),
+            ("mokotow", "sadyba", "3+", 3, 42000.0)
         ]
         
         # Call the function with a test city
         result = db.get_city_district_stats("warszawa")
         
-        # Verify the function was called with the correct SQL
-        mock_cursor.execute.assert_called()
+        # Parents and children come from a single query
+        mock_cursor.execute.assert_called_once()
         
         # Check that the city parameter was used in the query
         args = mock_cursor.execute.call_args[0][1]
@@ -35,13 +36,41 @@ class TestDbFunctions(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["district"], "mokotow")
         self.assertEqual(result[0]["count"], 10)
-        self.assertEqual(result[0]["avg_ppsqm"], 15000)
+        self.assertEqual(result[0]["avg_ppsqm"], 15150)
         self.assertEqual(result[0]["rooms"]["1"]["count"], 2)
         self.assertEqual(result[0]["rooms"]["1"]["avg_ppsqm"], 16000)
         self.assertEqual(result[0]["rooms"]["2"]["count"], 5)
         self.assertEqual(result[0]["rooms"]["2"]["avg_ppsqm"], 15500)
         self.assertEqual(result[0]["rooms"]["3+"]["count"], 3)
         self.assertEqual(result[0]["rooms"]["3+"]["avg_ppsqm"], 14000)
+        
+        # Child districts are sorted by average price
+        children = result[0]["child_districts"]
+        self.assertEqual([child["district"] for child in children], ["stary-mokotow", "sadyba"])
+        self.assertEqual(children[0]["count"], 7)
+        self.assertEqual(children[0]["avg_ppsqm"], 15643)
+        self.assertEqual(children[1]["rooms"]["1"], {"count": 0, "avg_ppsqm": None})
+
+    def test_get_city_district_stats_single_scan(self):
+        """Parents, children and room buckets are folded from one scan of a real table"""
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch('db.db_path', Path(tmp) / 'stats.db'):
+                db.setup_database()
+                for district, ppsqm, rooms in [("stary-mokotow", 20000, 1), ("stary-mokotow", 18000, 2),
+                                               ("sadyba", 12000, 0), ("sadyba", 14000, None)]:
+                    db.insert_listing("warszawa", district, "mokotow", 50.0, ppsqm, 1, rooms=rooms)
+                db.insert_listing("krakow", "podgorze", "podgorze", 50.0, 9000, 1, rooms=1)
+                
+                result = db.get_city_district_stats("warszawa")
+        
+        self.assertEqual(len(result), 1)
+        mokotow = result[0]
+        self.assertEqual(mokotow["count"], 4)
+        self.assertEqual(mokotow["avg_ppsqm"], 16000)
+        # Studios (rooms = 0) fall into "3+", unknown room counts into no bucket
+        self.assertEqual(mokotow["rooms"]["3+"], {"count": 1, "avg_ppsqm": 12000})
+        self.assertEqual([c["district"] for c in mokotow["child_districts"]], ["stary-mokotow", "sadyba"])
+        self.assertEqual(mokotow["child_districts"][1]["avg_ppsqm"], 13000)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
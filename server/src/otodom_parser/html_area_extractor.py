@@ -1,141 +1,268 @@
 """
 Helper module for extracting area information from listing HTML pages
+
+The area is looked up in tiers, cheapest first, and the first tier that finds
+it wins:
+
+1. ``json_ld``: ``floorSize`` of the offered apartment in the JSON-LD scripts
+2. ``parameters``: the ``ad-parameters-item-area`` / ``table-value-usable_area`` value, sliced out of the raw bytes
+3. ``text``: "N m²" style patterns over the raw HTML
+4. ``tree``: parameter selectors and table rows of an lxml tree
+5. ``div_scan``: the text of every ``<div>``, stopped after a time budget
 """
 
 import re
 import json
 import logging
+import time
 import traceback
-from bs4 import BeautifulSoup
+from typing import Callable, NamedTuple, Optional, Union
 
-def extract_area_from_html(html_content, to_float_func):
+from lxml import html as lxml_html
+
+TIER_JSON_LD = "json_ld"
+TIER_PARAMETERS = "parameters"
+TIER_TEXT = "text"
+TIER_TREE = "tree"
+TIER_DIV_SCAN = "div_scan"
+TIERS = (TIER_JSON_LD, TIER_PARAMETERS, TIER_TEXT, TIER_TREE, TIER_DIV_SCAN)
+
+# Seconds the last-resort div scan may take; its cost grows with nesting depth
+DIV_SCAN_BUDGET_S = 0.05
+
+_LD_JSON_SCRIPT = re.compile(
+    rb"""<script\b[^>]*\btype\s*=\s*["']?application/ld\+json["']?[^>]*>(.*?)</script\s*>""",
+    re.IGNORECASE | re.DOTALL
+)
+# JSON-LD types whose floorSize is the area of the offered flat or house
+_LD_AREA_TYPES = {"Offer", "Residence", "Accommodation", "Apartment", "House", "SingleFamilyResidence", "Room"}
+# Square metres as a UN/CEFACT unitCode or a unitText
+_LD_AREA_UNITS = {"MTK", "m²", "m2", "sqm"}
+_PARAMETER_MARKERS = (b'data-testid="ad-parameters-item-area"', b'data-testid="table-value-usable_area"')
+# Parameter values sit a few tags after their marker
+_PARAMETER_WINDOW = 600
+_TAG = re.compile(rb"<[^>]*>")
+_NUMBER = re.compile(r"(\d+[.,]?\d*)")
+_BYTES_NUMBER = re.compile(rb"(\d+[.,]?\d*)")
+
+# Tried in order, the first pattern with a match decides. Each one is only run
+# when its literal part occurs in the lowercased page, which is a plain substring search
+_AREA_PATTERNS = [(literal, re.compile(pattern, re.IGNORECASE)) for literal, pattern in (
+    ('m²', r'(\d+[.,]?\d*)\s*m²'),
+    ('m2', r'(\d+[.,]?\d*)\s*m2'),
+    ('powierzchnia', r'powierzchnia[:\s]*(\d+[.,]?\d*)\s*m'),
+    ('area', r'area[:\s]*(\d+[.,]?\d*)\s*m'),
+    ('metraz', r'metraz[:\s]*(\d+[.,]?\d*)'),
+    ('powierzchnia całkowita', r'powierzchnia całkowita[:\s]*(\d+[.,]?\d*)'),
+    ('powierzchnia użytkowa', r'powierzchnia użytkowa[:\s]*(\d+[.,]?\d*)'),
+)]
+
+# XPath versions of the parameter selectors, in order, as (xpath, class name or None);
+# class matches are narrowed with a cheap contains() and checked word by word in Python
+_AREA_SPANS_XPATH = '//*[@data-testid="ad-parameters-item-area"]//span'
+_VALUE_XPATHS = [
+    ("//*[contains(@class, 'css-1qvviw5')]", "css-1qvviw5"),
+    ("//*[contains(@class, 'css-1ci0qpi')]", "css-1ci0qpi"),
+    ('//*[@data-cy="ad-parameters-item-value"]', None),
+    ('//*[@data-cy="adPageAdInfo"]', None),
+    ("//*[contains(@class, 'css-1435atw')]", "css-1435atw"),
+    ('//*[@data-testid="table-value-usable_area"]', None),
+]
+
+
+class AreaResult(NamedTuple):
+    """Extracted area and the tier that found it; tier is None when no tier did"""
+    area: Optional[float]
+    tier: Optional[str]
+
+
+def _text(element) -> str:
+    """Text of an element with every piece stripped, like BeautifulSoup's get_text(strip=True)"""
+    return "".join(piece.strip() for piece in element.itertext())
+
+
+def _first_number(text: str, to_float_func: Callable) -> Optional[float]:
+    match = _NUMBER.search(text)
+    return to_float_func(match.group(1)) if match else None
+
+
+def _ld_floor_size(value, to_float_func: Callable) -> Optional[float]:
+    """Square metres of a floorSize, either a number or a QuantitativeValue"""
+    if isinstance(value, dict):
+        unit = value.get("unitCode", value.get("unitText"))
+        if unit is not None and unit not in _LD_AREA_UNITS:
+            return None
+        value = value.get("value")
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return to_float_func(value)
+    return None
+
+
+def _ld_area(node, to_float_func: Callable, depth: int = 0) -> Optional[float]:
+    """floorSize of an offer or residence node, looking into nested objects such as offers[].itemOffered"""
+    if depth > 6:
+        return None
+    if isinstance(node, list):
+        for item in node:
+            area = _ld_area(item, to_float_func, depth + 1)
+            if area is not None:
+                return area
+        return None
+    if not isinstance(node, dict):
+        return None
+    types = node.get("@type")
+    types = set(types) if isinstance(types, list) else {types}
+    if "floorSize" in node and types & _LD_AREA_TYPES:
+        area = _ld_floor_size(node["floorSize"], to_float_func)
+        if area is not None:
+            return area
+    for value in node.values():
+        if isinstance(value, (dict, list)):
+            area = _ld_area(value, to_float_func, depth + 1)
+            if area is not None:
+                return area
+    return None
+
+
+def _probe_json_ld(page: bytes, to_float_func: Callable) -> Optional[float]:
+    if b"ld+json" not in page:
+        return None
+    for match in _LD_JSON_SCRIPT.finditer(page):
+        try:
+            area = _ld_area(json.loads(match.group(1)), to_float_func)
+        except ValueError:
+            continue
+        if area is not None:
+            return area
+    return None
+
+
+def _probe_parameters(page: bytes, to_float_func: Callable) -> Optional[float]:
+    for marker in _PARAMETER_MARKERS:
+        pos = page.find(marker)
+        if pos == -1:
+            continue
+        # Skip the rest of the marker's own tag, then drop the tags around the value
+        tag_end = page.find(b">", pos)
+        if tag_end == -1:
+            continue
+        window = _TAG.sub(b" ", page[tag_end + 1:tag_end + 1 + _PARAMETER_WINDOW])
+        match = _BYTES_NUMBER.search(window)
+        if match:
+            area = to_float_func(match.group(1).decode("ascii"))
+            if area is not None:
+                return area
+    return None
+
+
+def _probe_text(text: str, to_float_func: Callable) -> Optional[float]:
+    lowered = text.lower()
+    for literal, pattern in _AREA_PATTERNS:
+        if literal not in lowered:
+            continue
+        match = pattern.search(text)
+        if match:
+            area = to_float_func(match.group(1))
+            if area is not None:
+                return area
+    return None
+
+
+def _search_tree(tree, to_float_func: Callable) -> Optional[float]:
+    for elem in tree.xpath(_AREA_SPANS_XPATH):
+        area = _first_number(_text(elem), to_float_func)
+        if area is not None:
+            return area
+    for xpath, class_name in _VALUE_XPATHS:
+        for elem in tree.xpath(xpath):
+            if class_name and class_name not in (elem.get("class") or "").split():
+                continue
+            text = _text(elem)
+            if 'm²' in text or 'm2' in text:
+                area = _first_number(text, to_float_func)
+                if area is not None:
+                    return area
+    for row in tree.iter("tr"):
+        row_text = _text(row).lower()
+        if 'powierzchnia' in row_text or 'area' in row_text:
+            area = _first_number(row_text, to_float_func)
+            if area is not None:
+                return area
+    return None
+
+
+def _scan_divs(tree, to_float_func: Callable, budget_s: float) -> Optional[float]:
+    deadline = time.perf_counter() + budget_s
+    for div in tree.iter("div"):
+        if time.perf_counter() > deadline:
+            logging.debug(f"Div scan for area stopped after {budget_s}s")
+            return None
+        div_text = _text(div)
+        if 'm²' in div_text or 'm2' in div_text:
+            area = _first_number(div_text, to_float_func)
+            if area is not None:
+                return area
+    return None
+
+
+def extract_area(html_content: Union[bytes, str], to_float_func: Callable,
+                 div_scan_budget_s: float = DIV_SCAN_BUDGET_S) -> AreaResult:
     """
-    Extract area information from HTML content
-    Returns the area as float or None if not found
-    
+    Extract area information from HTML content, cheapest tier first
+
     Args:
-        html_content: The HTML content of the listing page
+        html_content: The HTML content of the listing page, bytes or str
         to_float_func: Function to convert string to float
+        div_scan_budget_s: Seconds the last-resort div scan may take
+
+    Returns:
+        AreaResult with the area and the tier that found it
     """
     if not html_content:
-        return None
-        
-    area = None
+        return AreaResult(None, None)
+
     try:
-        # Parse HTML using BeautifulSoup
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Try to find area in structured data first (JSON-LD)
-        json_ld_scripts = soup.find_all('script', {'type': 'application/ld+json'})
-        for script in json_ld_scripts:
-            try:
-                json_data = json.loads(script.string)
-                # Look for area in structured data
-                if isinstance(json_data, dict):
-                    # Try common JSON-LD formats for real estate
-                    if 'floorSize' in json_data:
-                        floor_size = json_data.get('floorSize', {})
-                        if isinstance(floor_size, dict) and 'value' in floor_size:
-                            area = to_float_func(floor_size.get('value'))
-                            if area is not None:
-                                logging.debug(f"Found area in JSON-LD floorSize: {area}")
-                                return area
-                    # Try other potential paths in JSON-LD
-                    for key in ['size', 'area', 'floorArea', 'livingArea']:
-                        if key in json_data:
-                            area_val = json_data.get(key)
-                            if isinstance(area_val, (str, int, float)):
-                                area = to_float_func(area_val)
-                            elif isinstance(area_val, dict) and 'value' in area_val:
-                                area = to_float_func(area_val.get('value'))
-                            if area is not None:
-                                logging.debug(f"Found area in JSON-LD {key}: {area}")
-                                return area
-            except:
-                # If JSON parsing fails, continue to next script
-                continue
-        
-        # Look for common text patterns indicating area
-        area_patterns = [
-            r'(\d+[.,]?\d*)\s*m²', 
-            r'(\d+[.,]?\d*)\s*m2',
-            r'powierzchnia[:\s]*(\d+[.,]?\d*)\s*m',
-            r'area[:\s]*(\d+[.,]?\d*)\s*m',
-            r'metraz[:\s]*(\d+[.,]?\d*)',
-            r'powierzchnia całkowita[:\s]*(\d+[.,]?\d*)',
-            r'powierzchnia użytkowa[:\s]*(\d+[.,]?\d*)'
-        ]
-        
-        for pattern in area_patterns:
-            matches = re.findall(pattern, html_content, re.IGNORECASE)
-            if matches:
-                # Take the first match
-                area = to_float_func(matches[0])
-                if area is not None:
-                    logging.debug(f"Found area using regex pattern '{pattern}': {area}")
-                    return area
-        
-        # If still not found, look for specific HTML elements that might contain area
-        # Look for elements with specific classes or data attributes
-        area_elements = soup.select('[data-testid="ad-parameters-item-area"] span')
-        if area_elements:
-            for elem in area_elements:
-                area_text = elem.get_text(strip=True)
-                # Extract number from text
-                area_match = re.search(r'(\d+[.,]?\d*)', area_text)
-                if area_match:
-                    area = to_float_func(area_match.group(1))
-                    if area is not None:
-                        logging.debug(f"Found area in HTML element: {area}")
-                        return area
-        
-        # Try additional selector patterns
-        additional_selectors = [
-            '.css-1qvviw5',  # Common class for parameter values
-            '.css-1ci0qpi',  # Another common class
-            '[data-cy="ad-parameters-item-value"]',
-            '[data-cy="adPageAdInfo"]',
-            '.css-1435atw',  # Sometimes contains the area
-            '[data-testid="table-value-usable_area"]'
-        ]
-        
-        for selector in additional_selectors:
-            elements = soup.select(selector)
-            for elem in elements:
-                text = elem.get_text(strip=True)
-                if 'm²' in text or 'm2' in text:
-                    # Extract number from text
-                    area_match = re.search(r'(\d+[.,]?\d*)', text)
-                    if area_match:
-                        area = to_float_func(area_match.group(1))
-                        if area is not None:
-                            logging.debug(f"Found area using selector '{selector}': {area}")
-                            return area
-        
-        # Try to look for specific table rows that might contain area
-        for row in soup.select('tr'):
-            row_text = row.get_text(strip=True).lower()
-            if 'powierzchnia' in row_text or 'area' in row_text:
-                area_match = re.search(r'(\d+[.,]?\d*)', row_text)
-                if area_match:
-                    area = to_float_func(area_match.group(1))
-                    if area is not None:
-                        logging.debug(f"Found area in table row: {area}")
-                        return area
-                        
-        # Check if we have any divs with m² in their text
-        for div in soup.find_all('div'):
-            div_text = div.get_text(strip=True)
-            if 'm²' in div_text or 'm2' in div_text:
-                area_match = re.search(r'(\d+[.,]?\d*)', div_text)
-                if area_match:
-                    area = to_float_func(area_match.group(1))
-                    if area is not None:
-                        logging.debug(f"Found area in div text: {area}")
-                        return area
-        
+        page = html_content.encode("utf-8") if isinstance(html_content, str) else html_content
+
+        area = _probe_json_ld(page, to_float_func)
+        if area is not None:
+            return AreaResult(area, TIER_JSON_LD)
+
+        area = _probe_parameters(page, to_float_func)
+        if area is not None:
+            return AreaResult(area, TIER_PARAMETERS)
+
+        text = html_content if isinstance(html_content, str) else page.decode("utf-8", "replace")
+        area = _probe_text(text, to_float_func)
+        if area is not None:
+            return AreaResult(area, TIER_TEXT)
+
+        # Only pages without any of the above are parsed; the decoded text keeps lxml from guessing the charset
+        tree = lxml_html.fromstring(text)
+        area = _search_tree(tree, to_float_func)
+        if area is not None:
+            return AreaResult(area, TIER_TREE)
+
+        area = _scan_divs(tree, to_float_func, div_scan_budget_s)
+        if area is not None:
+            return AreaResult(area, TIER_DIV_SCAN)
     except Exception as e:
         logging.warning(f"Error extracting area from HTML: {str(e)}")
         logging.debug(traceback.format_exc())
-            
-    return None
\ No newline at end of file
+
+    return AreaResult(None, None)
+
+
+def extract_area_from_html(html_content, to_float_func):
+    """
+    Extract area information from HTML content
+    Returns the area as float or None if not found
+
+    Args:
+        html_content: The HTML content of the listing page
+        to_float_func: Function to convert string to float
+    """
+    area, tier = extract_area(html_content, to_float_func)
+    if area is not None:
+        logging.debug(f"Found area {area} in tier {tier}")
+    return area
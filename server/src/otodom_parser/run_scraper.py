@@ -2,6 +2,7 @@ import sys
 import os
 import traceback
 import io
+import json
 import argparse
 from pathlib import Path
 
@@ -21,63 +22,139 @@ except ImportError as e:
     print("Missing Python package:", e.name, "— run pip install -r requirements.txt", file=sys.stderr)
     sys.exit(1)
 
-# Set up argument parser for debug flag and filters
-parser = argparse.ArgumentParser()
-parser.add_argument("--debug", action="store_true", help="Enable debug logging")
-parser.add_argument("--cities", type=str, help="Comma or space separated list of cities to scrape (default: all major cities)")
-parser.add_argument("--districts", type=str, default="all", help="Comma or space separated list of districts to scrape (default: all)")
-parser.add_argument("--district-mode", type=str, choices=["exact", "prefix"], default="prefix", 
-                    help="How to match districts: 'exact' (exact match only) or 'prefix' (match prefix or parent slugs, default)")
-parser.add_argument("--rooms", type=str, help="Integer or comma-separated list of room numbers to filter (e.g. 1,2)")
-parser.add_argument("--days", type=int, default=1, help="Filter listings by days since created (default: 1)")
-parser.add_argument("--max-pages", type=int, help="Maximum number of pages to scrape per city/district combination")
-parser.add_argument("--preserve", action="store_true", help="Preserve existing listings in the database")
-args = parser.parse_args()
 
-# Configure logging level based on --debug flag or LOG_LEVEL environment variable
-log_level = logging.DEBUG if args.debug or os.getenv("LOG_LEVEL") == "DEBUG" else logging.INFO
+def main():
+    """Parse the command line and run one scrape"""
+    # Set up argument parser for debug flag and filters
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--cities", type=str, help="Comma or space separated list of cities to scrape (default: all major cities)")
+    parser.add_argument("--districts", type=str, default="all", help="Comma or space separated list of districts to scrape (default: all)")
+    parser.add_argument("--district-mode", type=str, choices=["exact", "prefix"], default="prefix", 
+                        help="How to match districts: 'exact' (exact match only) or 'prefix' (match prefix or parent slugs, default)")
+    parser.add_argument("--rooms", type=str, help="Integer or comma-separated list of room numbers to filter (e.g. 1,2)")
+    parser.add_argument("--days", type=int, default=1, help="Filter listings by days since created (default: 1)")
+    parser.add_argument("--max-pages", type=int, help="Maximum number of pages to scrape per city/district combination")
+    parser.add_argument("--preserve", action="store_true", help="Preserve existing listings in the database")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Update only new or changed offers, stop at the first page of known ones and mark vanished offers inactive")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="With --incremental, walk every result page so that vanished offers are marked inactive")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of requests in flight per host (default: 4)")
+    parser.add_argument("--rps", type=float, default=2.0, help="Maximum requests per second per host (default: 2.0)")
+    parser.add_argument("--connect-timeout", type=float, default=5.0, help="Seconds to wait for a connection (default: 5)")
+    parser.add_argument("--read-timeout", type=float, default=15.0, help="Seconds to wait for a response (default: 15)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the conditional-request page cache")
+    parser.add_argument("--cache-size-mb", type=float, default=256, help="Size limit of the page cache in MB (default: 256)")
+    parser.add_argument("--stage-workers", type=str, help="Worker threads per page stage, e.g. fetch=4,decode=1,parse=2,write=1")
+    parser.add_argument("--parse-workers", type=int, default=0, help="Decode and parse pages in N worker processes (default: 0, in threads)")
+    parser.add_argument("--replay", type=str, help="Scrape saved pages from a directory or tar/zip archive instead of the network")
+    parser.add_argument("--archive", type=str, help="Append raw pages to a compressed archive in this directory (--debug: debug/archive)")
+    parser.add_argument("--enrich-workers", type=int, default=2,
+                        help="Threads fetching detail pages of offers listed without an area, 0 disables (default: 2)")
+    parser.add_argument("--enrich-rps", type=float, default=0.5, help="Detail page requests per second (default: 0.5)")
+    parser.add_argument("--events-fd", type=int,
+                        help="Write progress and throughput as NDJSON events to this inherited file descriptor instead of status lines")
+    parser.add_argument("--event-interval", type=float, default=1.0, help="Minimum seconds between progress events (default: 1)")
+    parser.add_argument("--profile", action="store_true", help="Time the scraper hot paths and log a summary table at the end")
+    parser.add_argument("--profile-output", type=str, help="With --profile, also write cProfile stats of all scraper threads to this file")
+    parser.add_argument("--db", type=str, help="SQLite database to write to (default: otodom.db next to db.py)")
+    parser.add_argument("--queue-size", type=int, default=16, help="Capacity of the queue in front of each page stage (default: 16)")
+    args = parser.parse_args()
 
-# Configure logging before any imports that might use logging
-logging.basicConfig(level=log_level, 
-                   format="%(asctime)s [%(levelname)s] %(message)s",
-                   handlers=[
-                       logging.FileHandler("parser_errors.log", encoding="utf-8"),
-                       logging.StreamHandler(sys.stdout)
-                   ])
+    # Must be set before the database module is imported
+    if args.db:
+        os.environ["OTODOM_DB_PATH"] = args.db
 
-try:
-    from otodom_parser.scraper import OtodomScraper
+    # Configure logging level based on --debug flag or LOG_LEVEL environment variable
+    log_level = logging.DEBUG if args.debug or os.getenv("LOG_LEVEL") == "DEBUG" else logging.INFO
+
+    # Configure logging before any imports that might use logging
+    logging.basicConfig(level=log_level, 
+                       format="%(asctime)s [%(levelname)s] %(message)s",
+                       handlers=[
+                           logging.FileHandler("parser_errors.log", encoding="utf-8"),
+                           logging.StreamHandler(sys.stdout)
+                       ])
+
+    events = None
+    try:
+        from otodom_parser.scraper import OtodomScraper
+        from otodom_parser.scraper.events import open_event_stream
+    
+        if args.events_fd is not None:
+            events = open_event_stream(args.events_fd, args.event_interval)
     
-    # Process filter arguments
-    city_filter = None
-    if args.cities:
-        city_filter = [city.strip() for city in args.cities.replace(',', ' ').split() if city.strip()]
+        # Process filter arguments
+        city_filter = None
+        if args.cities:
+            city_filter = [city.strip() for city in args.cities.replace(',', ' ').split() if city.strip()]
     
-    district_filter = ["all"]
-    if args.districts and args.districts != "all":
-        district_filter = [district.strip() for district in args.districts.replace(',', ' ').split() if district.strip()]
+        district_filter = ["all"]
+        if args.districts and args.districts != "all":
+            district_filter = [district.strip() for district in args.districts.replace(',', ' ').split() if district.strip()]
     
-    room_filter = None
-    if args.rooms:
-        room_filter = [int(room.strip()) for room in args.rooms.replace(',', ' ').split() if room.strip().isdigit()]
+        room_filter = None
+        if args.rooms:
+            room_filter = [int(room.strip()) for room in args.rooms.replace(',', ' ').split() if room.strip().isdigit()]
     
-    max_pages = args.max_pages
+        max_pages = args.max_pages
+    
+        stage_workers = {}
+        if args.stage_workers:
+            for item in args.stage_workers.replace(',', ' ').split():
+                name, _, count = item.partition('=')
+                if count.strip().isdigit():
+                    stage_workers[name.strip()] = int(count)
+
+        def update_status(status, progress, error):
+            """Report status updates as throttled events, or print them as status lines without an event channel"""
+            if events:
+                events.progress(scraper.get_metrics)
+                return
+            print(f"STATUS: {status}")
+            print(f"PROGRESS: {progress}")
+            print(f"ERROR: {1 if error else 0}")
+            scraper_status = scraper.get_status()
+            print(f"HTTP: {json.dumps(scraper_status['http'])}")
+            print(f"PIPELINE: {json.dumps(scraper_status['pipeline'])}")
+            print(f"ENRICHMENT: {json.dumps(scraper_status['enrichment'])}")
+            sys.stdout.flush()
+
+        # Create scraper with debug flag and filters
+        scraper = OtodomScraper(debug=args.debug, city_filter=city_filter, 
+                              district_filter=district_filter, district_mode=args.district_mode,
+                              room_filter=room_filter, max_pages=max_pages,
+                              preserve=args.preserve, days_filter=args.days,
+                              concurrency=args.concurrency, requests_per_second=args.rps,
+                              connect_timeout=args.connect_timeout, read_timeout=args.read_timeout,
+                              http_cache=not args.no_cache, cache_max_mb=args.cache_size_mb,
+                              stage_workers=stage_workers, queue_size=args.queue_size,
+                              parse_workers=args.parse_workers, replay=args.replay, archive_dir=args.archive,
+                              incremental=args.incremental, enrich_workers=args.enrich_workers,
+                              enrich_rps=args.enrich_rps, profile=args.profile,
+                              profile_output=args.profile_output if args.profile else None,
+                              full_refresh=args.full_refresh)
+        if events:
+            # Progress keeps flowing between status changes, e.g. while the detail backlog drains
+            events.start_heartbeat(scraper.get_metrics)
+        ok = scraper.start_scraping(callback=update_status)
+        if events:
+            # The final state is always sent, whatever the throttle says
+            events.progress(scraper.get_metrics, force=True)
+            events.emit("done", ok=ok, status=scraper.status, error=scraper.error_occurred)
+            events.close()
 
-    def update_status(status, progress, error):
-        """Print status updates in a format the Node.js process can parse"""
-        print(f"STATUS: {status}")
-        print(f"PROGRESS: {progress}")
-        print(f"ERROR: {1 if error else 0}")
-        sys.stdout.flush()
+    except Exception as e:
+        if events:
+            events.emit("error", message=str(e))
+            events.close()
+        print(f"ERROR_INIT: {str(e)}")
+        print(traceback.format_exc())
+        sys.exit(1)
 
-    # Create scraper with debug flag and filters
-    scraper = OtodomScraper(debug=args.debug, city_filter=city_filter, 
-                          district_filter=district_filter, district_mode=args.district_mode,
-                          room_filter=room_filter, max_pages=max_pages,
-                          preserve=args.preserve, days_filter=args.days)
-    scraper.start_scraping(callback=update_status)
 
-except Exception as e:
-    print(f"ERROR_INIT: {str(e)}")
-    print(traceback.format_exc())
-    sys.exit(1)
\ No newline at end of file
+# Worker processes of --parse-workers import this module again under the spawn and forkserver
+# start methods; only the main process may run the scrape
+if __name__ == "__main__":
+    main()
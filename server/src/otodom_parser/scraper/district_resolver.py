@@ -0,0 +1,149 @@
+"""
+Module resolving district filters to Otodom search locations
+
+Every offer carries its location path in ``reverseGeocoding.locations[].id``,
+e.g. ``dolnoslaskie/wroclaw/wroclaw/wroclaw/krzyki/partynice``: voivodeship,
+county, commune and city, followed by the district and sub-district. The
+same path is the search URL of that location, so once a district has been
+seen in a scraped page it can be requested directly instead of downloading
+the whole city and filtering the offers afterwards.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .filters import DistrictMatcher
+
+# Location ids of a city or anything inside it; voivodeship/county/commune/city/...
+LOCATION_ID = re.compile(rb'"id":"([a-z0-9-]+(?:/[a-z0-9-]+){3,})"')
+CITY_DEPTH = 4
+
+
+class DistrictResolver:
+    """
+    District location paths learned from scraped pages, cached on disk.
+
+    Paths are stored per city relative to the city location, so "krzyki" or
+    "krzyki/partynice" for Wrocław. The cache is written to a JSON file by
+    ``save``.
+    """
+
+    def __init__(self, cache_file: Path):
+        """
+        Load the cache
+
+        Args:
+            cache_file: JSON file with the learned locations
+        """
+        self.cache_file = Path(cache_file)
+        self._lock = threading.Lock()
+        self._dirty = False
+        # city slug -> {"id": city location id, "districts": set of paths below it}
+        self._cities: Dict[str, Dict] = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    for city, entry in json.load(f).items():
+                        self._cities[city] = {"id": entry["id"], "districts": set(entry["districts"])}
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Ignoring unreadable district cache {self.cache_file}: {str(e)}")
+
+    def learn(self, page_bytes: bytes) -> int:
+        """
+        Record every district location that appears on a result page
+
+        Args:
+            page_bytes: Raw page body; text is encoded, anything else is skipped
+
+        Returns:
+            Number of districts that were not known before
+        """
+        if isinstance(page_bytes, str):
+            page_bytes = page_bytes.encode("utf-8")
+        elif not isinstance(page_bytes, (bytes, bytearray)):
+            logging.warning(f"Not learning districts from a page body of type {type(page_bytes).__name__}")
+            return 0
+        added = 0
+        with self._lock:
+            for location_id in set(LOCATION_ID.findall(page_bytes)):
+                segments = location_id.decode("ascii").split("/")
+                city = segments[CITY_DEPTH - 1]
+                entry = self._cities.setdefault(city, {"id": "/".join(segments[:CITY_DEPTH]), "districts": set()})
+                if len(segments) > CITY_DEPTH and entry["id"] == "/".join(segments[:CITY_DEPTH]):
+                    path = "/".join(segments[CITY_DEPTH:])
+                    if path not in entry["districts"]:
+                        entry["districts"].add(path)
+                        added += 1
+            if added:
+                self._dirty = True
+        return added
+
+    def districts(self, city: str) -> List[str]:
+        """Known district paths of a city, sorted"""
+        with self._lock:
+            entry = self._cities.get(city)
+            return sorted(entry["districts"]) if entry else []
+
+    def location_path(self, city: str, district: str) -> Optional[str]:
+        """Full location path of a known district, used as the search URL path"""
+        with self._lock:
+            entry = self._cities.get(city)
+            if not entry or district not in entry["districts"]:
+                return None
+            return f"{entry['id']}/{district}"
+
+    def resolve(self, city: str, district_filter: List[str], district_mode: str = "prefix") -> Optional[List[str]]:
+        """
+        Pick the district locations to search for a district filter
+
+        A district is picked when its own slug matches a filter; its
+        sub-districts are then covered by its search URL. Offers are still
+        filtered client-side, so the locations only have to cover every
+        matching offer.
+
+        Args:
+            city: City slug
+            district_filter: List of districts to match
+            district_mode: Mode to match districts - "exact" or "prefix"
+
+        Returns:
+            Sorted district paths, or None when the whole city has to be
+            scraped because a filter matches no known district or the city itself
+        """
+        with self._lock:
+            entry = self._cities.get(city)
+            if not entry:
+                return None
+            city_segments = entry["id"].split("/")
+            paths = entry["districts"]
+        selected = set()
+        for name in district_filter:
+            matcher = DistrictMatcher([name], district_mode)
+            # A filter matching the city matches every offer's district_parent at the top level
+            if any(matcher.matches(segment, segment) for segment in city_segments):
+                return None
+            hits = {path for path in paths if matcher.matches(path.rsplit("/", 1)[-1], "")}
+            if not hits:
+                return None
+            selected |= hits
+        # Sub-districts of a picked district are already in its results
+        return sorted(path for path in selected
+                      if not any(path.startswith(other + "/") for other in selected))
+
+    def save(self):
+        """Write the cache to disk if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {city: {"id": entry["id"], "districts": sorted(entry["districts"])}
+                    for city, entry in sorted(self._cities.items())}
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp_path, self.cache_file)
+            self._dirty = False
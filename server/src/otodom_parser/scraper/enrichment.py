@@ -0,0 +1,202 @@
+"""
+Module recovering the area of offers that the search results list without one
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..html_area_extractor import extract_area
+from .offer_parser import DetailRequest, OfferRecord, parse_offer, to_float
+from .profiling import span
+from .rate_limit import HostRateLimiter
+
+_STOP = object()
+
+
+class DetailEnricher:
+    """
+    Bounded worker pool fetching detail pages of offers without an area.
+
+    ``submit`` never blocks the listing crawl: requests go into a bounded
+    queue and are dropped (and counted) when it is full. Workers fetch the
+    pages under a rate budget of their own, read the area with
+    ``extract_area`` and hand every completed OfferRecord to ``on_record``.
+    """
+
+    def __init__(
+        self,
+        get: Callable,
+        on_record: Callable[[str, DetailRequest, OfferRecord], None],
+        workers: int = 2,
+        requests_per_second: float = 0.5,
+        max_backlog: int = 1000
+    ):
+        """
+        Initialize the enricher; worker threads start with the first request
+
+        Args:
+            get: Function fetching a URL and returning a response with status_code and content
+            on_record: Called as on_record(city, request, record) for every recovered offer
+            workers: Number of worker threads, i.e. detail requests in flight
+            requests_per_second: Detail request rate, on top of the listing crawl's budget
+            max_backlog: Capacity of the request queue
+        """
+        self._get = get
+        self._on_record = on_record
+        self.workers = max(1, int(workers))
+        self.rate_limiter = HostRateLimiter(requests_per_second, self.workers)
+        self._queue = queue.Queue(maxsize=max_backlog)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._in_flight = 0
+        self._closed = False
+        self._started = None
+        self._counts = {"queued": 0, "dropped": 0, "recovered": 0, "no_area": 0, "failed": 0, "abandoned": 0}
+        self._tiers: Dict[str, int] = {}
+
+    def submit(self, city: str, requests: Iterable[DetailRequest]) -> int:
+        """
+        Queue detail pages without blocking
+
+        Args:
+            city: City whose results listed the offers
+            requests: Detail requests from offers_to_rows / parse_page
+
+        Returns:
+            Number of requests queued; repeated offers and overflow are skipped
+        """
+        queued = 0
+        for request in requests:
+            with self._lock:
+                if request.url in self._seen:
+                    continue
+                self._seen.add(request.url)
+            try:
+                self._queue.put_nowait((city, request))
+            except queue.Full:
+                # A later page listing the same offer may queue it again
+                with self._lock:
+                    self._seen.discard(request.url)
+                    self._counts["dropped"] += 1
+                continue
+            queued += 1
+        if queued:
+            with self._lock:
+                self._counts["queued"] += queued
+                if not self._threads:
+                    self._started = time.monotonic()
+                    for i in range(self.workers):
+                        thread = threading.Thread(target=self._worker, name=f"otodom-detail-{i}", daemon=True)
+                        thread.start()
+                        self._threads.append(thread)
+        return queued
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            with self._lock:
+                self._in_flight += 1
+            try:
+                self._enrich(*item)
+            except Exception as e:
+                logging.error(f"Detail enrichment of {item[1].url} failed: {str(e)}")
+                self._count("failed")
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._queue.task_done()
+
+    def _count(self, key: str, tier: Optional[str] = None):
+        with self._lock:
+            self._counts[key] += 1
+            if tier:
+                self._tiers[tier] = self._tiers.get(tier, 0) + 1
+
+    def _enrich(self, city: str, request: DetailRequest):
+        try:
+            with span("enrich.request"), self.rate_limiter.slot(request.url):
+                response = self._get(request.url)
+        except Exception as e:
+            logging.warning(f"Request to {request.url} failed: {str(e)}")
+            self._count("failed")
+            return
+        if response is None or response.status_code != 200:
+            logging.warning(f"Detail page {request.url} returned {getattr(response, 'status_code', None)}")
+            self._count("failed")
+            return
+
+        with span("enrich.extract_area"):
+            area, tier = extract_area(response.content, to_float)
+        record = parse_offer(request.offer, area=area) if area is not None else None
+        if record is None:
+            logging.debug(f"No area on detail page {request.url}")
+            self._count("no_area")
+            return
+        # Held while handing the record over, so close() cannot return in between
+        with self._lock:
+            if self._closed:
+                logging.debug(f"Dropping the area of {request.url}, the enricher is closed")
+                self._counts["abandoned"] += 1
+                return
+            self._on_record(city, request, record)
+        self._count("recovered", tier)
+
+    def stats(self) -> dict:
+        """Throughput and backlog of the enrichment, for the status stream"""
+        with self._lock:
+            stats = dict(self._counts)
+            stats["backlog"] = self._queue.qsize() + self._in_flight
+            done = stats["recovered"] + stats["no_area"] + stats["failed"]
+            elapsed = time.monotonic() - self._started if self._started else 0
+            stats["pages_per_s"] = round(done / elapsed, 2) if elapsed > 0 else 0.0
+            stats["tiers"] = dict(self._tiers)
+        return stats
+
+    def close(self, timeout: Optional[float] = None) -> int:
+        """
+        Let the workers finish the backlog, then stop them
+
+        Args:
+            timeout: Seconds to wait for the backlog, None waits for all of it
+
+        Returns:
+            Number of queued requests abandoned when the timeout ran out; pages
+            still being fetched then are dropped once they complete
+        """
+        if not self._threads:
+            return 0
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._queue.all_tasks_done.wait(remaining)
+
+        abandoned = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            abandoned += 1
+        if abandoned:
+            logging.warning(f"Abandoned {abandoned} detail pages that were still queued")
+        with self._lock:
+            self._counts["abandoned"] += abandoned
+            # Records completing after this are dropped, the writer is closed next
+            self._closed = True
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        # Workers still waiting on a response are daemon threads and do not hold up the exit
+        for thread in threads:
+            thread.join(timeout=1)
+        return abandoned
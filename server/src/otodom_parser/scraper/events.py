@@ -0,0 +1,164 @@
+"""
+Module writing scraper progress and throughput as NDJSON events, one JSON
+object per line, to a channel of its own instead of stdout
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TextIO
+
+# Minimum seconds between two progress events
+EVENT_INTERVAL_S = 1.0
+
+# Counters that are also reported as a per-second rate over the last interval
+RATE_COUNTERS = {"pages": "pages_per_s", "offers": "offers_per_s", "rows_written": "rows_per_s"}
+
+
+class EventStream:
+    """
+    Throttled writer of NDJSON events.
+
+    Every event is one line ``{"type": ..., "ts": ..., ...}`` written with a
+    single write call, so a reader never sees a split or interleaved event.
+    Progress events are cheap to skip: ``progress`` only builds the metrics
+    snapshot when at least ``interval_s`` has passed since the previous one.
+    ``start_heartbeat`` keeps them coming while nothing else reports progress.
+    """
+
+    def __init__(self, stream: TextIO, interval_s: float = EVENT_INTERVAL_S):
+        """
+        Initialize the event stream
+
+        Args:
+            stream: Text stream the events are written to, e.g. from open_event_stream
+            interval_s: Minimum seconds between two progress events
+        """
+        self._stream = stream
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._next_progress = 0.0
+        self._last_sample = None
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.events_written = 0
+
+    def emit(self, event_type: str, **fields: Any) -> bool:
+        """
+        Write one event right away
+
+        Args:
+            event_type: Value of the "type" field
+            **fields: JSON-serializable fields of the event
+
+        Returns:
+            True if the event was written, False if the channel is gone
+        """
+        line = json.dumps({"type": event_type, "ts": round(time.time(), 3), **fields},
+                          ensure_ascii=False, default=str)
+        with self._lock:
+            if self._stream is None:
+                return False
+            try:
+                self._stream.write(line + "\n")
+                self._stream.flush()
+            except (OSError, ValueError) as e:
+                # The reader went away; the scrape goes on without events
+                logging.warning(f"Event channel closed: {str(e)}")
+                self._stream = None
+                return False
+            self.events_written += 1
+        return True
+
+    def progress(self, snapshot: Callable[[], Dict[str, Any]], force: bool = False) -> bool:
+        """
+        Write a progress event unless one was written less than interval_s ago
+
+        Args:
+            snapshot: Function returning the metrics dict, only called when an event is due
+            force: Write the event regardless of the interval, e.g. for the final state
+
+        Returns:
+            True if an event was written
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_progress:
+                return False
+            self._next_progress = now + self.interval_s
+        metrics = snapshot()
+        self._add_rates(metrics, now)
+        return self.emit("progress", **metrics)
+
+    def start_heartbeat(self, snapshot: Callable[[], Dict[str, Any]]):
+        """
+        Write a progress event every interval_s from a daemon thread until close
+
+        Covers long stretches without status changes, such as slow pages or
+        draining the detail backlog; events due anyway are not duplicated.
+
+        Args:
+            snapshot: Function returning the metrics dict
+        """
+        if self._heartbeat is not None:
+            return
+
+        def beat():
+            while not self._stopped.wait(self.interval_s):
+                try:
+                    self.progress(snapshot)
+                except Exception as e:
+                    logging.error(f"Heartbeat progress event failed: {str(e)}")
+                if self._stream is None:
+                    return
+
+        self._heartbeat = threading.Thread(target=beat, name="otodom-events-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _add_rates(self, metrics: Dict[str, Any], now: float):
+        """Add per-second rates of the counters since the previous progress event"""
+        counters = metrics.get("counters") or {}
+        with self._lock:
+            previous, self._last_sample = self._last_sample, (now, dict(counters))
+        if previous is None:
+            elapsed, before = metrics.get("elapsed_s") or 0, {}
+        else:
+            elapsed, before = now - previous[0], previous[1]
+        metrics["rates"] = {
+            rate: round((counters.get(name, 0) - before.get(name, 0)) / elapsed, 2) if elapsed > 0 else 0.0
+            for name, rate in RATE_COUNTERS.items()
+        }
+
+    def close(self):
+        """Stop the heartbeat and close the underlying stream"""
+        self._stopped.set()
+        if self._heartbeat is not None and self._heartbeat is not threading.current_thread():
+            self._heartbeat.join(timeout=1)
+        with self._lock:
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+def open_event_stream(fd: int, interval_s: float = EVENT_INTERVAL_S) -> Optional[EventStream]:
+    """
+    Open an EventStream on an inherited file descriptor, e.g. a pipe set up by the parent process
+
+    Args:
+        fd: File descriptor to write to
+        interval_s: Minimum seconds between two progress events
+
+    Returns:
+        EventStream, or None if the descriptor cannot be opened
+    """
+    try:
+        stream = os.fdopen(fd, "w", encoding="utf-8", buffering=1)
+    except OSError as e:
+        logging.error(f"Cannot open event channel on fd {fd}: {str(e)}")
+        return None
+    return EventStream(stream, interval_s)
+
@@ -2,6 +2,7 @@
 Module for handling offer filtering logic to determine which offers should be processed
 """
 import logging
+import re
 from typing import Dict, List, Any, Optional
 
 
@@ -54,4 +55,84 @@ def should_skip_offer(
         logging.debug(f"Skipping offer: district={district}, parent={district_parent} doesn't match filters")
         return True
         
-    return False
\ No newline at end of file
+    return False
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex alternation of words with shared prefixes factored out, e.g. mok(?:otow|ra)"""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        # A word ending here makes the rest of the branch optional
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if optional else group
+
+    return build(trie)
+
+
+class DistrictMatcher:
+    """
+    District filter compiled once, with the same semantics as should_skip_offer.
+
+    Exact mode looks districts up in a frozenset. Prefix mode matches all
+    filters with one regex, built from a trie of the filters and anchored at
+    the start of the district or after a "-" (e.g. "mokotow" matches
+    "mokotow-gorny" and "stary-mokotow").
+    """
+
+    def __init__(self, district_filter: Optional[List[str]] = None, district_mode: str = "prefix"):
+        """
+        Compile the filter
+
+        Args:
+            district_filter: List of districts to match or None/["all"] for no filtering
+            district_mode: Mode to match districts - "exact" or "prefix"
+        """
+        self.match_all = not district_filter or "all" in district_filter
+        self.exact = district_mode == "exact"
+        filters = [d.lower() for d in district_filter or []]
+        self._names = frozenset(filters)
+        self._pattern = re.compile("(?:^|-)" + _trie_pattern(filters)) if filters else None
+
+    def matches(self, district: str, district_parent: str) -> bool:
+        """Whether a lowercase district or its parent passes the filter"""
+        if self.match_all:
+            return True
+        if self.exact:
+            return district in self._names or district_parent in self._names
+        search = self._pattern.search
+        return search(district) is not None or search(district_parent) is not None
+
+    def should_skip(self, district: str, district_parent: str) -> bool:
+        """
+        Determine if an offer should be skipped based on its districts
+
+        Args:
+            district: District of the offer
+            district_parent: Parent district of the offer
+
+        Returns:
+            True if offer should be skipped, False if it should be processed
+        """
+        if self.match_all:
+            return False
+        district = (district or "").lower()
+        district_parent = (district_parent or "").lower()
+        if not district and not district_parent:
+            logging.debug("Skipping offer with missing district information")
+            return True
+        if not self.matches(district, district_parent):
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug(f"Skipping offer: district={district}, parent={district_parent} doesn't match filters")
+            return True
+        return False
@@ -0,0 +1,178 @@
+"""
+Module with an on-disk cache of search result pages used for conditional requests
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+def body_digest(body: bytes) -> str:
+    """Return the digest used to detect unchanged page bodies"""
+    return hashlib.sha256(body).hexdigest()
+
+
+class PageCache:
+    """
+    Size-bounded LRU cache of page bodies keyed by URL.
+
+    Every entry keeps the validators the server sent (ETag, Last-Modified), a
+    digest of the body and a small ``meta`` dict the scraper uses to replay
+    the outcome of an unchanged page without parsing it again. The index is
+    kept in memory and written to ``index.json`` by ``save``.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, root: Path, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            root: Directory holding the index and the cached bodies
+            max_bytes: Total body size above which least recently used entries are evicted
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: Dict[str, Dict[str, Any]] = self._load_index()
+        self._total_bytes = sum(entry.get("size", 0) for entry in self._entries.values())
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.root / f"{key}.body"
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        index_path = self.root / self.INDEX_FILE
+        if not index_path.exists():
+            return {}
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable page cache index {index_path}: {str(e)}")
+            return {}
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cache entry for a URL, or None if it is not cached"""
+        with self._lock:
+            entry = self._entries.get(self._key(url))
+            if entry is None or not self._body_path(self._key(url)).exists():
+                return None
+            return dict(entry)
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers for a cached entry"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        """Read the cached body of a URL"""
+        try:
+            return self._body_path(self._key(url)).read_bytes()
+        except OSError:
+            return None
+
+    def record_hit(self, url: str, not_modified: bool = False):
+        """Count a hit and mark the entry as recently used"""
+        with self._lock:
+            self.hits += 1
+            if not_modified:
+                self.not_modified += 1
+            entry = self._entries.get(self._key(url))
+            if entry is not None:
+                entry["last_access"] = time.time()
+                self._dirty = True
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def store(self, url: str, body: bytes, etag: Optional[str] = None,
+              last_modified: Optional[str] = None, meta: Optional[Dict[str, Any]] = None):
+        """Store a page body with its validators and evict old entries if needed"""
+        key = self._key(url)
+        path = self._body_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(body)
+        os.replace(tmp_path, path)
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous:
+                self._total_bytes -= previous.get("size", 0)
+            self._entries[key] = {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "digest": body_digest(body),
+                "size": len(body),
+                "last_access": time.time(),
+                "meta": meta or {},
+            }
+            self._total_bytes += len(body)
+            self._dirty = True
+            self._evict(keep=key)
+
+    def update_meta(self, url: str, meta: Dict[str, Any]):
+        """Replace the scraper metadata of an existing entry"""
+        with self._lock:
+            entry = self._entries.get(self._key(url))
+            if entry is not None:
+                entry["meta"] = meta
+                self._dirty = True
+
+    def _evict(self, keep: str):
+        """Drop least recently used entries until the cache fits into max_bytes"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1].get("last_access", 0)):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._body_path(key).unlink(missing_ok=True)
+            self._total_bytes -= entry.get("size", 0)
+            del self._entries[key]
+            self.evictions += 1
+
+    def save(self):
+        """Write the index to disk if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            index_path = self.root / self.INDEX_FILE
+            tmp_path = index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, index_path)
+            self._dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current cache size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
@@ -0,0 +1,171 @@
+"""
+Module with the scraper-owned HTTP session: pooled keep-alive connections,
+compressed transfers and connection reuse metrics
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    # urllib3 only decodes "br" responses when a brotli binding is installed
+    import brotli  # noqa: F401
+    _BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _BROTLI_AVAILABLE = True
+    except ImportError:
+        _BROTLI_AVAILABLE = False
+
+ACCEPT_ENCODING = "gzip, deflate, br" if _BROTLI_AVAILABLE else "gzip, deflate"
+
+# Latencies of the most recent requests kept for the percentiles
+LATENCY_WINDOW = 1024
+
+
+def latency_percentiles(samples: Iterable[float], percentiles=(50, 90, 99)) -> Dict[str, Optional[float]]:
+    """
+    Nearest-rank latency percentiles in milliseconds
+
+    Args:
+        samples: Latencies in seconds
+        percentiles: Percentiles to report
+
+    Returns:
+        Mapping like {"p50_ms": 120.5, ...}; values are None without samples
+    """
+    ordered = sorted(samples)
+    result = {}
+    for p in percentiles:
+        if not ordered:
+            result[f"p{p}_ms"] = None
+            continue
+        rank = -(-p * len(ordered) // 100)
+        result[f"p{p}_ms"] = round(ordered[max(0, rank - 1)] * 1000, 1)
+    return result
+
+
+class PoolStats:
+    """Thread-safe counters describing how well connections are reused"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.failures = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def record_request(self, elapsed: float, failed: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.total_seconds += elapsed
+            self._latencies.append(elapsed)
+            if failed:
+                self.failures += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters as a plain dict"""
+        with self._lock:
+            completed = self.requests - self.failures
+            snapshot = {
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "new_connections": self.new_connections,
+                "reused_connections": max(0, completed - self.new_connections),
+                "avg_latency_ms": round(self.total_seconds / self.requests * 1000, 1) if self.requests else None,
+            }
+            latencies = list(self._latencies)
+        # Percentiles of the last LATENCY_WINDOW requests, sorted outside the lock
+        snapshot.update(latency_percentiles(latencies))
+        return snapshot
+
+
+def _counting_pool(base, stats: PoolStats):
+    """Build a connection pool class that reports every new connection to ``stats``"""
+
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.record_new_connection()
+            return super()._new_conn()
+
+    CountingPool.__name__ = f"Counting{base.__name__}"
+    return CountingPool
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count the TCP/TLS connections they open"""
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        # init_poolmanager runs inside HTTPAdapter.__init__, so stats must exist first
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self._stats),
+            "https": _counting_pool(HTTPSConnectionPool, self._stats),
+        }
+
+
+class ScraperSession:
+    """
+    Persistent HTTP session shared by all scraper threads.
+
+    Connections are kept alive in a pool sized to the crawl concurrency, so
+    the TCP and TLS handshakes are paid once per connection instead of once
+    per page.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, pool_size: int = 4,
+                 connect_timeout: float = 5.0, read_timeout: float = 15.0):
+        """
+        Initialize the session
+
+        Args:
+            headers: Default headers sent with every request
+            pool_size: Maximum number of kept-alive connections per host
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait for the server to send data
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = PoolStats()
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self.session.headers["Connection"] = "keep-alive"
+        adapter = CountingHTTPAdapter(self.stats, pool_connections=4, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request over a pooled connection"""
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except Exception:
+            self.stats.record_request(time.perf_counter() - start, failed=True)
+            raise
+        self.stats.record_request(time.perf_counter() - start)
+        return response
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
@@ -4,7 +4,47 @@ Module for parsing Otodom offer data from JSON responses
 import logging
 import traceback
 import re
-from typing import Dict, Optional, Any, Union
+from typing import Dict, NamedTuple, Optional, Any, Union
+
+_NUMBER_RE = re.compile(r'[\d.]+')
+
+# Offer enums mapped to numbers
+FLOOR_MAP = {
+    "GROUND": 0, "FIRST": 1, "SECOND": 2, "THIRD": 3,
+    "FOURTH": 4, "FIFTH": 5, "SIXTH": 6, "SEVENTH": 7,
+    "ABOVE_TENTH": 11, "TENTH": 10, "NINTH": 9, "EIGHTH": 8
+}
+
+ROOMS_MAP = {
+    "STUDIO": 0,
+    "ONE": 1, "TWO": 2, "THREE": 3, "FOUR": 4,
+    "FIVE": 5, "SIX": 6, "SEVEN": 7,
+    "EIGHT": 8, "NINE": 9, "TEN": 10,
+    "FIVE_OR_MORE": 5,  # fallback
+    "TEN_OR_MORE": 10,
+}
+
+# Detail page of an offer, by its slug
+DETAIL_URL = "https://www.otodom.pl/pl/oferta/{slug}"
+
+
+class OfferRecord(NamedTuple):
+    """Parsed offer; ``_asdict()`` gives the dict returned by parse_offer_json"""
+    area: float
+    price_per_sqm: int
+    floor: int
+    rooms: Optional[int]
+    city: str
+    district: str
+    district_parent: str
+
+
+class DetailRequest(NamedTuple):
+    """Offer listed without an area, to be completed from its detail page"""
+    url: str
+    offer: Dict[str, Any]
+    district: str
+    district_parent: str
 
 
 def to_float(v):
@@ -21,7 +61,7 @@ def to_float(v):
             return None
         if isinstance(v, str):
             v = v.replace(' ', '').replace(',', '.')
-            match = re.search(r'[\d.]+', v)
+            match = _NUMBER_RE.search(v)
             if match:
                 return float(match[0])
             return None
@@ -49,151 +89,160 @@ def safe_lower(x, default="unknown"):
     return default
 
 
-def parse_offer_json(offer):
-    """Extract information from a JSON offer object"""
+def _price_per_sqm(offer, area, debug):
+    """Price per m² from the offer, falling back to price / area and priceFromPerSquareMeter"""
+    ppsm_data = offer.get("pricePerSquareMeter")
+    ppsm = to_float(ppsm_data.get("value")) if isinstance(ppsm_data, dict) else None
+    if ppsm is not None:
+        if debug:
+            logging.debug(f"Found price per sqm (pricePerSquareMeter.value): {int(ppsm)}")
+        return int(ppsm)
+
+    if "pricePerSqm" in offer:
+        ppsm = to_float(offer["pricePerSqm"])
+        if ppsm is None:
+            return None
+        if debug:
+            logging.debug(f"Found price per sqm (pricePerSqm): {int(ppsm)}")
+        return int(ppsm)
+
+    # Try to calculate price per sqm from total price if available
+    total_price = offer.get("totalPrice")
+    total = to_float(total_price.get("value")) if isinstance(total_price, dict) else None
+    if total is None:
+        total = to_float(offer.get("price"))
+    if total is not None and area > 0:
+        price_per_sqm = int(round(total / area))
+        if debug:
+            logging.debug(f"Calculated price per sqm from price ({total}) / area ({area}) = {price_per_sqm}")
+        return price_per_sqm
+
+    # Second fallback: try priceFromPerSquareMeter
+    pfsqm = offer.get("priceFromPerSquareMeter")
+    ppsm = to_float(pfsqm.get("value")) if isinstance(pfsqm, dict) else None
+    if ppsm is not None:
+        if debug:
+            logging.debug(f"Found price per sqm (priceFromPerSquareMeter.value): {int(ppsm)}")
+        return int(ppsm)
+    if debug:
+        logging.debug(f"Price per sqm not found and could not be calculated (price={total}, area={area})")
+    return None
+
+
+def offer_area(offer) -> Optional[float]:
+    """Area of an offer as listed in the page JSON, None if it has none"""
+    area = to_float(offer.get("areaInSquareMeters"))
+    if area is None:
+        area = to_float(offer.get("areaInM2"))
+    return area
+
+
+def _location(offer):
+    """(city, district, district_parent) of an offer"""
+    district_sub = "unknown"
+    district_parent = "unknown"
+    location = offer.get("location")
+    address = location.get("address") if isinstance(location, dict) else None
+    if isinstance(address, dict) and "city" in address:
+        city = safe_lower(address["city"])
+        # Try to get district from reverseGeocoding locations
+        geocoding = location.get("reverseGeocoding")
+        locations = geocoding.get("locations") if isinstance(geocoding, dict) else None
+        if isinstance(locations, list) and locations:
+            path = locations[-1]["id"].split("/")
+            district_sub = safe_lower(path[-1]) if path else "unknown"
+            district_parent = safe_lower(path[-2]) if len(path) >= 2 else district_sub
+    else:
+        # Fall back to old format, which uses the same value for both districts
+        city = safe_lower(offer.get("location", {}).get("city", ""))
+        district_sub = safe_lower(offer.get("location", {}).get("district", "")) or "unknown"
+        district_parent = district_sub
+    return city, district_sub, district_parent
+
+
+def detail_request(offer) -> Optional[DetailRequest]:
+    """
+    Detail page request of an offer, built from its slug or href
+
+    Args:
+        offer: Offer from the page JSON
+
+    Returns:
+        DetailRequest, or None if the offer has no usable slug or location
+    """
     try:
-        logging.debug("Parsing offer JSON...")
-        
+        slug = offer.get("slug")
+        if not slug and isinstance(offer.get("href"), str):
+            slug = offer["href"].rstrip("/").rsplit("/", 1)[-1]
+        if not slug:
+            return None
+        _, district, district_parent = _location(offer)
+        return DetailRequest(DETAIL_URL.format(slug=slug), offer, district, district_parent)
+    except Exception as e:
+        logging.debug(f"No detail request for offer {offer.get('id', 'unknown')}: {str(e)}")
+        return None
+
+
+def parse_offer(offer, area: Optional[float] = None) -> Optional[OfferRecord]:
+    """
+    Extract information from a JSON offer object
+
+    Args:
+        offer: Offer from the page JSON
+        area: Area recovered from the detail page, used when the offer lists none
+
+    Returns:
+        OfferRecord, or None if the offer has no area or price per m²
+    """
+    try:
+        # Debug messages are only formatted when they will be emitted
+        debug = logging.root.isEnabledFor(logging.DEBUG)
+
         # Extract area from JSON
-        area = to_float(offer.get("areaInSquareMeters"))
+        listed_area = offer_area(offer)
+        if listed_area is not None:
+            area = listed_area
         if area is None:
-            area = to_float(offer.get("areaInM2"))
-            
-        if area is not None:
-            logging.debug(f"Found area: {area}")
-        else:
-            logging.debug(f"Skipped offer {offer.get('id', 'unknown')} (area=None)")
+            if debug:
+                logging.debug(f"Skipped offer {offer.get('id', 'unknown')} (area=None)")
             return None
-        
-        # Extract price per sqm from JSON or calculate if missing
-        ppsm_data = offer.get("pricePerSquareMeter")
-        if isinstance(ppsm_data, dict):
-            ppsm = to_float(ppsm_data.get("value"))
-        else:
-            ppsm = None
-            
-        if ppsm is not None:
-            price_per_sqm = int(ppsm)
-            logging.debug(f"Found price per sqm (pricePerSquareMeter.value): {price_per_sqm}")
-        elif "pricePerSqm" in offer:
-            price_per_sqm = to_float(offer["pricePerSqm"])
-            if price_per_sqm is not None:
-                price_per_sqm = int(price_per_sqm)
-                logging.debug(f"Found price per sqm (pricePerSqm): {price_per_sqm}")
-        else:
-            # Try to calculate price per sqm from total price if available
-            total_price = offer.get("totalPrice")
-            if isinstance(total_price, dict):
-                total = to_float(total_price.get("value"))
-            else:
-                total = None
-            if total is None:
-                total = to_float(offer.get("price"))
-            
-            if total is not None and area > 0:
-                price_per_sqm = int(round(total / area))
-                logging.debug(f"Calculated price per sqm from price ({total}) / area ({area}) = {price_per_sqm}")
-            else:
-                # Second fallback: try priceFromPerSquareMeter
-                pfsqm = offer.get("priceFromPerSquareMeter")
-                if isinstance(pfsqm, dict):
-                    ppsm = to_float(pfsqm.get("value"))
-                    if ppsm is not None:
-                        price_per_sqm = int(ppsm)
-                        logging.debug(f"Found price per sqm (priceFromPerSquareMeter.value): {price_per_sqm}")
-                    else:
-                        price_per_sqm = None
-                else:
-                    price_per_sqm = None
-                
-                if price_per_sqm is None:
-                    logging.debug(f"Price per sqm not found and could not be calculated (price={total}, area={area})")
-        
+
         # Skip offers with missing price_per_sqm
+        price_per_sqm = _price_per_sqm(offer, area, debug)
         if price_per_sqm is None:
-            logging.debug(f"Skipped offer {offer.get('id', 'unknown')} (area={area}, ppsm=None)")
+            if debug:
+                logging.debug(f"Skipped offer {offer.get('id', 'unknown')} (area={area}, ppsm=None)")
             return None
-        
-        # Extract floor from JSON with support for string floor values
-        floor_map = {
-            "GROUND": 0, "FIRST": 1, "SECOND": 2, "THIRD": 3,
-            "FOURTH": 4, "FIFTH": 5, "SIXTH": 6, "SEVENTH": 7,
-            "ABOVE_TENTH": 11, "TENTH": 10, "NINTH": 9, "EIGHTH": 8
-        }
-        
+
+        # Floor is an enum like "SECOND" or already a number
         floor_number = offer.get("floorNumber")
-        floor = floor_map.get(str(floor_number).upper(), 0) if floor_number else 0
-        logging.debug(f"Mapped floorNumber '{floor_number}' to: {floor}")
-        
-        # Extract number of rooms
-        _ROOMS_MAP = {
-            "STUDIO": 0,
-            "ONE": 1, "TWO": 2, "THREE": 3, "FOUR": 4,
-            "FIVE": 5, "SIX": 6, "SEVEN": 7,
-            "EIGHT": 8, "NINE": 9, "TEN": 10,
-            "FIVE_OR_MORE": 5,  # fallback
-            "TEN_OR_MORE": 10,
-        }
-        
-        rooms = None
+        if isinstance(floor_number, int):
+            floor = floor_number
+        else:
+            floor = FLOOR_MAP.get(str(floor_number).upper(), 0) if floor_number else 0
+
         rooms_raw = offer.get("roomsNumber")
         if isinstance(rooms_raw, int):
             rooms = rooms_raw
         elif isinstance(rooms_raw, str):
-            rooms = _ROOMS_MAP.get(rooms_raw.upper())
+            rooms = ROOMS_MAP.get(rooms_raw.upper())
         else:
             rooms = None
-            
-        logging.debug(f"rooms={rooms_raw}->{rooms}")
-        
+
         # Extract city and district from new format if available
-        city = ""
-        district_sub = "unknown"
-        district_parent = "unknown"
-        
-        if ("location" in offer and 
-            isinstance(offer["location"], dict) and
-            "address" in offer["location"] and
-            isinstance(offer["location"]["address"], dict) and
-            "city" in offer["location"]["address"]):
-            
-            city_obj = offer["location"]["address"]["city"]
-            city = safe_lower(city_obj)
-            logging.debug(f"Found city from location.address.city: {city}")
-            
-            # Try to get district from reverseGeocoding locations
-            if ("reverseGeocoding" in offer["location"] and
-                isinstance(offer["location"]["reverseGeocoding"], dict) and
-                "locations" in offer["location"]["reverseGeocoding"] and
-                isinstance(offer["location"]["reverseGeocoding"]["locations"], list) and
-                len(offer["location"]["reverseGeocoding"]["locations"]) > 0):
-                
-                locations = offer["location"]["reverseGeocoding"]["locations"]
-                path = locations[-1]["id"].split("/") if locations else []
-                district_sub = safe_lower(path[-1]) if path else "unknown"
-                district_parent = safe_lower(path[-2]) if len(path) >= 2 else district_sub
-                
-                logging.debug(f"Found district_sub from reverseGeocoding: {district_sub}")
-                logging.debug(f"Found district_parent from reverseGeocoding: {district_parent}")
-        else:
-            # Fall back to old format
-            city = safe_lower(offer.get("location", {}).get("city", ""))
-            district_sub = safe_lower(offer.get("location", {}).get("district", "")) or "unknown"
-            district_parent = district_sub  # In old format, use the same value for both
-            logging.debug(f"Using old format location data: city={city}, district_sub={district_sub}, district_parent={district_parent}")
-        
-        result = {
-            'area': area,
-            'price_per_sqm': price_per_sqm,
-            'floor': floor,
-            'rooms': rooms,
-            'city': city,
-            'district': district_sub,
-            'district_parent': district_parent
-        }
-        logging.debug(f"Parsed offer data: {result}")
-        return result
+        city, district_sub, district_parent = _location(offer)
+
+        record = OfferRecord(area, price_per_sqm, floor, rooms, city, district_sub, district_parent)
+        if debug:
+            logging.debug(f"Parsed offer data: {record}")
+        return record
     except Exception as e:
         logging.error(f"Failed to parse offer JSON: {str(e)}")
         logging.error(f"Traceback: {traceback.format_exc()}")
-        return None
\ No newline at end of file
+        return None
+
+
+def parse_offer_json(offer) -> Optional[Dict[str, Any]]:
+    """Extract information from a JSON offer object as a dict, see parse_offer"""
+    record = parse_offer(offer)
+    return record._asdict() if record is not None else None
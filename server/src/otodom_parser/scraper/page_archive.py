@@ -0,0 +1,238 @@
+"""
+Module with an append-only, compressed archive of raw result pages
+
+Pages are stored as independent compressed frames appended to segment files
+(gzip members, or zstd frames when the optional ``zstandard`` package is
+installed). Every frame gets one line in ``index.jsonl`` with its segment,
+offset and length, so a single page can be read back without decompressing
+anything else. Concatenated gzip members are themselves a valid gzip stream,
+so ``zcat segment-00000.gz`` prints every page of a segment.
+
+    python -m otodom_parser.scraper.page_archive debug/archive list
+    python -m otodom_parser.scraper.page_archive debug/archive extract warszawa "" 3 > page.html
+"""
+import argparse
+import gzip
+import json
+import logging
+import queue
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+INDEX_FILE = "index.jsonl"
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+_STOP = object()
+
+PageKey = Tuple[str, str, int]
+
+
+def _compress(body: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _decompress(frame: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        if zstandard is None:
+            raise RuntimeError("The zstandard package is needed to read zstd frames")
+        return zstandard.ZstdDecompressor().decompress(frame)
+    return gzip.decompress(frame)
+
+
+class PageArchive:
+    """
+    Append-only page archive written by a background thread.
+
+    ``append`` only queues the page; compression and file I/O happen on the
+    writer thread, which is started by the first append. Pages can be read
+    back at any time with ``read``; the newest capture of a page wins unless
+    a timestamp is given.
+    """
+
+    def __init__(self, root: Union[str, Path], segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 codec: Optional[str] = None, queue_size: int = 256):
+        """
+        Open or create an archive
+
+        Args:
+            root: Archive directory holding the segments and index.jsonl
+            segment_bytes: Size after which a new segment file is started
+            codec: "zst" or "gz", defaults to zstd when zstandard is installed
+            queue_size: Pages that may wait for the writer before append blocks
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.codec = codec or ("zst" if zstandard is not None else "gz")
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._index: Dict[PageKey, List[Dict[str, Any]]] = {}
+        self._stats = {"pages": 0, "raw_bytes": 0, "stored_bytes": 0}
+        self._load_index()
+
+    def _load_index(self):
+        index_path = self.root / INDEX_FILE
+        if not index_path.exists():
+            return
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted run
+                    logging.warning(f"Skipping unreadable line in {index_path}")
+                    continue
+                self._add_entry(entry)
+
+    def _add_entry(self, entry: Dict[str, Any]):
+        key = (entry["city"], entry["district"], entry["page"])
+        with self._lock:
+            self._index.setdefault(key, []).append(entry)
+            self._stats["pages"] += 1
+            self._stats["raw_bytes"] += entry["size"]
+            self._stats["stored_bytes"] += entry["length"]
+
+    def append(self, city: str, district: str, page: int, body: bytes):
+        """Queue a page for the background writer"""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._write_loop, name="page-archive", daemon=True)
+                    self._thread.start()
+        self._queue.put((city, district or "", page, datetime.utcnow().isoformat(), body))
+
+    def _segment_path(self, number: int) -> Path:
+        return self.root / f"segment-{number:05d}.{self.codec}"
+
+    def _write_loop(self):
+        segments = sorted(self.root.glob(f"segment-*.{self.codec}"))
+        number = int(segments[-1].stem.split("-")[1]) if segments else 0
+        segment = open(self._segment_path(number), "ab")
+        index = open(self.root / INDEX_FILE, "a", encoding="utf-8")
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    self._queue.task_done()
+                    break
+                try:
+                    city, district, page, timestamp, body = item
+                    if segment.tell() >= self.segment_bytes:
+                        segment.close()
+                        number += 1
+                        segment = open(self._segment_path(number), "ab")
+                    frame = _compress(body, self.codec)
+                    offset = segment.tell()
+                    segment.write(frame)
+                    segment.flush()
+                    entry = {
+                        "city": city, "district": district, "page": page, "ts": timestamp,
+                        "segment": self._segment_path(number).name, "offset": offset,
+                        "length": len(frame), "size": len(body), "codec": self.codec,
+                    }
+                    # The frame is on disk before the index line that points to it
+                    index.write(json.dumps(entry) + "\n")
+                    index.flush()
+                    self._add_entry(entry)
+                except Exception as e:
+                    logging.error(f"Failed to archive page {item[2]} of {item[0]}/{item[1]}: {str(e)}")
+                finally:
+                    self._queue.task_done()
+        finally:
+            segment.close()
+            index.close()
+
+    def flush(self):
+        """Wait until every queued page is on disk"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write the remaining pages and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def keys(self) -> List[PageKey]:
+        """(city, district, page) of every archived page, sorted"""
+        with self._lock:
+            return sorted(self._index)
+
+    def captures(self, city: str, district: str, page: int) -> List[Dict[str, Any]]:
+        """Index entries of every capture of a page, oldest first"""
+        with self._lock:
+            return list(self._index.get((city, district or "", page), []))
+
+    def read(self, city: str, district: str, page: int, timestamp: Optional[str] = None) -> Optional[bytes]:
+        """
+        Read one page back
+
+        Args:
+            city: City slug
+            district: District slug, "" for the whole city
+            page: Page number
+            timestamp: Capture time from the index, defaults to the newest capture
+
+        Returns:
+            The raw page body or None if the page is not archived
+        """
+        entries = self.captures(city, district, page)
+        if timestamp is not None:
+            entries = [entry for entry in entries if entry["ts"] == timestamp]
+        if not entries:
+            return None
+        entry = entries[-1]
+        with open(self.root / entry["segment"], "rb") as f:
+            f.seek(entry["offset"])
+            frame = f.read(entry["length"])
+        return _decompress(frame, entry["codec"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Archived page count, raw and compressed sizes and the compression ratio"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["ratio"] = round(stats["raw_bytes"] / stats["stored_bytes"], 1) if stats["stored_bytes"] else 0.0
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a raw page archive")
+    parser.add_argument("archive", help="Archive directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List archived pages")
+    extract = sub.add_parser("extract", help="Write one page to stdout")
+    extract.add_argument("city")
+    extract.add_argument("district")
+    extract.add_argument("page", type=int)
+    extract.add_argument("--ts", help="Capture timestamp (default: newest)")
+    args = parser.parse_args()
+
+    archive = PageArchive(args.archive)
+    if args.command == "list":
+        for city, district, page in archive.keys():
+            for entry in archive.captures(city, district, page):
+                print(f"{city}\t{district or '-'}\t{page}\t{entry['ts']}\t{entry['size']}B -> {entry['length']}B")
+        return
+    body = archive.read(args.city, args.district, args.page, args.ts)
+    if body is None:
+        print("Page not found in archive", file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.buffer.write(body)
+
+
+if __name__ == "__main__":
+    main()
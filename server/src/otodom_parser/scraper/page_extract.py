@@ -0,0 +1,128 @@
+"""
+Module for pulling the embedded data out of raw result pages without building a DOM
+"""
+import json
+import logging
+import re
+from typing import List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    SOUP_PARSER = "lxml"
+except ImportError:
+    SOUP_PARSER = "html.parser"
+
+_NEXT_DATA_MARKER = b"__NEXT_DATA__"
+_NEXT_DATA_TAG = re.compile(rb"""<script\b[^>]*\bid\s*=\s*["']?__NEXT_DATA__["']?[^>]*>""", re.IGNORECASE)
+_SCRIPT_CLOSE = re.compile(rb"</script\s*>", re.IGNORECASE)
+_TOTAL_LISTINGS = re.compile("Zobacz (\\d+) ogłoszeń".encode("utf-8"))
+_PAGINATION_PAGE = re.compile(rb'class="pagination__page"[^>]*>(\d+)<')
+
+
+def _as_bytes(page: Union[bytes, str]) -> bytes:
+    return page.encode("utf-8") if isinstance(page, str) else page
+
+
+def find_next_data(page: Union[bytes, str]) -> Optional[bytes]:
+    """
+    Slice the JSON payload of the ``<script id="__NEXT_DATA__">`` tag out of a page
+
+    Args:
+        page: Raw page body
+
+    Returns:
+        The script contents as bytes (ready for json.loads) or None if the tag is missing
+    """
+    page = _as_bytes(page)
+    pos = page.find(_NEXT_DATA_MARKER)
+    while pos != -1:
+        # The marker may also appear inside other scripts, so check it belongs to a script tag
+        tag_start = page.rfind(b"<", 0, pos)
+        tag = _NEXT_DATA_TAG.match(page, tag_start) if tag_start != -1 else None
+        if tag and tag.end() > pos:
+            close = _SCRIPT_CLOSE.search(page, tag.end())
+            if close is None:
+                return None
+            return page[tag.end():close.start()]
+        pos = page.find(_NEXT_DATA_MARKER, pos + len(_NEXT_DATA_MARKER))
+    return None
+
+
+def find_total_listings(page: Union[bytes, str]) -> Optional[int]:
+    """Read the total listing count from the "Zobacz N ogłoszeń" meta description"""
+    match = _TOTAL_LISTINGS.search(_as_bytes(page))
+    return int(match.group(1)) if match else None
+
+
+def find_max_pagination_page(page: Union[bytes, str]) -> Optional[int]:
+    """Read the highest page number from legacy pagination links"""
+    pages = _PAGINATION_PAGE.findall(_as_bytes(page))
+    return max(map(int, pages)) if pages else None
+
+
+def make_soup(page: Union[bytes, str]) -> BeautifulSoup:
+    """Build a BeautifulSoup tree, using lxml when it is installed"""
+    return BeautifulSoup(page, SOUP_PARSER)
+
+
+def extract_offers(next_json: dict, soup=None, html=None) -> List[dict]:
+    """Extract listing offers from JSON data
+    
+    The raw page ``html`` is only parsed into a soup when the legacy
+    window.__INITIAL_STATE__ strategy is needed.
+    """
+    try:
+        # Strategy 1: Try extracting from adSearchResult.searchAds.items
+        if ("props" in next_json and 
+            "pageProps" in next_json["props"] and 
+            "adSearchResult" in next_json["props"]["pageProps"] and 
+            "searchAds" in next_json["props"]["pageProps"]["adSearchResult"] and
+            "items" in next_json["props"]["pageProps"]["adSearchResult"]["searchAds"]):
+            
+            return next_json["props"]["pageProps"]["adSearchResult"]["searchAds"]["items"]
+            
+        # Strategy 2: Try extracting from __NEXT_DATA__ with different structure
+        if ("props" in next_json and 
+            "pageProps" in next_json["props"] and 
+            "data" in next_json["props"]["pageProps"] and 
+            "searchAds" in next_json["props"]["pageProps"]["data"] and
+            "items" in next_json["props"]["pageProps"]["data"]["searchAds"]):
+            
+            return next_json["props"]["pageProps"]["data"]["searchAds"]["items"]
+        
+        # Strategy 3: Legacy OtoDom site format with embedded JS object
+        if soup is None and html is not None:
+            soup = make_soup(html)
+        if soup:
+            data_container_script = None
+            
+            # Look for script with window.__INITIAL_STATE__
+            for script in soup.find_all("script"):
+                if script.string and "window.__INITIAL_STATE__" in script.string:
+                    data_container_script = script
+                    break
+            
+            if data_container_script:
+                try:
+                    # Extract JSON part from the JS code
+                    js_text = data_container_script.string
+                    json_start = js_text.find('{')
+                    json_end = js_text.rfind('}') + 1
+                    json_text = js_text[json_start:json_end]
+                    
+                    data = json.loads(json_text)
+                    
+                    if "listing" in data and "ads" in data["listing"]:
+                        return data["listing"]["ads"]
+                except Exception as e:
+                    logging.error(f"Failed to extract from window.__INITIAL_STATE__: {str(e)}")
+        
+        # No valid data structure found
+        logging.warning("Could not extract offers from JSON data - unknown structure")
+        return []
+        
+    except Exception as e:
+        logging.error(f"Failed to extract offers from JSON: {str(e)}")
+        return []
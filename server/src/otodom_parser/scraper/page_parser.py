@@ -0,0 +1,134 @@
+"""
+Module turning a raw result page into compact listing rows
+
+Everything here is a plain function of its arguments so it can run in a
+worker process: ``parse_page`` takes the page bytes and returns tuples that
+are cheap to send back to the scraper process.
+"""
+import json
+import logging
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from .filters import DistrictMatcher
+from .offer_parser import DetailRequest, detail_request, offer_area, parse_offer
+from .page_extract import extract_offers, find_max_pagination_page, find_next_data, find_total_listings
+from .pagination import LISTINGS_PER_PAGE, find_pagination, total_pages_from_pagination
+
+# Outcomes of parse_page besides success (None)
+NO_NEXT_DATA = "no_next_data"
+INVALID_JSON = "invalid_json"
+NO_OFFERS = "no_offers"
+
+# (district, district_parent, area, price_per_sqm, floor, rooms, offer_id)
+ListingRow = Tuple[str, str, float, float, Optional[int], Optional[int], Optional[str]]
+
+
+def count_pages(page_bytes: bytes, next_json: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """
+    Number of result pages announced on page 1
+
+    Args:
+        page_bytes: Raw body of the first result page
+        next_json: Parsed __NEXT_DATA__ of the page, if already decoded
+
+    Returns:
+        Pages from the searchAds.pagination block of the JSON, computed from
+        the "Zobacz N ogłoszeń" count, or the highest legacy pagination link,
+        None if none of them is present
+    """
+    total_pages = total_pages_from_pagination(find_pagination(next_json)) if next_json else None
+    if total_pages is not None:
+        return total_pages
+    total_listings = find_total_listings(page_bytes)
+    if total_listings is not None:
+        return math.ceil(total_listings / LISTINGS_PER_PAGE)
+    return find_max_pagination_page(page_bytes)
+
+
+def offers_to_rows(
+    offers: List[Dict[str, Any]],
+    matcher: Optional[DistrictMatcher] = None,
+    pending: Optional[List[DetailRequest]] = None
+) -> List[ListingRow]:
+    """
+    Parse and filter raw offers into listing rows
+
+    Args:
+        offers: Offers from the page JSON
+        matcher: Compiled district filter, or None for no filtering
+        pending: If given, offers that pass the filters but are listed without
+            an area get a DetailRequest appended here
+
+    Returns:
+        One row per offer that passes the filters and has an area and a price per m²
+    """
+    rows = []
+    filtering = matcher is not None and not matcher.match_all
+    for offer in offers:
+        # Parse the offer to get structured data
+        record = parse_offer(offer)
+        if record is None:
+            if pending is not None and offer_area(offer) is None:
+                request = detail_request(offer)
+                if request is not None and not (
+                        filtering and matcher.should_skip(request.district, request.district_parent)):
+                    pending.append(request)
+            continue
+        # Check if we should skip this offer based on filters
+        if filtering and matcher.should_skip(record.district, record.district_parent):
+            continue
+
+        # Skip incomplete offers
+        if not all((record.area, record.price_per_sqm)):  # Floor can be 0
+            logging.warning("Missing required field - skipping")
+            continue
+
+        # Use district values from parsed data, not from URL parameters
+        offer_id = offer.get("id")
+        rows.append((record.district, record.district_parent, record.area,
+                     record.price_per_sqm, record.floor, record.rooms,
+                     str(offer_id) if offer_id is not None else None))
+    return rows
+
+
+def parse_page(
+    page_bytes: bytes,
+    matcher: Optional[DistrictMatcher] = None,
+    page: int = 1
+) -> Tuple[Optional[str], Optional[int], int, List[ListingRow], List[DetailRequest]]:
+    """
+    Decode, parse and filter a whole result page
+
+    Args:
+        page_bytes: Raw page body
+        matcher: Compiled district filter, or None for no filtering
+        page: Page number; the page count is only read from page 1
+
+    Returns:
+        (error, total_pages, offer_count, rows, pending) where error is None or
+        one of NO_NEXT_DATA, INVALID_JSON and NO_OFFERS, and pending holds the
+        detail requests of offers listed without an area
+    """
+    next_data = find_next_data(page_bytes)
+    if next_data is None:
+        return NO_NEXT_DATA, None, 0, [], []
+
+    try:
+        data = json.loads(next_data)
+    except json.JSONDecodeError as e:
+        logging.error(f"Failed to parse JSON data: {str(e)}")
+        return INVALID_JSON, None, 0, [], []
+
+    total_pages = count_pages(page_bytes, data) if page == 1 else None
+    offers = extract_offers(data, html=page_bytes)
+    if not offers:
+        return NO_OFFERS, total_pages, 0, [], []
+
+    pending = []
+    try:
+        rows = offers_to_rows(offers, matcher, pending)
+    except KeyError as e:
+        logging.error(f"Failed to parse JSON data: {str(e)}")
+        return INVALID_JSON, total_pages, len(offers), [], []
+    return None, total_pages, len(offers), rows, pending
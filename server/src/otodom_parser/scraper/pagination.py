@@ -2,26 +2,88 @@
 Module for controlling pagination logic in the scraper
 """
 import logging
-from typing import Optional, Tuple, Dict, Any
+import math
+from typing import Optional, Tuple, Dict, Any, List
 
+# Results per page when the page does not say
+LISTINGS_PER_PAGE = 36
 
-def should_continue_pagination(city: str, district: str, page: int, inserted_rows: int, max_filtered_pages: dict) -> bool:
+# Where the search results sit in __NEXT_DATA__, same layouts as extract_offers
+_SEARCH_ADS_PATHS = (("props", "pageProps", "adSearchResult", "searchAds"),
+                     ("props", "pageProps", "data", "searchAds"))
+
+
+def find_pagination(next_json: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Read the ``searchAds.pagination`` block of the page JSON
+
+    Args:
+        next_json: Parsed __NEXT_DATA__ payload
+
+    Returns:
+        Dict with totalItems, totalPages, itemsPerPage... or None if the page has none
+    """
+    for path in _SEARCH_ADS_PATHS:
+        node = next_json
+        for key in path:
+            node = node.get(key) if isinstance(node, dict) else None
+        pagination = node.get("pagination") if isinstance(node, dict) else None
+        if isinstance(pagination, dict):
+            return pagination
+    return None
+
+
+def total_pages_from_pagination(pagination: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Number of result pages from the pagination block, None if it has no usable count"""
+    if not pagination:
+        return None
+    if isinstance(pagination.get("totalPages"), int):
+        return pagination["totalPages"]
+    total_items = pagination.get("totalItems")
+    if isinstance(total_items, int):
+        per_page = pagination.get("itemsPerPage") or LISTINGS_PER_PAGE
+        return math.ceil(total_items / per_page)
+    return None
+
+
+def plan_pages(total_pages: int, max_pages: Optional[int] = None, last_available: Optional[int] = None) -> List[int]:
+    """
+    Pages 2..N to fetch once page 1 has reported the page count
+
+    Args:
+        total_pages: Page count announced on page 1
+        max_pages: --max-pages limit, or None
+        last_available: Highest page that can be fetched at all (e.g. in a replay source), or None
+
+    Returns:
+        Page numbers to dispatch, in order
+    """
+    last_page = total_pages
+    if max_pages:
+        last_page = min(last_page, max_pages)
+    if last_available is not None:
+        last_page = min(last_page, last_available)
+    return list(range(2, last_page + 1))
+
+
+def should_continue_pagination(city: str, district: str, page: int, offer_count: int, max_filtered_pages: dict) -> bool:
     """
     Determine if scraper should continue to the next page
-    
+
     Args:
         city: Current city being scraped
         district: Current district being scraped
         page: Current page number
-        inserted_rows: Number of rows inserted from the current page
+        offer_count: Number of offers on the current page, before any filtering
         max_filtered_pages: Dictionary containing max page numbers per city-district
-        
+
     Returns:
         True if scraper should continue to the next page, False otherwise
     """
     key = f"{city}-{district}"
-    if inserted_rows == 0:
+    # Offers that were filtered out still mean there are results, so only an empty page ends them
+    if not offer_count:
         return False
     if key in max_filtered_pages and page >= max_filtered_pages[key]:
         return False
-    return True
\ No newline at end of file
+    return True
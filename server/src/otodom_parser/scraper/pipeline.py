@@ -0,0 +1,183 @@
+"""
+Module for running page work through threaded stages connected by bounded queues
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+_STOP = object()
+
+
+class Stage:
+    """A named step of the pipeline handled by its own pool of worker threads"""
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], workers: int = 1):
+        """
+        Initialize the stage
+
+        Args:
+            name: Stage name used in metrics and thread names
+            handler: Function turning an input item into the item passed to the next stage
+            workers: Number of threads running the handler
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+
+
+class _StageState:
+    """Inbox, threads and counters of a running stage"""
+
+    def __init__(self, stage: Stage, queue_size: int):
+        self.stage = stage
+        self.inbox: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.running = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+
+    def put(self, job):
+        """Enqueue a job, blocking while the inbox is full, and return the seconds spent waiting"""
+        start = time.perf_counter()
+        self.inbox.put(job)
+        waited = time.perf_counter() - start
+        depth = self.inbox.qsize()
+        with self.lock:
+            self.max_depth = max(self.max_depth, depth)
+        return waited
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues.
+
+    Items submitted with ``submit`` flow through every stage in order; each
+    stage runs its handler on its own worker threads, so a slow stage (e.g.
+    the network) overlaps with the others instead of adding up. Queues are
+    bounded by ``queue_size``: when a stage falls behind, upstream workers
+    block on ``put`` (backpressure) rather than buffering unbounded work.
+
+    ``submit`` returns a Future resolved with the value returned by the last
+    stage, or with the exception raised by any stage.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 16):
+        """
+        Initialize the pipeline
+
+        Args:
+            stages: Stages in processing order
+            queue_size: Capacity of the queue in front of each stage
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self._states = [_StageState(stage, max(1, queue_size)) for stage in stages]
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+
+    def start(self):
+        """Start the worker threads of every stage"""
+        self._started_at = time.perf_counter()
+        for index, state in enumerate(self._states):
+            state.running = state.stage.workers
+            for n in range(state.stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,),
+                                          name=f"pipeline-{state.stage.name}-{n}", daemon=True)
+                state.threads.append(thread)
+                thread.start()
+
+    def submit(self, item) -> Future:
+        """Feed an item into the first stage, blocking while its queue is full"""
+        future: Future = Future()
+        self._states[0].put((item, future))
+        return future
+
+    def _work(self, index: int):
+        state = self._states[index]
+        downstream = self._states[index + 1] if index + 1 < len(self._states) else None
+        while True:
+            job = state.inbox.get()
+            if job is _STOP:
+                break
+            item, future = job
+            start = time.perf_counter()
+            try:
+                result = state.stage.handler(item)
+            except Exception as e:
+                logging.error(f"Pipeline stage {state.stage.name} failed: {str(e)}")
+                with state.lock:
+                    state.failed += 1
+                    state.busy_seconds += time.perf_counter() - start
+                future.set_exception(e)
+                continue
+            with state.lock:
+                state.processed += 1
+                state.busy_seconds += time.perf_counter() - start
+            if downstream is None:
+                future.set_result(result)
+            else:
+                waited = downstream.put((result, future))
+                with state.lock:
+                    state.blocked_seconds += waited
+
+        # The last worker of a stage to stop passes the shutdown on to the next stage
+        with state.lock:
+            state.running -= 1
+            last = state.running == 0
+        if last and downstream is not None:
+            for _ in range(downstream.stage.workers):
+                downstream.inbox.put(_STOP)
+
+    def close(self):
+        """Let every submitted item finish, then stop the workers"""
+        if self._started_at is None or self._stopped_at is not None:
+            return
+        for _ in range(self._states[0].stage.workers):
+            self._states[0].inbox.put(_STOP)
+        for state in self._states:
+            for thread in state.threads:
+                thread.join()
+        self._stopped_at = time.perf_counter()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-stage throughput and queue metrics
+
+        Returns:
+            Mapping of stage name to processed/failed counts, items per second,
+            busy percentage of its workers, seconds blocked on a full downstream
+            queue, and current and maximum depth of its input queue
+        """
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._stopped_at or time.perf_counter()) - self._started_at
+        metrics = {}
+        for state in self._states:
+            with state.lock:
+                capacity = elapsed * state.stage.workers
+                metrics[state.stage.name] = {
+                    "workers": state.stage.workers,
+                    "processed": state.processed,
+                    "failed": state.failed,
+                    "items_per_s": round(state.processed / elapsed, 2) if elapsed else 0.0,
+                    "busy_pct": round(100 * state.busy_seconds / capacity, 1) if capacity else 0.0,
+                    "blocked_s": round(state.blocked_seconds, 3),
+                    "queue_depth": state.inbox.qsize(),
+                    "max_queue_depth": state.max_depth,
+                }
+        return metrics
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
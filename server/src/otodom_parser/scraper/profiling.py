@@ -0,0 +1,251 @@
+"""
+Module with timing spans for the scraper hot paths and an optional cProfile
+of every scraper thread
+"""
+import cProfile
+import logging
+import pstats
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Span durations are counted in power-of-two microsecond buckets: bucket i holds
+# durations below 2**i microseconds, the last one everything slower (~36 min)
+HISTOGRAM_BUCKETS = 32
+
+# From Python 3.12 cProfile runs on sys.monitoring: a single profile sees every
+# thread, and a second one cannot be enabled while it is on
+SHARED_PROFILE = sys.version_info >= (3, 12)
+
+
+class _NullSpan:
+    """Span handed out while profiling is off; entering and leaving it does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_profiler", "_name", "_start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class SpanStats:
+    """Count, total, maximum and histogram of the durations of one span"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total_s += seconds
+        if seconds > self.max_s:
+            self.max_s = seconds
+        self.buckets[min(int(seconds * 1_000_000).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, p: float) -> float:
+        """Upper bound in seconds of the bucket holding the p-th percentile, capped at the maximum"""
+        rank = max(1, -(-p * self.count // 100))
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(2 ** i / 1_000_000, self.max_s)
+        return self.max_s
+
+
+class _ThreadProfiles:
+    """cProfile of the calling thread and of every thread started while it runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+
+    def start(self):
+        if SHARED_PROFILE:
+            try:
+                self._start_thread()
+            except ValueError as e:
+                # Another profiler, e.g. a coverage tool, already owns sys.monitoring
+                logging.error(f"Cannot start cProfile: {str(e)}")
+                self._profiles = []
+            return
+        # Before 3.12 every thread needs a profile of its own
+        threading.setprofile(self._start_thread)
+        self._start_thread()
+
+    def _start_thread(self, *args):
+        # Enabling the profile replaces this hook in the new thread
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def stop(self) -> Optional[pstats.Stats]:
+        if not SHARED_PROFILE:
+            threading.setprofile(None)
+        with self._lock:
+            profiles, self._profiles = self._profiles, []
+        if not profiles:
+            return None
+        profiles[0].disable()
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+class Profiler:
+    """
+    Aggregates timing spans of the scraper.
+
+    ``span`` returns a shared no-op context manager while the profiler is off,
+    so instrumented code only pays an attribute check and a call. Spans may
+    be recorded from any thread; their totals add up thread time, which can
+    exceed the wall time of a run.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._spans: Dict[str, SpanStats] = {}
+        self._started = None
+        self._wall_s = 0.0
+        self._thread_profiles = None
+        self.pstats: Optional[pstats.Stats] = None
+
+    def span(self, name: str):
+        """
+        Context manager timing the enclosed block under ``name``
+
+        Args:
+            name: Span name, dotted by stage, e.g. "decode.json_loads"
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float):
+        """Add one duration to the span ``name``"""
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = SpanStats()
+            stats.add(seconds)
+
+    def start(self, cprofile: bool = False):
+        """
+        Reset the spans and start recording
+
+        Args:
+            cprofile: Also run cProfile in this thread and in every thread started afterwards
+        """
+        with self._lock:
+            self._spans = {}
+        self.pstats = None
+        self._started = time.perf_counter()
+        self._wall_s = 0.0
+        if cprofile:
+            self._thread_profiles = _ThreadProfiles()
+            self._thread_profiles.start()
+        self.enabled = True
+
+    def stop(self):
+        """Stop recording, keeping the spans and the cProfile statistics for the summary"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._wall_s = time.perf_counter() - self._started
+        if self._thread_profiles:
+            self.pstats = self._thread_profiles.stop()
+            self._thread_profiles = None
+
+    def summary(self) -> List[dict]:
+        """
+        Aggregated spans, slowest total first
+
+        Returns:
+            One dict per span with name, count, total_s, pct_wall, mean_ms,
+            p50_ms, p95_ms and max_ms; percentiles are histogram bucket bounds
+        """
+        wall_s = self._wall_s or (time.perf_counter() - self._started if self._started else 0.0)
+        with self._lock:
+            spans = list(self._spans.items())
+        rows = []
+        for name, stats in spans:
+            rows.append({
+                "name": name,
+                "count": stats.count,
+                "total_s": round(stats.total_s, 3),
+                "pct_wall": round(100 * stats.total_s / wall_s, 1) if wall_s else 0.0,
+                "mean_ms": round(stats.total_s / stats.count * 1000, 3),
+                "p50_ms": round(stats.percentile(50) * 1000, 3),
+                "p95_ms": round(stats.percentile(95) * 1000, 3),
+                "max_ms": round(stats.max_s * 1000, 3),
+            })
+        rows.sort(key=lambda row: row["total_s"], reverse=True)
+        return rows
+
+    def format_summary(self) -> str:
+        """Summary as a plain-text table with right-aligned columns"""
+        headers = ["span", "count", "total s", "% wall", "mean ms", "p50 ms", "p95 ms", "max ms"]
+        keys = ["name", "count", "total_s", "pct_wall", "mean_ms", "p50_ms", "p95_ms", "max_ms"]
+        cells = [headers] + [[str(row[key]) for key in keys] for row in self.summary()]
+        widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+        lines = [f"Wall time {self._wall_s:.3f}s, span totals are summed over threads"]
+        for idx, row in enumerate(cells):
+            lines.append("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+            if idx == 0:
+                lines.append("  ".join("-" * width for width in widths))
+        return "\n".join(lines)
+
+    def dump_stats(self, path: Union[str, Path]) -> bool:
+        """
+        Write the cProfile statistics of the last run to a pstats file
+
+        Args:
+            path: Output file, readable with pstats or snakeviz
+
+        Returns:
+            True if a file was written
+        """
+        if self.pstats is None:
+            return False
+        try:
+            self.pstats.dump_stats(str(path))
+        except OSError as e:
+            logging.error(f"Failed to write profile to {path}: {str(e)}")
+            return False
+        return True
+
+
+# Shared by every module of the scraper
+PROFILER = Profiler()
+
+
+def span(name: str):
+    """Time the enclosed block under ``name`` while PROFILER is enabled"""
+    return PROFILER.span(name)
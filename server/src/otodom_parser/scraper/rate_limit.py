@@ -0,0 +1,68 @@
+"""
+Module for per-host request budgeting shared by all scraper worker threads
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from urllib.parse import urlsplit
+
+
+class _HostBudget:
+    """Concurrency slots and request spacing for a single host"""
+
+    def __init__(self, requests_per_second: float, max_concurrency: int):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def reserve(self) -> float:
+        """Reserve the next start time and return how long the caller has to wait"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+            return start - now
+
+
+class HostRateLimiter:
+    """
+    Thread-safe rate limiter enforcing a requests-per-second and a concurrency
+    budget per host.
+
+    Every request must run inside ``limiter.slot(url)``. Start times are spaced
+    evenly at ``1 / requests_per_second`` and at most ``max_concurrency``
+    requests to the same host are in flight at any moment.
+    """
+
+    def __init__(self, requests_per_second: float = 2.0, max_concurrency: int = 4):
+        """
+        Initialize the rate limiter
+
+        Args:
+            requests_per_second: Maximum request start rate per host, 0 disables spacing
+            max_concurrency: Maximum number of in-flight requests per host
+        """
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self._hosts: Dict[str, _HostBudget] = {}
+        self._lock = threading.Lock()
+
+    def _budget(self, host: str) -> _HostBudget:
+        with self._lock:
+            budget = self._hosts.get(host)
+            if budget is None:
+                budget = _HostBudget(self.requests_per_second, self.max_concurrency)
+                self._hosts[host] = budget
+            return budget
+
+    @contextmanager
+    def slot(self, url: str):
+        """Block until a request to the host of ``url`` fits into its budget"""
+        budget = self._budget(urlsplit(url).netloc)
+        with budget.slots:
+            delay = budget.reserve()
+            if delay > 0:
+                time.sleep(delay)
+            yield
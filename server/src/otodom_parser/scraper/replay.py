@@ -0,0 +1,100 @@
+"""
+Module serving saved result pages for offline replay of a scrape
+"""
+import re
+import tarfile
+import threading
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .page_archive import INDEX_FILE, PageArchive
+
+# Pages dumped by --debug are named {city}_{district}_{page}.html, district may be empty
+PAGE_FILE_NAME = re.compile(r"^(?P<city>[^_/]+)_(?P<district>[^/]*)_(?P<page>\d+)\.html$")
+
+PageKey = Tuple[str, str, int]
+
+
+class ReplaySource:
+    """
+    Saved result pages read from a directory, a tar/zip archive of one, or a
+    PageArchive directory (the newest capture of each page is replayed).
+
+    Pages are looked up by (city, district, page). Archive members are read
+    under a lock because tarfile and zipfile handles are not thread-safe.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Index the saved pages
+
+        Args:
+            path: Directory with ``{city}_{district}_{page}.html`` files, a
+                .tar/.tar.gz/.tgz/.tar.xz/.zip archive containing them, or a
+                PageArchive directory with an index.jsonl
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._archive = None
+        self._entries: Dict[PageKey, str] = {}
+
+        if (self.path / INDEX_FILE).is_file():
+            self._archive = PageArchive(self.path)
+            self._entries = {key: "" for key in self._archive.keys()}
+            if not self._entries:
+                raise ValueError(f"Page archive {self.path} is empty")
+            return
+        if self.path.is_dir():
+            names = [p.name for p in self.path.iterdir() if p.is_file()]
+        elif zipfile.is_zipfile(self.path):
+            self._archive = zipfile.ZipFile(self.path)
+            names = self._archive.namelist()
+        elif tarfile.is_tarfile(self.path):
+            self._archive = tarfile.open(self.path, "r:*")
+            names = [member.name for member in self._archive.getmembers() if member.isfile()]
+        else:
+            raise ValueError(f"Replay source {self.path} is neither a directory nor a tar/zip archive")
+
+        for name in names:
+            match = PAGE_FILE_NAME.match(Path(name).name)
+            if match:
+                key = (match.group("city"), match.group("district"), int(match.group("page")))
+                self._entries[key] = name
+        if not self._entries:
+            raise ValueError(f"No saved pages named {{city}}_{{district}}_{{page}}.html found in {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cities(self) -> List[str]:
+        """Cities that have saved pages, sorted"""
+        return sorted({city for city, _, _ in self._entries})
+
+    def districts(self, city: str) -> List[str]:
+        """Districts of a city that have saved pages, sorted ("" is the whole city)"""
+        return sorted({district for c, district, _ in self._entries if c == city})
+
+    def last_page(self, city: str, district: str) -> int:
+        """Highest saved page number of a city/district, 0 if there is none"""
+        return max((page for c, d, page in self._entries if c == city and d == district), default=0)
+
+    def read(self, city: str, district: str, page: int) -> Optional[bytes]:
+        """Return the saved page body, or None if the page was not saved"""
+        name = self._entries.get((city, district, page))
+        if name is None:
+            return None
+        if isinstance(self._archive, PageArchive):
+            return self._archive.read(city, district, page)
+        if self._archive is None:
+            return (self.path / name).read_bytes()
+        with self._lock:
+            if isinstance(self._archive, zipfile.ZipFile):
+                return self._archive.read(name)
+            return self._archive.extractfile(name).read()
+
+    def close(self):
+        """Close the archive, if any"""
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
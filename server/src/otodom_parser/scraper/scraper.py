@@ -3,29 +3,68 @@ Main scraper module with the OtodomScraper class to orchestrate the scraping pro
 """
 import json
 import logging
-import re
+import threading
 import time
 import traceback
-from bs4 import BeautifulSoup
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Tuple, Dict, Any, Optional, Callable
 
 # Import from our modular components
-from .offer_parser import parse_offer_json
-from .filters import should_skip_offer
-from .storage import insert_listing, clear_listings
-from .pagination import should_continue_pagination
+from .storage import ListingWriter, clear_listings
+from .pagination import plan_pages, should_continue_pagination
+from .rate_limit import HostRateLimiter
+from .http_session import ScraperSession
+from .http_cache import PageCache, body_digest
+from .page_extract import find_next_data, extract_offers
+from .page_parser import count_pages, offers_to_rows, parse_page, NO_NEXT_DATA, NO_OFFERS, INVALID_JSON
+from .pipeline import Pipeline, Stage
+from .filters import DistrictMatcher
+from .district_resolver import DistrictResolver
+from .replay import ReplaySource
+from .page_archive import PageArchive
+from .enrichment import DetailEnricher
+from .profiling import PROFILER, span
 
 # Import database setup function
 from ..db import setup_database
 
 # Constants
 CITIES = ["warszawa", "krakow", "lodz", "wroclaw", "poznan", "gdansk", "szczecin", "bydgoszcz", "lublin", "bialystok"]
+# Seconds the detail enrichment may keep running once the listing crawl is done
+ENRICHMENT_DRAIN_S = 120
+
+
+class PageWork:
+    """State of one result page as it moves through the page stages
+    
+    A stage that settles the page early (failed request, unchanged page,
+    no offers) sets ``outcome``; later stages then pass the page through.
+    ``outcome`` is the ``(has_next_page, offer_count)`` tuple of scrape_page.
+    """
+
+    def __init__(self, city, district, page):
+        self.city = city
+        self.district = district
+        self.page = page
+        self.url = None
+        self.response = None
+        self.cache_entry = None
+        self.page_bytes = None
+        self.offers = []
+        self.offer_count = 0
+        self.rows = None
+        self.outcome = None
 
 
 class OtodomScraper:
     def __init__(self, debug=False, city_filter=None, district_filter=None, district_mode="prefix",
-                 room_filter=None, max_pages=None, preserve=False, days_filter=1):
+                 room_filter=None, max_pages=None, preserve=False, days_filter=1,
+                 concurrency=4, requests_per_second=2.0, connect_timeout=5.0, read_timeout=15.0,
+                 http_cache=True, cache_max_mb=256, stage_workers=None, queue_size=16, parse_workers=0,
+                 replay=None, archive_dir=None, incremental=False, enrich_workers=2, enrich_rps=0.5,
+                 profile=False, profile_output=None, full_refresh=False):
         """
         Initialize the OtodomScraper
         
@@ -38,12 +77,43 @@ class OtodomScraper:
             max_pages: Maximum number of pages to scrape per city/district
             preserve: Whether to preserve existing listings in database
             days_filter: Only scrape listings from the last X days
+            concurrency: Maximum number of requests in flight per host
+            requests_per_second: Maximum request rate per host
+            connect_timeout: Seconds to wait for a connection to otodom.pl
+            read_timeout: Seconds to wait for a response body
+            http_cache: Whether to cache result pages and revalidate them with conditional requests
+            cache_max_mb: Size limit of the on-disk page cache in megabytes
+            stage_workers: Worker threads per page stage, e.g. {"parse": 2}; fetch defaults to concurrency
+            queue_size: Capacity of the bounded queue in front of each page stage
+            parse_workers: Worker processes decoding and parsing pages, 0 parses in threads
+            replay: Directory or tar/zip archive of saved pages to scrape instead of the network
+            archive_dir: Directory of the compressed raw page archive; debug mode defaults to debug/archive
+            incremental: Keep the stored listings, update only new or changed offers and stop at the first
+                page without them; offers gone from a completely scraped city are marked inactive
+            enrich_workers: Threads fetching detail pages of offers listed without an area, 0 disables it
+            enrich_rps: Request rate of the detail page fetches, separate from requests_per_second
+            profile: Time the hot paths of the run and log a summary table at the end
+            profile_output: With profile, also cProfile every scraper thread and write the stats to this pstats file
+            full_refresh: With incremental, walk every result page, including known and unchanged ones,
+                so that offers no longer listed can be marked inactive
         """
+        self.profile = profile or profile_output is not None
+        self.profile_output = profile_output
         self.debug = debug
-        self.preserve = preserve
+        self.replay_source = ReplaySource(replay) if replay else None
+        self.incremental = incremental
+        self.full_refresh = incremental and full_refresh
+        self.preserve = preserve or incremental
+        # (city, district) scopes whose results were not walked to the end in this run
+        self._incomplete_scopes = set()
+        self._run_started = None
         # Define debug directory relative to script location
         self.debug_dir = Path(__file__).parent.parent / "debug"
         self.debug_dir.mkdir(exist_ok=True)
+        # Replayed pages are already on disk, so they are never archived again
+        if archive_dir is None and debug:
+            archive_dir = self.debug_dir / "archive"
+        self.page_archive = PageArchive(archive_dir) if archive_dir and self.replay_source is None else None
         self.status = "Ready"
         self.progress = 0
         self.error_occurred = False
@@ -55,111 +125,165 @@ class OtodomScraper:
             'Accept-Language': 'pl-PL,pl;q=0.9,en-US;q=0.8,en;q=0.7',
         }
         self.base_url = "https://www.otodom.pl/pl/oferty/sprzedaz/mieszkanie"
+        # Search URLs of locations are the location ids from reverseGeocoding
+        self.search_url = "https://www.otodom.pl/pl/wyniki/sprzedaz/mieszkanie"
         self.districts_cache = {}
         self.city_filter = city_filter
         self.district_filter = district_filter if district_filter else ["all"]
         self.district_mode = district_mode.lower()  # "exact" or "prefix"
+        # Compiled once instead of re-lowercasing every filter for every offer
+        self.district_matcher = DistrictMatcher(self.district_filter, self.district_mode)
+        self.district_resolver = DistrictResolver(self.debug_dir / "districts.json")
         self.room_filter = room_filter
         self.max_pages = max_pages
-        setup_database()
+        self.concurrency = max(1, int(concurrency))
+        self.rate_limiter = HostRateLimiter(requests_per_second, self.concurrency)
+        # The detail enricher shares the session, so its workers need connections of their own
+        self.session = ScraperSession(self.headers, pool_size=self.concurrency + max(0, int(enrich_workers)),
+                                      connect_timeout=connect_timeout, read_timeout=read_timeout)
+        # Guards status, progress and per-city state; the progress callback runs after it is released
+        self._status_lock = threading.Lock()
+        self._city_progress = {}
+        self._city_started = {}
+        self._callback = None
+        # Pages and offers that reached the write stage, for the throughput metrics
+        self._counter_lock = threading.Lock()
+        self.counters = {"pages": 0, "offers": 0}
+        self._started_at = None
+        self.stage_workers = {"fetch": self.concurrency, "decode": 1, "parse": 1, "write": 1}
+        self.stage_workers.update(stage_workers or {})
+        self.queue_size = queue_size
+        self.parse_workers = max(0, int(parse_workers))
+        if self.parse_workers:
+            # Each decode thread waits on one page in the process pool
+            self.stage_workers["decode"] = max(self.stage_workers["decode"], self.parse_workers)
+        self._parse_pool = None
+        self._pipeline = None
+        self.pipeline_metrics = {}
+        self.writer = ListingWriter()
+        # Saved pages have no detail pages to go with them
+        self.enricher = None
+        if enrich_workers and self.replay_source is None:
+            self.enricher = DetailEnricher(self.session.get, self._write_detail_record,
+                                           workers=enrich_workers, requests_per_second=enrich_rps)
+        use_cache = http_cache and self.replay_source is None
+        self.page_cache = PageCache(self.debug_dir / "cache", max_bytes=int(cache_max_mb * 1024 * 1024)) if use_cache else None
 
     def get_districts(self, city):
         """Get list of districts for a city"""
         if city in self.districts_cache:
             return self.districts_cache[city]
         
-        # For now, just return empty string to scrape the whole city
-        # This can be enhanced in the future to fetch actual districts
-        self.districts_cache[city] = [""]
+        if self.replay_source:
+            self.districts_cache[city] = self.replay_source.districts(city)
+            return self.districts_cache[city]
+        
+        districts = None
+        if not self.district_matcher.match_all:
+            # Request only the matching district locations learned from earlier scrapes
+            districts = self.district_resolver.resolve(city, self.district_filter, self.district_mode)
+            if districts:
+                logging.info(f"District filter for {city} resolved to {', '.join(districts)}")
+            else:
+                logging.info(f"District filter for {city} does not match known districts, "
+                             f"scraping the whole city and filtering offers")
+        self.districts_cache[city] = districts or [""]
         return self.districts_cache[city]
 
-    def _make_request(self, url, max_retries=3):
-        """Make HTTP request with retry logic"""
-        import requests
-        
+    def get_status(self):
+        """Get the current scraper state together with HTTP session metrics"""
+        with self._status_lock:
+            return {
+                "status": self.status,
+                "progress": self.progress,
+                "error": self.error_occurred,
+                "http": self.session.stats.snapshot(),
+                "cache": self.page_cache.stats() if self.page_cache else None,
+                "pipeline": self._pipeline.metrics() if self._pipeline else self.pipeline_metrics,
+                "enrichment": self.enricher.stats() if self.enricher else None,
+            }
+
+    def get_metrics(self):
+        """
+        Throughput counters, HTTP latency and per-city progress for the event channel
+
+        Returns:
+            Dict with status, progress, error, elapsed_s, counters (pages, offers,
+            rows_written, rows_unchanged), http, cities ({city: {progress, eta_s}})
+            and enrichment
+        """
+        now = time.monotonic()
+        with self._status_lock:
+            status, progress, error = self.status, self.progress, self.error_occurred
+            cities = {}
+            for city, fraction in self._city_progress.items():
+                started = self._city_started.get(city)
+                eta_s = None
+                if fraction >= 1:
+                    eta_s = 0.0
+                elif started is not None and fraction > 0:
+                    # Linear extrapolation of the time the city has taken so far
+                    eta_s = round((now - started) * (1 - fraction) / fraction, 1)
+                cities[city] = {"progress": round(fraction * 100, 1), "eta_s": eta_s}
+        with self._counter_lock:
+            counters = dict(self.counters)
+        counters["rows_written"] = self.writer.rows_written
+        counters["rows_unchanged"] = self.writer.rows_unchanged
+        return {
+            "status": status,
+            "progress": round(progress, 1),
+            "error": error,
+            "elapsed_s": round(now - self._started_at, 1) if self._started_at else 0.0,
+            "counters": counters,
+            "http": self.session.stats.snapshot(),
+            "cities": cities,
+            "enrichment": self.enricher.stats() if self.enricher else None,
+        }
+
+    def _make_request(self, url, max_retries=3, headers=None):
+        """Make HTTP request with retry logic, a 304 reply to a conditional request counts as success"""
         retry_delays = [2, 4, 8]  # Backoff strategy
         
         for attempt in range(max_retries):
             try:
-                response = requests.get(url, headers=self.headers, timeout=10)
-                if response.status_code == 200:
+                with span("fetch.request"), self.rate_limiter.slot(url):
+                    response = self.session.get(url, headers=headers)
+                if response.status_code == 200 or (headers and response.status_code == 304):
                     return response
                 
                 logging.warning(f"Request to {url} failed with status code {response.status_code}, attempt {attempt+1}/{max_retries}")
                 
                 if attempt < max_retries - 1:
+                    self.session.stats.record_retry()
                     time.sleep(retry_delays[attempt])
             except Exception as e:
                 logging.warning(f"Request to {url} failed: {str(e)}, attempt {attempt+1}/{max_retries}")
                 if attempt < max_retries - 1:
+                    self.session.stats.record_retry()
                     time.sleep(retry_delays[attempt])
         
         logging.error(f"Failed to retrieve {url} after {max_retries} attempts")
         self.error_occurred = True
         return None
 
-    def extract_offers(self, next_json: dict, city=None, page=None, soup=None) -> list[dict]:
-        """Extract listing offers from JSON data"""
-        try:
-            # Strategy 1: Try extracting from adSearchResult.searchAds.items
-            if ("props" in next_json and 
-                "pageProps" in next_json["props"] and 
-                "adSearchResult" in next_json["props"]["pageProps"] and 
-                "searchAds" in next_json["props"]["pageProps"]["adSearchResult"] and
-                "items" in next_json["props"]["pageProps"]["adSearchResult"]["searchAds"]):
-                
-                return next_json["props"]["pageProps"]["adSearchResult"]["searchAds"]["items"]
-                
-            # Strategy 2: Try extracting from __NEXT_DATA__ with different structure
-            if ("props" in next_json and 
-                "pageProps" in next_json["props"] and 
-                "data" in next_json["props"]["pageProps"] and 
-                "searchAds" in next_json["props"]["pageProps"]["data"] and
-                "items" in next_json["props"]["pageProps"]["data"]["searchAds"]):
-                
-                return next_json["props"]["pageProps"]["data"]["searchAds"]["items"]
-            
-            # Strategy 3: Legacy OtoDom site format with embedded JS object
-            if soup:
-                data_container_script = None
-                
-                # Look for script with window.__INITIAL_STATE__
-                for script in soup.find_all("script"):
-                    if script.string and "window.__INITIAL_STATE__" in script.string:
-                        data_container_script = script
-                        break
-                
-                if data_container_script:
-                    try:
-                        # Extract JSON part from the JS code
-                        js_text = data_container_script.string
-                        json_start = js_text.find('{')
-                        json_end = js_text.rfind('}') + 1
-                        json_text = js_text[json_start:json_end]
-                        
-                        data = json.loads(json_text)
-                        
-                        if "listing" in data and "ads" in data["listing"]:
-                            return data["listing"]["ads"]
-                    except Exception as e:
-                        logging.error(f"Failed to extract from window.__INITIAL_STATE__: {str(e)}")
-            
-            # No valid data structure found
-            logging.warning("Could not extract offers from JSON data - unknown structure")
-            return []
-            
-        except Exception as e:
-            logging.error(f"Failed to extract offers from JSON: {str(e)}")
-            return []
+    def extract_offers(self, next_json: dict, city=None, page=None, soup=None, html=None) -> list[dict]:
+        """Extract listing offers from JSON data, see page_extract.extract_offers"""
+        return extract_offers(next_json, soup=soup, html=html)
 
-    def scrape_page(self, city, district, page=1):
-        """Scrape a single page of listings"""
+    def _page_url(self, city, district, page):
+        """Build the search URL of one result page"""
         url_path = f"{self.base_url}/{city}"
-        if district:
+        location = self.district_resolver.location_path(city, district) if district else None
+        if location:
+            url_path = f"{self.search_url}/{location}"
+        elif district:
             url_path += f"/{district}"
         
         # Start with base query parameters
         params = [f"page={page}", "viewType=list", f"daysSinceCreated={self.days_filter}"]
+        if self.incremental:
+            # Newest first, so that the first page of known offers ends the new ones
+            params += ["by=LATEST", "direction=DESC"]
         
         # Add room filter parameters if specified
         if self.room_filter:
@@ -167,12 +291,39 @@ class OtodomScraper:
             params.append(f"roomsNumber=%5B{room_params}%5D")
             
         # Join all parameters
-        url = f"{url_path}?{'&'.join(params)}"
+        return f"{url_path}?{'&'.join(params)}"
+
+    def page_stages(self):
+        """The stages a result page goes through, in order, as (name, handler) pairs"""
+        return [
+            ("fetch", self._fetch_stage),
+            ("decode", self._decode_stage),
+            ("parse", self._parse_stage),
+            ("write", self._write_stage),
+        ]
+
+    def scrape_page(self, city, district, page=1):
+        """Scrape a single page of listings, running every stage inline"""
+        work = PageWork(city, district, page)
+        for _, handler in self.page_stages():
+            work = handler(work)
+        return work.outcome
+
+    def _fetch_stage(self, work):
+        """Download a page, revalidating it against the page cache"""
+        if self.replay_source:
+            return self._replay_fetch(work)
+        city, district, page = work.city, work.district, work.page
+        url = work.url = self._page_url(city, district, page)
+        
+        cache_entry = work.cache_entry = self.page_cache.lookup(url) if self.page_cache else None
+        conditional_headers = self.page_cache.conditional_headers(cache_entry) if self.page_cache else None
         
         logging.debug(f"Requesting page {page} with filter URL: {url}")
-        response = self._make_request(url)
+        response = self._make_request(url, headers=conditional_headers or None)
         if not response:
-            return False, None
+            work.outcome = (False, None)
+            return work
         
         # Check if we were redirected and log the final URL
         final_url = response.url
@@ -190,176 +341,459 @@ class OtodomScraper:
                 logging.debug(f"Retrying with corrected URL: {final_url}")
                 response = self._make_request(final_url)
                 if not response:
-                    return False, None
+                    work.outcome = (False, None)
+                    return work
+        work.response = response
         
         logging.debug(f"GET {response.url} -> {response.status_code} {len(response.content)}B")
         
-        # Parse HTML to find the JSON data
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # Compare against the cached copy: a 304 or an identical body means the page is unchanged
+        page_unchanged = False
+        if response.status_code == 304 and cache_entry:
+            page_bytes = self.page_cache.read_body(url)
+            if page_bytes is None:
+                work.outcome = (False, None)
+                return work
+            page_unchanged = True
+            self.page_cache.record_hit(url, not_modified=True)
+        else:
+            page_bytes = response.content
+            if cache_entry and body_digest(page_bytes) == cache_entry["digest"]:
+                page_unchanged = True
+                self.page_cache.record_hit(url)
+            elif self.page_cache:
+                self.page_cache.record_miss()
+        
+        # Listings from the previous run are still in the database only when preserving,
+        # otherwise the unchanged page has to be parsed and inserted again
+        # A full refresh parses it anyway, so that its offers count as seen in this run
+        if page_unchanged and self.preserve and not self.full_refresh:
+            work.outcome = self._replay_cached_page(city, district, page, cache_entry)
+            return work
         
-        # Find the __NEXT_DATA__ script tag containing JSON data
-        data_script = soup.find("script", id="__NEXT_DATA__")
+        work.page_bytes = page_bytes
+        if self.page_archive:
+            # Only queued here; compression and disk writes happen on the archive's writer thread
+            self.page_archive.append(city, district, page, page_bytes)
+        return work
+
+    def _replay_fetch(self, work):
+        """Read a saved page instead of downloading it"""
+        work.page_bytes = self.replay_source.read(work.city, work.district, work.page)
+        if work.page_bytes is None:
+            logging.warning(f"Page {work.page} of {work.city}/{work.district} is not in the replay source")
+            work.outcome = (False, None)
+        return work
+
+    def _record_page_count(self, city, district, total_pages):
+        """Remember how many result pages page 1 of a city/district announced"""
+        if total_pages:
+            self.max_filtered_pages[f"{city}-{district}"] = total_pages
+            logging.debug(f"Found {total_pages} pages for {city}-{district}")
+
+    def _learn_districts(self, work):
+        """Remember the district locations of offers on the first live page of a whole-city scrape"""
+        # Later pages rarely add districts and scanning every full body costs a regex pass per page
+        if work.page == 1 and not work.district and self.replay_source is None:
+            added = self.district_resolver.learn(work.page_bytes)
+            if added:
+                logging.debug(f"Learned {added} new districts of {work.city}")
+
+    def _decode_stage(self, work):
+        """Slice the __NEXT_DATA__ JSON out of the raw page and pull out the offers list"""
+        if work.outcome is not None:
+            return work
+        if self._parse_pool is not None:
+            return self._decode_in_process(work)
+        city, district, page, page_bytes = work.city, work.district, work.page, work.page_bytes
+        self._learn_districts(work)
         
-        # Save response for offline analysis when in debug mode
-        if self.debug:
-            dump_file = self.debug_dir / f"{city}_{district}_{page}.html"
-            dump_file.write_bytes(response.content)
-            logging.debug(f"Saved raw page → {dump_file}")
+        # Slice the __NEXT_DATA__ JSON straight out of the raw bytes instead of building a DOM
+        with span("decode.find_next_data"):
+            next_data = find_next_data(page_bytes)
         
-        if not data_script:
+        if next_data is None:
             logging.warning(f"No __NEXT_DATA__ found for {city}/{district} page {page}")
-            return False, 0
+            work.outcome = (False, 0)
+            return work
         
         try:
             # Parse the JSON data
-            data = json.loads(data_script.string)
-            
-            # On page 1, extract pagination information from meta description
-            if page == 1:
-                html_text = str(soup)
-                # Extract the total number of listings from meta description
-                meta_match = re.search(r'Zobacz (\d+) ogłoszeń', html_text)
-                if meta_match:
-                    import math
-                    total_listings = int(meta_match.group(1))
-                    total_pages = math.ceil(total_listings / 36)  # 36 listings per page
-                    self.max_filtered_pages[f"{city}-{district}"] = total_pages
-                    logging.debug(f"Found total listings for {city}-{district}: {total_listings}, calculated {total_pages} pages")
-                else:
-                    # Fallback to the old method if meta description not found
-                    pagination_match = re.findall(r'class="pagination__page"[^>]*>(\d+)<', html_text)
-                    if pagination_match:
-                        max_page = max(map(int, pagination_match))
-                        self.max_filtered_pages[f"{city}-{district}"] = max_page
-                        logging.debug(f"Fallback: Found max page for {city}-{district}: {max_page}")
-            
-            # Extract offers list using helper function that handles different JSON structures
-            offers = self.extract_offers(data, city=city, page=page, soup=soup)
-            
-            logging.debug(f"offers_found={len(offers)}")
-            
-            if self.debug and offers:
-                # Save JSON for debugging
-                json_dump_file = self.debug_dir / f"{city}_{district}_{page}_data.json"
-                with open(json_dump_file, 'w', encoding='utf-8') as f:
-                    json.dump(offers, f, indent=2, ensure_ascii=False)
-                logging.debug(f"Saved JSON data → {json_dump_file}")
-            
-            if not offers:
-                logging.warning(f"No offers found in JSON for {city}/{district} page {page}")
-                return False, 0
-            
-            inserted_rows = 0
-            # Process each offer in the offers list
-            for offer in offers:
-                # Parse the offer to get structured data
-                listing_data = parse_offer_json(offer)
-                if listing_data:
-                    # Check if we should skip this offer based on filters
-                    if should_skip_offer(listing_data, self.district_filter, self.district_mode):
-                        continue
-                    
-                    area = listing_data['area']
-                    price_sqm = listing_data['price_per_sqm']
-                    floor = listing_data['floor']
-                    rooms = listing_data['rooms']
-                    
-                    # Skip incomplete offers
-                    if not all((area, price_sqm)):  # Floor can be 0
-                        logging.warning("Missing required field - skipping")
-                        continue
-                    
-                    # Use district values from parsed data, not from URL parameters
-                    district_sub = listing_data['district']  
-                    district_parent = listing_data['district_parent']
-                    if insert_listing(
+            with span("decode.json_loads"):
+                data = json.loads(next_data)
+        except json.JSONDecodeError as e:
+            logging.error(f"Failed to parse JSON data: {str(e)}")
+            logging.error(traceback.format_exc())
+            self.error_occurred = True
+            work.outcome = (False, 0)
+            return work
+        
+        # On page 1, extract pagination information from meta description
+        if page == 1:
+            self._record_page_count(city, district, count_pages(page_bytes, data))
+        
+        # Extract offers list using helper function that handles different JSON structures
+        with span("decode.extract_offers"):
+            offers = self.extract_offers(data, city=city, page=page, html=page_bytes)
+        
+        logging.debug(f"offers_found={len(offers)}")
+        
+        if not offers:
+            logging.warning(f"No offers found in JSON for {city}/{district} page {page}")
+            work.outcome = (False, 0)
+            return work
+        
+        work.offers = offers
+        work.offer_count = len(offers)
+        return work
+
+    def _decode_in_process(self, work):
+        """Decode, parse and filter a page in the process pool; only compact rows come back"""
+        city, district, page, page_bytes = work.city, work.district, work.page, work.page_bytes
+        self._learn_districts(work)
+        # Spans inside the worker processes are not recorded, this is the round trip
+        with span("decode.process_pool"):
+            error, total_pages, offer_count, rows, pending = self._parse_pool.submit(
+                parse_page, page_bytes, self.district_matcher, page
+            ).result()
+        if page == 1:
+            self._record_page_count(city, district, total_pages)
+        
+        if error == NO_NEXT_DATA:
+            logging.warning(f"No __NEXT_DATA__ found for {city}/{district} page {page}")
+        elif error == NO_OFFERS:
+            logging.warning(f"No offers found in JSON for {city}/{district} page {page}")
+        elif error == INVALID_JSON:
+            self.error_occurred = True
+        if error:
+            work.outcome = (False, 0)
+            return work
+        
+        work.offer_count = offer_count
+        work.rows = rows
+        self._queue_details(city, pending)
+        return work
+
+    def _parse_stage(self, work):
+        """Parse and filter the offers of a page into listing rows"""
+        # Pages decoded in a worker process already carry their rows
+        if work.outcome is not None or work.rows is not None:
+            return work
+        
+        pending = [] if self.enricher else None
+        try:
+            with span("parse.offers_to_rows"):
+                rows = offers_to_rows(work.offers, self.district_matcher, pending)
+        except KeyError as e:
+            logging.error(f"Failed to parse JSON data: {str(e)}")
+            logging.error(traceback.format_exc())
+            self.error_occurred = True
+            work.outcome = (False, 0)
+            return work
+        
+        work.rows = rows
+        self._queue_details(work.city, pending)
+        return work
+
+    def _queue_details(self, city, pending):
+        """Hand offers listed without an area to the detail enrichment, never waiting for it"""
+        if self.enricher and pending:
+            queued = self.enricher.submit(city, pending)
+            logging.debug(f"Queued {queued} of {len(pending)} offers without area for detail pages")
+
+    def _write_detail_record(self, city, request, record):
+        """Store an offer whose area came from its detail page"""
+        offer_id = request.offer.get("id")
+        self.writer.add(
+            city=city,
+            district=record.district,
+            district_parent=record.district_parent,
+            area=record.area,
+            price_per_sqm=record.price_per_sqm,
+            floor=record.floor,
+            rooms=record.rooms,
+            offer_id=str(offer_id) if offer_id is not None else None
+        )
+
+    def _close_enricher(self, timeout):
+        """Give queued detail pages up to timeout seconds to finish, keeping the final stats"""
+        if not self.enricher:
+            return
+        backlog = self.enricher.stats()["backlog"]
+        if backlog and timeout:
+            logging.info(f"Waiting up to {timeout}s for {backlog} detail pages")
+            with self._status_lock:
+                self.status = f"Enriching {backlog} offers"
+                state = (self.status, self.progress, self.error_occurred)
+            if self._callback:
+                self._callback(*state)
+        self.enricher.close(timeout)
+
+    def _write_stage(self, work):
+        """Write the rows of a page in one transaction and decide whether pagination continues"""
+        if work.outcome is not None:
+            return work
+        city, district, page = work.city, work.district, work.page
+        
+        with span("write.sqlite"):
+            if self.incremental:
+                inserted_rows, unchanged_rows = self.writer.write_page([(city,) + row for row in work.rows])
+            else:
+                for district_sub, district_parent, area, price_sqm, floor, rooms, offer_id in work.rows:
+                    self.writer.add(
                         city=city, 
                         district=district_sub, 
                         district_parent=district_parent, 
                         area=area, 
                         price_per_sqm=price_sqm, 
                         floor=floor, 
-                        rooms=rooms
-                    ):
-                        inserted_rows += 1
-            
-            if inserted_rows > 0:
-                logging.info(f"Inserted {inserted_rows} rows on page {page}")
-            
-            # Determine if we should continue to the next page
-            has_next_page = should_continue_pagination(city, district, page, inserted_rows, self.max_filtered_pages)
-            
-            return has_next_page, len(offers)
-            
-        except (json.JSONDecodeError, KeyError) as e:
-            logging.error(f"Failed to parse JSON data: {str(e)}")
-            logging.error(traceback.format_exc())
-            self.error_occurred = True
-            return False, 0
+                        rooms=rooms,
+                        offer_id=offer_id
+                    )
+                inserted_rows = len(work.rows)
+                
+                # Write the whole page in one transaction
+                self.writer.flush()
+        
+        if inserted_rows > 0:
+            logging.info(f"Inserted {inserted_rows} rows on page {page}")
+        with self._counter_lock:
+            self.counters["pages"] += 1
+            self.counters["offers"] += work.offer_count
+        
+        # Determine if we should continue to the next page
+        has_next_page = should_continue_pagination(city, district, page, work.offer_count, self.max_filtered_pages)
+        if self.incremental and not self.full_refresh and work.rows and not inserted_rows:
+            # Results are sorted newest first, so the following pages only hold known offers too
+            logging.info(f"Page {page} of {city}/{district} has only known offers ({unchanged_rows}), stopping")
+            self._incomplete_scopes.add((city, district))
+            has_next_page = False
+        
+        if self.page_cache and work.response is not None:
+            meta = {
+                "offers": work.offer_count,
+                "inserted": inserted_rows,
+                "total_pages": self.max_filtered_pages.get(f"{city}-{district}"),
+            }
+            if work.response.status_code == 304:
+                self.page_cache.update_meta(work.url, meta)
+            else:
+                self.page_cache.store(work.url, work.page_bytes, etag=work.response.headers.get("ETag"),
+                                      last_modified=work.response.headers.get("Last-Modified"), meta=meta)
+        
+        work.outcome = (has_next_page, work.offer_count)
+        return work
+
+    def _replay_cached_page(self, city, district, page, cache_entry):
+        """Reuse the recorded outcome of a page that has not changed since the last scrape"""
+        meta = cache_entry.get("meta", {})
+        if page == 1 and meta.get("total_pages"):
+            self.max_filtered_pages[f"{city}-{district}"] = meta["total_pages"]
+        logging.info(f"Page {page} of {city}/{district} unchanged since last scrape, skipping")
+        has_next_page = should_continue_pagination(city, district, page, meta.get("offers", 0), self.max_filtered_pages)
+        if self.incremental:
+            # An unchanged page holds no new offers either
+            self._incomplete_scopes.add((city, district))
+            has_next_page = False
+        return has_next_page, meta.get("offers", 0)
+
+    def _report_progress(self, city, fraction, status):
+        """Record progress of one city and forward the overall state to the callback"""
+        with self._status_lock:
+            self._city_started.setdefault(city, time.monotonic())
+            self._city_progress[city] = fraction
+            self.status = status
+            self.progress = (sum(self._city_progress.values()) / len(self._city_progress)) * 100
+            state = (self.status, self.progress, self.error_occurred)
+        # A slow consumer, e.g. of the event channel, must not hold up the other city threads
+        if self._callback:
+            self._callback(*state)
+
+    def _scrape_district(self, city, district, district_idx, district_count):
+        """Scrape all pages of one city/district, streaming pages 2..N through the page pipeline"""
+        district_name = district if district else "all districts"
+        logging.info(f"Scraping {city} - {district_name}")
+        base_fraction = district_idx / district_count
+        
+        logging.info(f"Scraping {city} - {district_name} - page 1")
+        self._report_progress(city, base_fraction, f"{city} - {district_name} p1")
+        has_next_page, listing_count = self.scrape_page(city, district, 1)
+        if listing_count is None:
+            self._incomplete_scopes.add((city, district))
+        if not has_next_page:
+            logging.info(f"No further pages for {city} - {district_name}, skipping")
+            return
+        
+        if self.max_pages and self.max_pages < 2:
+            logging.info(f"Reached max pages ({self.max_pages}) for {city} - {district_name}")
+            self._incomplete_scopes.add((city, district))
+            return
+        
+        total_pages = self.max_filtered_pages.get(f"{city}-{district}")
+        last_page = self.max_pages
+        if total_pages:
+            # Page 1 told us how many pages there are, so plan them all and stream them through the pipeline
+            last_available = self.replay_source.last_page(city, district) if self.replay_source else None
+            pages = plan_pages(total_pages, self.max_pages, last_available)
+            if not pages:
+                return
+            last_page = pages[-1]
+        if total_pages and (not self.incremental or self.full_refresh):
+            logging.info(f"Prefetching pages 2-{pages[-1]} for {city} - {district_name}")
+            futures = [self._pipeline.submit(PageWork(city, district, page)) for page in pages]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                self._report_progress(
+                    city,
+                    base_fraction + (done / len(futures)) / district_count,
+                    f"{city} - {district_name} {done + 1}/{pages[-1]}"
+                )
+            return
+        
+        # Total page count unknown, or an incremental run that may stop early - dispatch
+        # windows of pages until one of them ends the results or holds only known offers
+        page = 2
+        while not last_page or page <= last_page:
+            window = range(page, page + self.concurrency)
+            if last_page:
+                window = range(page, min(page + self.concurrency, last_page + 1))
+            logging.info(f"Scraping {city} - {district_name} - pages {window[0]}-{window[-1]}")
+            self._report_progress(city, base_fraction, f"{city} - {district_name} p{window[0]}")
+            futures = [self._pipeline.submit(PageWork(city, district, p)) for p in window]
+            outcomes = [future.result().outcome for future in futures]
+            if any(offer_count is None for _, offer_count in outcomes):
+                self._incomplete_scopes.add((city, district))
+            if not all(has_next_page for has_next_page, _ in outcomes):
+                return
+            page = window[-1] + 1
+        if total_pages and not (self.max_pages and self.max_pages < total_pages):
+            return
+        logging.info(f"Reached max pages ({self.max_pages}) for {city} - {district_name}")
+        self._incomplete_scopes.add((city, district))
+
+    def _scrape_city(self, city):
+        """Scrape every district of a single city"""
+        logging.info(f"Starting scrape for city: {city}")
+        self._report_progress(city, 0.0, f"Starting {city}")
+        
+        districts = self.get_districts(city)
+        with span("city"):
+            for district_idx, district in enumerate(districts):
+                self._scrape_district(city, district, district_idx, len(districts))
+        if self.incremental:
+            self._deactivate_unseen(city, districts)
+        
+        self._report_progress(city, 1.0, f"Finished {city}")
+        logging.info(f"Finished scraping {city}")
+
+    def _deactivate_unseen(self, city, districts):
+        """Mark offers of a city that were not seen again as inactive, if its results were walked to the end"""
+        # District-filtered or cut-short scrapes do not see every offer of the city
+        if districts != [""] or not self.district_matcher.match_all or (city, "") in self._incomplete_scopes:
+            logging.info(f"Results of {city} were not scraped completely, keeping unseen offers active")
+            return
+        if self.error_occurred:
+            logging.info(f"Scrape had errors, keeping unseen offers of {city} active")
+            return
+        deactivated = self.writer.deactivate_unseen(city, self._run_started, self.room_filter)
+        logging.info(f"Marked {deactivated} offers of {city} that are no longer listed as inactive")
+
+    def _close_pipeline(self):
+        """Stop the page pipeline and the parse processes, keeping the final pipeline metrics"""
+        if self._pipeline:
+            self._pipeline.close()
+            self.pipeline_metrics = self._pipeline.metrics()
+            self._pipeline = None
+        if self._parse_pool:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+
+    def _finish_profile(self):
+        """Stop the profiler, log the span summary and write the cProfile stats"""
+        if not self.profile:
+            return
+        PROFILER.stop()
+        logging.info(f"Profile:\n{PROFILER.format_summary()}")
+        if self.profile_output and PROFILER.dump_stats(self.profile_output):
+            logging.info(f"cProfile stats written to {self.profile_output}")
 
     def start_scraping(self, callback=None):
         """Start the scraping process for all cities and districts"""
+        if self.profile:
+            PROFILER.start(cprofile=self.profile_output is not None)
         try:
+            # Create and migrate the database when a scrape starts, not when the scraper is constructed
+            setup_database()
             # Clear existing listings if preserve flag is not set
             if not self.preserve:
                 clear_listings()
+            self._run_started = datetime.utcnow().isoformat()
+            self._started_at = time.monotonic()
+            self._incomplete_scopes = set()
             
             # Filter cities if city_filter is specified
-            cities_to_scrape = [city for city in CITIES if self.city_filter is None or city.lower() in [c.lower() for c in self.city_filter]]
+            available_cities = self.replay_source.cities() if self.replay_source else CITIES
+            cities_to_scrape = [city for city in available_cities if self.city_filter is None or city.lower() in [c.lower() for c in self.city_filter]]
             
             if self.city_filter and not cities_to_scrape:
                 logging.warning(f"None of the specified cities {self.city_filter} match available cities. Using all cities.")
-                cities_to_scrape = CITIES
+                cities_to_scrape = available_cities
+            if self.replay_source:
+                logging.info(f"Replaying {len(self.replay_source)} saved pages from {self.replay_source.path}")
             
-            total_cities = len(cities_to_scrape)
+            self._callback = callback
+            self._city_progress = {city: 0.0 for city in cities_to_scrape}
+            self._city_started = {}
             
-            for city_idx, city in enumerate(cities_to_scrape):
-                logging.info(f"Starting scrape for city: {city}")
-                self.status = f"Starting {city}"
-                self.progress = (city_idx / total_cities) * 100
-                
-                if callback:
-                    callback(self.status, self.progress, self.error_occurred)
-                
-                districts = self.get_districts(city)
-                
-                for district_idx, district in enumerate(districts):
-                    district_name = district if district else "all districts"
-                    logging.info(f"Scraping {city} - {district_name}")
-                    
-                    page = 1
-                    has_next_page = True
-                    
-                    while has_next_page:
-                        self.status = f"{city} - {district_name} p{page}"
-                        total_progress = ((city_idx + (district_idx / len(districts))) / total_cities) * 100
-                        self.progress = total_progress
-                        
-                        if callback:
-                            callback(self.status, self.progress, self.error_occurred)
-                        
-                        logging.info(f"Scraping {city} - {district_name} - page {page}")
-                        has_next_page, listing_count = self.scrape_page(city, district, page)
-                        
-                        if not has_next_page:
-                            if page == 1:
-                                logging.info(f"No listings inserted for {city} - {district_name}, skipping")
-                            break
-                        
-                        page += 1
-                        
-                        # Stop pagination if max_pages is set
-                        if self.max_pages and page > self.max_pages:
-                            logging.info(f"Reached max pages ({self.max_pages}) for {city} - {district_name}")
-                            break
-                            
-                        time.sleep(1.5)  # Sleep between pages to avoid rate limiting
-                
-                logging.info(f"Finished scraping {city}")
+            # Cities run side by side; their pages 2..N share one pipeline so that
+            # downloads, JSON decoding, parsing and database writes overlap
+            city_workers = min(self.concurrency, len(cities_to_scrape))
+            if self.parse_workers:
+                self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+            self._pipeline = Pipeline(
+                [Stage(name, handler, self.stage_workers.get(name, 1)) for name, handler in self.page_stages()],
+                queue_size=self.queue_size
+            )
+            with self._pipeline:
+                with ThreadPoolExecutor(max_workers=city_workers, thread_name_prefix="otodom-city") as city_pool:
+                    futures = [city_pool.submit(self._scrape_city, city) for city in cities_to_scrape]
+                    for future in as_completed(futures):
+                        future.result()
+            self._close_pipeline()
+            self._close_enricher(ENRICHMENT_DRAIN_S)
+            self.writer.close()
+            if self.replay_source:
+                self.replay_source.close()
+            if self.page_archive:
+                self.page_archive.close()
+            if self.page_cache:
+                self.page_cache.save()
+            self.district_resolver.save()
             
             self.status = "Completed" if not self.error_occurred else "Completed with errors - see log"
             self.progress = 100
             
+            http_stats = self.session.stats.snapshot()
+            logging.info(f"HTTP: {http_stats['requests']} requests, {http_stats['new_connections']} new connections, "
+                         f"{http_stats['reused_connections']} reused, avg latency {http_stats['avg_latency_ms']} ms")
+            if self.page_cache:
+                cache_stats = self.page_cache.stats()
+                logging.info(f"Page cache: {cache_stats['hits']} hits ({cache_stats['not_modified']} not modified), "
+                             f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions")
+            if self.page_archive:
+                archive_stats = self.page_archive.stats()
+                logging.info(f"Page archive: {archive_stats['pages']} pages, {archive_stats['raw_bytes']} bytes "
+                             f"stored in {archive_stats['stored_bytes']} ({archive_stats['ratio']}x)")
+            if self.enricher:
+                enrichment = self.enricher.stats()
+                logging.info(f"Detail enrichment: {enrichment['recovered']} areas recovered, "
+                             f"{enrichment['no_area']} without area, {enrichment['failed']} failed, "
+                             f"{enrichment['dropped']} dropped, {enrichment['abandoned']} abandoned")
+            for name, stage in self.pipeline_metrics.items():
+                logging.info(f"Stage {name}: {stage['processed']} pages, {stage['items_per_s']}/s, "
+                             f"{stage['busy_pct']}% busy, max queue {stage['max_queue_depth']}")
+            self._finish_profile()
+            
             if callback:
                 callback(self.status, self.progress, self.error_occurred)
             
@@ -371,8 +805,19 @@ class OtodomScraper:
             logging.error(f"Traceback: {traceback.format_exc()}")
             self.error_occurred = True
             self.status = "Failed - see log"
+            self._close_pipeline()
+            self._close_enricher(0)
+            self.writer.close()
+            if self.replay_source:
+                self.replay_source.close()
+            if self.page_archive:
+                self.page_archive.close()
+            if self.page_cache:
+                self.page_cache.save()
+            self.district_resolver.save()
+            self._finish_profile()
             
             if callback:
                 callback(self.status, self.progress, self.error_occurred)
             
-            return False
\ No newline at end of file
+            return False
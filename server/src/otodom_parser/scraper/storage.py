@@ -1,22 +1,272 @@
 """
 Module for database operations related to storing scraped offers
 """
+import hashlib
 import logging
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
 # Import database setup functions and path
-from ..db import setup_database, db_path
+from ..db import (
+    setup_database, db_path, LISTINGS_INDEXES, LISTING_AGGREGATES_SQL,
+    add_to_listing_aggregates, ensure_listing_aggregates, migrate_listings
+)
+from ..db_connection import connect, sync_indexes
+
+
+LISTINGS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS listings (
+    id INTEGER PRIMARY KEY,
+    city TEXT,
+    district TEXT,
+    district_parent TEXT,
+    area REAL,
+    price_per_sqm INTEGER,
+    floor INTEGER,
+    rooms INTEGER,
+    scraped_at TEXT,
+    offer_id TEXT,
+    content_hash TEXT,
+    active INTEGER NOT NULL DEFAULT 1,
+    last_seen_at TEXT
+)
+"""
+
+INSERT_LISTING_SQL = (
+    "INSERT INTO listings (city, district, district_parent, area, price_per_sqm, floor, rooms, scraped_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+INSERT_OFFER_SQL = (
+    "INSERT INTO listings (city, district, district_parent, area, price_per_sqm, floor, rooms, scraped_at, "
+    "offer_id, content_hash, last_seen_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+UPDATE_OFFER_SQL = (
+    "UPDATE listings SET city = ?, district = ?, district_parent = ?, area = ?, price_per_sqm = ?, floor = ?, "
+    "rooms = ?, scraped_at = ?, content_hash = ?, last_seen_at = ?, active = 1 WHERE offer_id = ?"
+)
+
+TOUCH_OFFER_SQL = "UPDATE listings SET last_seen_at = ? WHERE offer_id = ?"
+
+# Stays below SQLite's default limit of 999 bound parameters
+OFFER_LOOKUP_CHUNK = 500
+
+
+def content_hash(city, district, district_parent, area, price_per_sqm, floor, rooms) -> str:
+    """Hash of the stored fields of an offer, changes whenever a re-scraped offer has to be updated"""
+    key = (city, district, district_parent, float(area), float(price_per_sqm), floor, rooms)
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ListingWriter:
+    """
+    Buffered listing writer that keeps one connection open for a whole scrape.
+
+    Rows are collected with ``add`` and written with a single ``executemany``
+    inside one transaction whenever ``batch_size`` rows are buffered or
+    ``flush`` is called (the scraper flushes once per page). The same
+    transaction folds the batch into the ``listing_aggregates`` rollup. The
+    writer is shared by the scraper's worker threads.
+
+    Listings with an Otodom offer id are upserted: an offer that is already
+    stored with the same content hash only gets its ``last_seen_at`` touched,
+    a changed or reappearing one is updated in place. Offers that were not
+    seen again are taken out of the rollup by ``deactivate_unseen``.
+    """
+
+    def __init__(self, path: Optional[Path] = None, batch_size: int = 500):
+        """
+        Initialize the writer
+
+        Args:
+            path: Database file, defaults to the shared otodom.db
+            batch_size: Number of buffered rows that triggers an automatic flush
+        """
+        self.path = Path(path) if path is not None else db_path
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.rows_unchanged = 0
+        self._rows: List[Tuple] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self.path, check_same_thread=False)
+            self._conn.execute(LISTINGS_TABLE_SQL)
+            cursor = self._conn.cursor()
+            migrate_listings(cursor)
+            sync_indexes(cursor, "listings", LISTINGS_INDEXES)
+            ensure_listing_aggregates(cursor)
+            self._conn.commit()
+        return self._conn
+
+    def add(
+        self,
+        city: str,
+        district: str,
+        district_parent: str,
+        area: float,
+        price_per_sqm: int,
+        floor: int = 0,
+        rooms: Optional[int] = None,
+        offer_id: Optional[str] = None
+    ):
+        """Buffer a listing, flushing the buffer once it reaches batch_size"""
+        with self._lock:
+            self._rows.append(self._row(city, district, district_parent, area, price_per_sqm, floor, rooms, offer_id))
+            if len(self._rows) >= self.batch_size:
+                self._flush_locked()
+
+    @staticmethod
+    def _row(city, district, district_parent, area, price_per_sqm, floor, rooms, offer_id) -> Tuple:
+        digest = content_hash(city, district, district_parent, area, price_per_sqm, floor, rooms) if offer_id else None
+        return (city, district, district_parent, area, price_per_sqm, floor, rooms,
+                datetime.utcnow().isoformat(), offer_id, digest)
+
+    def flush(self) -> int:
+        """
+        Write all buffered listings in one transaction
+
+        Returns:
+            Number of new or changed rows written
+        """
+        with self._lock:
+            return self._flush_locked()
+
+    def write_page(self, listings: List[Tuple]) -> Tuple[int, int]:
+        """
+        Write the listings of one page in one transaction, bypassing the buffer
+
+        Args:
+            listings: (city, district, district_parent, area, price_per_sqm, floor, rooms, offer_id) tuples
+
+        Returns:
+            (written, unchanged): new or changed listings, and known listings that were only touched
+        """
+        with self._lock:
+            self._flush_locked()
+            rows = [self._row(*listing) for listing in listings]
+            if not rows:
+                return 0, 0
+            try:
+                return self._write_rows(rows)
+            except sqlite3.Error as e:
+                logging.error(f"Failed to write {len(rows)} listings: {str(e)}")
+                return 0, 0
+
+    def _flush_locked(self) -> int:
+        if not self._rows:
+            return 0
+        rows, self._rows = self._rows, []
+        try:
+            written, _ = self._write_rows(rows)
+            return written
+        except sqlite3.Error as e:
+            logging.error(f"Failed to write {len(rows)} listings: {str(e)}")
+            return 0
+
+    def _write_rows(self, rows: List[Tuple]) -> Tuple[int, int]:
+        conn = self._connection()
+        with conn:
+            cursor = conn.cursor()
+            # Listings without an offer id cannot be matched and are always inserted
+            new_rows = [row[:8] + (None, None, None) for row in rows if row[8] is None]
+            # An offer listed twice in the batch (e.g. a promoted one) is written once
+            offers = {row[8]: row for row in rows if row[8] is not None}
+            stored = {}
+            offer_ids = list(offers)
+            for start in range(0, len(offer_ids), OFFER_LOOKUP_CHUNK):
+                chunk = offer_ids[start:start + OFFER_LOOKUP_CHUNK]
+                cursor.execute(
+                    "SELECT offer_id, content_hash, active, city, district, district_parent, price_per_sqm, rooms "
+                    f"FROM listings WHERE offer_id IN ({','.join('?' * len(chunk))})", chunk)
+                stored.update((found[0], found) for found in cursor.fetchall())
+
+            changed, touched, replaced = [], [], []
+            for offer_id, row in offers.items():
+                old = stored.get(offer_id)
+                if old is None:
+                    new_rows.append(row + (row[7],))
+                elif old[1] == row[9] and old[2]:
+                    touched.append((row[7], offer_id))
+                else:
+                    changed.append(row[:8] + (row[9], row[7], offer_id))
+                    if old[2]:
+                        replaced.append(old[3:])
+
+            cursor.executemany(INSERT_OFFER_SQL, new_rows)
+            cursor.executemany(UPDATE_OFFER_SQL, changed)
+            cursor.executemany(TOUCH_OFFER_SQL, touched)
+            if replaced:
+                add_to_listing_aggregates(cursor, replaced, sign=-1)
+            add_to_listing_aggregates(cursor, ((row[0], row[1], row[2], row[4], row[6]) for row in new_rows + changed))
+        written = len(new_rows) + len(changed)
+        self.rows_written += written
+        self.rows_unchanged += len(touched)
+        return written, len(touched)
+
+    def deactivate_unseen(self, city: str, seen_since: str, rooms: Optional[List[int]] = None) -> int:
+        """
+        Mark listings of a city that were not seen since a timestamp as inactive
+
+        Args:
+            city: City whose results were scraped completely
+            seen_since: ISO timestamp of the start of the scrape
+            rooms: Room filter of the scrape; listings with other room counts are left alone
+
+        Returns:
+            Number of listings deactivated
+        """
+        where = "city = ? AND active = 1 AND (last_seen_at IS NULL OR last_seen_at < ?)"
+        params = [city, seen_since]
+        if rooms:
+            where += f" AND rooms IN ({','.join('?' * len(rooms))})"
+            params += list(rooms)
+        with self._lock:
+            self._flush_locked()
+            try:
+                conn = self._connection()
+                with conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT city, district, district_parent, price_per_sqm, rooms "
+                                   f"FROM listings WHERE {where}", params)
+                    gone = cursor.fetchall()
+                    if gone:
+                        add_to_listing_aggregates(cursor, gone, sign=-1)
+                        cursor.execute(f"UPDATE listings SET active = 0 WHERE {where}", params)
+                return len(gone)
+            except sqlite3.Error as e:
+                logging.error(f"Failed to deactivate listings of {city}: {str(e)}")
+                return 0
+
+    def close(self):
+        """Flush pending rows and close the connection"""
+        with self._lock:
+            self._flush_locked()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 
 def clear_listings():
     """Clear all existing listings from the database"""
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
         cursor.execute("DELETE FROM listings")
+        cursor.execute(LISTING_AGGREGATES_SQL)
+        cursor.execute("DELETE FROM listing_aggregates")
         conn.commit()
         conn.close()
         logging.info("Cleared existing listings from database")
@@ -51,29 +301,20 @@ def insert_listing(
         True if insertion was successful, False otherwise
     """
     try:
-        conn = sqlite3.connect(db_path)
+        conn = connect(db_path)
         cursor = conn.cursor()
         
         # Check if the table exists, create it if it doesn't
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS listings (
-            id INTEGER PRIMARY KEY,
-            city TEXT,
-            district TEXT,
-            district_parent TEXT,
-            area REAL,
-            price_per_sqm INTEGER,
-            floor INTEGER,
-            rooms INTEGER,
-            scraped_at TEXT
-        )
-        """)
+        cursor.execute(LISTINGS_TABLE_SQL)
+        migrate_listings(cursor)
+        ensure_listing_aggregates(cursor)
         
         # Insert the listing
         cursor.execute(
-            "INSERT INTO listings (city, district, district_parent, area, price_per_sqm, floor, rooms, scraped_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            INSERT_LISTING_SQL,
             (city, district, district_parent, area, price_per_sqm, floor, rooms, datetime.utcnow().isoformat())
         )
+        add_to_listing_aggregates(cursor, [(city, district, district_parent, price_per_sqm, rooms)])
         
         conn.commit()
         conn.close()
@@ -0,0 +1,139 @@
+"""
+Resident stats worker serving db.py query functions over newline-delimited JSON.
+
+The Node.js API keeps a small pool of these processes instead of starting a
+new interpreter for every request. Each line on stdin is one request and
+each line on stdout is the matching response:
+
+    -> {"id": 1, "fn": "get_city_stats", "args": ["warszawa"]}
+    <- {"id": 1, "result": {...}}
+    <- {"id": 2, "error": "Unknown function: drop_everything"}
+
+A ``{"ready": true}`` line is written once the worker can accept requests.
+
+Workers only read: the schema and the listing_aggregates rollup are created
+by the scraper, or once before the pool starts with ``stats_worker.py --setup``.
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+# Make db importable both as a script and as part of the package
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import db
+
+# Only read-only query functions may be called by the API
+ALLOWED_FUNCTIONS = {
+    "get_all_cities",
+    "get_city_stats",
+    "get_city_district_stats",
+    "get_last_updated_timestamp",
+}
+
+# Set once the listing_aggregates rollup has been found
+_rollup_ready = False
+
+
+def rollup_error():
+    """Error message while the listing_aggregates rollup the queries read does not exist, else None"""
+    global _rollup_ready
+    if _rollup_ready:
+        return None
+    try:
+        conn = db.get_connection()
+        try:
+            _rollup_ready = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'listing_aggregates'"
+            ).fetchone() is not None
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return f"Cannot open the database: {str(e)}"
+    if not _rollup_ready:
+        return "The listing_aggregates table does not exist, run the scraper or stats_worker.py --setup first"
+    return None
+
+
+def handle_request(request):
+    """Run one request dict and return the response dict"""
+    if not isinstance(request, dict):
+        return {"id": None, "error": f"Invalid request: expected an object, got {type(request).__name__}"}
+    request_id = request.get("id")
+    function_name = request.get("fn")
+    if function_name not in ALLOWED_FUNCTIONS:
+        return {"id": request_id, "error": f"Unknown function: {function_name}"}
+    error = rollup_error()
+    if error:
+        return {"id": request_id, "error": error}
+    try:
+        result = getattr(db, function_name)(*request.get("args", []))
+        return {"id": request_id, "result": result}
+    except Exception as e:
+        logging.error(f"Stats worker failed to run {function_name}: {str(e)}")
+        return {"id": request_id, "error": str(e)}
+
+
+def encode_response(response):
+    """Serialize a response, replacing a result that is not JSON serializable with an error"""
+    try:
+        return json.dumps(response, ensure_ascii=False)
+    except (TypeError, ValueError) as e:
+        logging.error(f"Stats worker could not serialize the response to request {response.get('id')}: {str(e)}")
+        return json.dumps({"id": response.get("id"), "error": f"Unserializable result: {str(e)}"}, ensure_ascii=False)
+
+
+def serve(stdin, stdout):
+    """Answer requests from stdin until it is closed"""
+    stdout.write(json.dumps({"ready": True}) + "\n")
+    stdout.flush()
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"id": None, "error": f"Invalid request: {str(e)}"}
+        else:
+            response = handle_request(request)
+        stdout.write(encode_response(response) + "\n")
+        stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve otodom.db statistics over stdin/stdout")
+    parser.add_argument("--db", type=str, help="Path to the SQLite database (default: otodom.db next to db.py)")
+    parser.add_argument("--setup", action="store_true",
+                        help="Create and migrate the schema and the listing_aggregates rollup, then exit")
+    args = parser.parse_args()
+
+    # stdout carries the protocol, so logging must stay on stderr
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr,
+                        format="%(asctime)s [%(levelname)s] %(message)s")
+    if args.db:
+        db.db_path = Path(args.db)
+    if args.setup:
+        # Run once before the pool starts, never by every worker against a database being written
+        try:
+            db.setup_database()
+        except Exception as e:
+            logging.error(f"Could not set up the database: {str(e)}")
+            sys.exit(1)
+        return
+
+    # Requests are answered with an error until the rollup exists
+    error = rollup_error()
+    if error:
+        logging.error(f"Stats worker: {error}")
+
+    stdin = open(sys.stdin.fileno(), "r", encoding="utf-8", closefd=False)
+    stdout = open(sys.stdout.fileno(), "w", encoding="utf-8", closefd=False)
+    serve(stdin, stdout)
+
+
+if __name__ == "__main__":
+    main()
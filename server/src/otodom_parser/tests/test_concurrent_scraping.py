@@ -0,0 +1,169 @@
+import pathlib
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+from otodom_parser.scraper.district_resolver import DistrictResolver
+from otodom_parser.scraper.rate_limit import HostRateLimiter
+from otodom_parser.scraper.scraper import OtodomScraper
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def make_scraper(**kwargs):
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        return OtodomScraper(preserve=True, **kwargs)
+
+
+def test_rate_limiter_spaces_requests():
+    """Requests to one host start at least 1/rps seconds apart"""
+    limiter = HostRateLimiter(requests_per_second=20, max_concurrency=4)
+    starts = []
+    lock = threading.Lock()
+
+    def worker():
+        with limiter.slot("https://www.otodom.pl/pl/oferty"):
+            with lock:
+                starts.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    starts.sort()
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert min(gaps) >= 0.04
+
+
+def test_rate_limiter_caps_concurrency_per_host():
+    """No more than max_concurrency requests to one host run at once"""
+    limiter = HostRateLimiter(requests_per_second=0, max_concurrency=2)
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal in_flight, peak
+        with limiter.slot("https://www.otodom.pl/"):
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak == 2
+
+
+def test_pages_prefetched_after_first_page():
+    """Once page 1 fills max_filtered_pages, pages 2..N are all scraped"""
+    scraper = make_scraper(city_filter=["warszawa", "krakow"], concurrency=3)
+    calls = []
+    lock = threading.Lock()
+
+    def fake_fetch(work):
+        with lock:
+            calls.append((work.city, work.page))
+        if work.page == 1:
+            scraper.max_filtered_pages[f"{work.city}-{work.district}"] = 4
+        work.outcome = (True, 36)
+        return work
+
+    scraper._fetch_stage = fake_fetch
+    assert scraper.start_scraping() is True
+
+    for city in ("warszawa", "krakow"):
+        assert sorted(page for c, page in calls if c == city) == [1, 2, 3, 4]
+    assert scraper.progress == 100
+
+
+def test_prefetch_respects_max_pages():
+    """max_pages caps the prefetched page range"""
+    scraper = make_scraper(city_filter=["warszawa"], max_pages=2)
+    pages = []
+
+    def fake_fetch(work):
+        pages.append(work.page)
+        scraper.max_filtered_pages[f"{work.city}-{work.district}"] = 10
+        work.outcome = (True, 36)
+        return work
+
+    scraper._fetch_stage = fake_fetch
+    scraper.start_scraping()
+
+    assert sorted(pages) == [1, 2]
+
+
+def test_pipeline_writes_every_page(tmp_path):
+    """Pages 2..N go through fetch, decode, parse and write stages of the pipeline"""
+    body = LISTING_PAGE.read_bytes()
+    scraper = make_scraper(city_filter=["wroclaw"], http_cache=False, stage_workers={"parse": 2})
+    scraper.writer = MagicMock()
+    scraper.district_resolver = DistrictResolver(tmp_path / "districts.json")
+    requested = []
+
+    def fake_request(url, max_retries=3, headers=None):
+        requested.append(url)
+        response = MagicMock(url=url, status_code=200, content=body, headers={})
+        return response
+
+    scraper._make_request = fake_request
+    assert scraper.start_scraping() is True
+
+    # The fixture reports 276 listings, i.e. 8 pages
+    assert len(requested) == 8
+    assert scraper.writer.flush.call_count == 8
+    per_page = scraper.writer.add.call_count // 8
+    assert per_page > 0 and scraper.writer.add.call_count == per_page * 8
+    metrics = scraper.get_status()["pipeline"]
+    assert [metrics[name]["processed"] for name in ("fetch", "decode", "parse", "write")] == [7, 7, 7, 7]
+
+
+def test_status_callback_may_read_status():
+    """run_scraper's callback calls get_status() while progress is being reported"""
+    scraper = make_scraper(city_filter=["warszawa"])
+    seen = []
+
+    def fake_fetch(work):
+        work.outcome = (False, 0)
+        return work
+
+    scraper._fetch_stage = fake_fetch
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(scraper.start_scraping(callback=lambda *args: seen.append(scraper.get_status()))),
+        daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert result == [True]
+    assert seen and seen[-1]["progress"] == 100
+
+
+def test_slow_callback_does_not_block_progress():
+    """A callback blocked in one city thread does not hold the status lock for the others"""
+    scraper = make_scraper(city_filter=["warszawa", "krakow"])
+    scraper._city_progress = {"warszawa": 0.0, "krakow": 0.0}
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_callback(status, progress, error):
+        if status == "warszawa p1":
+            entered.set()
+            release.wait(5)
+
+    scraper._callback = slow_callback
+    thread = threading.Thread(target=scraper._report_progress, args=("warszawa", 0.5, "warszawa p1"), daemon=True)
+    thread.start()
+    assert entered.wait(5)
+    scraper._report_progress("krakow", 0.5, "krakow p1")
+    assert scraper.get_status()["progress"] == 50
+    release.set()
+    thread.join(5)
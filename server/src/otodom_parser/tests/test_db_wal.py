@@ -0,0 +1,78 @@
+import threading
+
+from otodom_parser import db_connection
+from otodom_parser.db_connection import connect, configure_pragmas, pragma_profile
+from otodom_parser.scraper.scraper import OtodomScraper
+from otodom_parser.scraper.storage import ListingWriter
+
+
+def test_connection_uses_wal_profile(tmp_path):
+    conn = connect(tmp_path / "wal.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    conn.close()
+
+
+def test_profile_overrides(monkeypatch):
+    monkeypatch.setattr(db_connection, "_overrides", {})
+    monkeypatch.setenv("OTODOM_DB_SYNCHRONOUS", "FULL")
+    assert pragma_profile()["synchronous"] == "FULL"
+
+    configure_pragmas(synchronous="OFF", cache_size=-2000)
+    profile = pragma_profile()
+    assert profile["synchronous"] == "OFF"
+    assert profile["cache_size"] == -2000
+
+
+def test_readers_run_while_scraper_writes(tmp_path):
+    """Readers never see a locked database while the writer commits batches"""
+    db_file = tmp_path / "stress.db"
+    writer = ListingWriter(db_file, batch_size=20)
+    writer.flush()
+    writer.add("warszawa", "wola", "wola", 40.0, 16000)
+    writer.flush()
+
+    errors = []
+    done = threading.Event()
+    reads = [0]
+
+    def write():
+        try:
+            for i in range(2000):
+                writer.add("warszawa", "wola", "wola", 40.0, 16000 + i, rooms=i % 4)
+            writer.close()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def read():
+        conn = connect(db_file)
+        try:
+            while not done.is_set():
+                conn.execute("SELECT city, ROUND(AVG(price_per_sqm), 0), COUNT(*) FROM listings GROUP BY city").fetchall()
+                reads[0] += 1
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=read) for _ in range(4)] + [threading.Thread(target=write)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert reads[0] > 0
+    conn = connect(db_file)
+    assert conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0] == 2001
+    conn.close()
+
+
+def test_constructing_does_not_touch_the_database(isolated_db):
+    OtodomScraper(http_cache=False, enrich_workers=0)
+    ListingWriter()
+    # Tables are only created once a scrape starts or a writer writes
+    assert not isolated_db.exists() or isolated_db.stat().st_size == 0
@@ -0,0 +1,34 @@
+import itertools
+
+from otodom_parser.scraper.filters import DistrictMatcher, should_skip_offer
+
+DISTRICTS = ["", "mokotow", "mokotow-gorny", "stary-mokotow", "sadyba", "wola", "mirow", "nowa-wola",
+             "krzyki", "krzyki-partynice", "stare-miasto", "srodmiescie", "unknown", "a.b", "ochota"]
+FILTERS = [None, ["all"], ["mokotow"], ["Mokotow"], ["wola", "krzyki"], ["miasto"], ["stare"],
+           ["a.b"], ["a"], ["mok", "all"], ["srodmiescie", "mirow", "sadyba"], ["mok", "mokotow", "mirow"], [""]]
+
+
+def test_matcher_agrees_with_should_skip_offer():
+    for district_filter, mode in itertools.product(FILTERS, ["exact", "prefix"]):
+        matcher = DistrictMatcher(district_filter, mode)
+        for district, parent in itertools.product(DISTRICTS, repeat=2):
+            expected = should_skip_offer({"district": district, "district_parent": parent}, district_filter, mode)
+            assert matcher.should_skip(district, parent) == expected, (district_filter, mode, district, parent)
+
+
+def test_prefix_mode_matches_start_or_dash_segment():
+    matcher = DistrictMatcher(["mokotow"], "prefix")
+    assert matcher.matches("mokotow-gorny", "")
+    assert matcher.matches("", "stary-mokotow")
+    assert not matcher.matches("xmokotow", "unknown")
+    # Filter slugs are literal text, not regular expressions
+    assert not DistrictMatcher(["a.b"]).matches("axb", "")
+
+
+def test_many_slugs_compile_into_one_matcher():
+    slugs = [f"district-{i}" for i in range(500)]
+    matcher = DistrictMatcher(slugs, "prefix")
+    assert matcher.matches("district-499", "")
+    assert matcher.matches("old-district-7", "")
+    assert not matcher.matches("district", "other")
+    assert DistrictMatcher(slugs, "exact").matches("x", "district-250")
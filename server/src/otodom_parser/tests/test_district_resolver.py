@@ -0,0 +1,87 @@
+import pathlib
+from unittest.mock import patch, MagicMock
+
+from otodom_parser.scraper.district_resolver import DistrictResolver
+from otodom_parser.scraper.scraper import OtodomScraper
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+WROCLAW = "dolnoslaskie/wroclaw/wroclaw/wroclaw"
+
+
+def scrape(tmp_path, resolver, district_filter):
+    """Scrape Wrocław against the fixture page, returning the requested URLs and the writer"""
+    body = LISTING_PAGE.read_bytes()
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(preserve=True, city_filter=["wroclaw"], district_filter=district_filter,
+                                http_cache=False)
+    scraper.writer = MagicMock()
+    scraper.district_resolver = resolver
+    requested = []
+
+    def fake_request(url, max_retries=3, headers=None):
+        requested.append(url)
+        return MagicMock(url=url, status_code=200, content=body, headers={})
+
+    scraper._make_request = fake_request
+    assert scraper.start_scraping() is True
+    return requested, scraper.writer
+
+
+def test_learns_districts_and_resolves_filters(tmp_path):
+    resolver = DistrictResolver(tmp_path / "districts.json")
+    assert resolver.resolve("wroclaw", ["krzyki"]) is None
+    assert resolver.learn(LISTING_PAGE.read_bytes()) > 0
+    assert resolver.learn(LISTING_PAGE.read_bytes()) == 0
+    resolver.save()
+
+    resolver = DistrictResolver(tmp_path / "districts.json")
+    assert "krzyki/partynice" in resolver.districts("wroclaw")
+    assert resolver.location_path("wroclaw", "krzyki") == f"{WROCLAW}/krzyki"
+    # Sub-districts are covered by their district's search
+    assert resolver.resolve("wroclaw", ["krzyki", "partynice"]) == ["krzyki"]
+    assert resolver.resolve("wroclaw", ["partynice"], "exact") == ["krzyki/partynice"]
+    assert resolver.resolve("wroclaw", ["pole"], "prefix") == ["psie-pole"]
+    # An unknown district or the city itself needs the whole city
+    assert resolver.resolve("wroclaw", ["krzyki", "nowhere"]) is None
+    assert resolver.resolve("wroclaw", ["wroclaw"]) is None
+
+
+def test_known_district_is_requested_directly(tmp_path):
+    resolver = DistrictResolver(tmp_path / "districts.json")
+    resolver.learn(LISTING_PAGE.read_bytes())
+
+    requested, writer = scrape(tmp_path, resolver, ["krzyki"])
+
+    assert requested and all(f"/pl/wyniki/sprzedaz/mieszkanie/{WROCLAW}/krzyki?" in url for url in requested)
+    assert writer.add.call_count > 0
+    assert {call.kwargs["district_parent"] for call in writer.add.call_args_list} <= {"krzyki", "wroclaw"}
+
+
+def test_unknown_district_scrapes_whole_city_and_learns(tmp_path):
+    resolver = DistrictResolver(tmp_path / "districts.json")
+
+    # No offer on the fixture matches, which used to stop the scrape after page 1
+    requested, writer = scrape(tmp_path, resolver, ["nowhere"])
+
+    assert len(requested) == 8
+    assert all("/pl/oferty/sprzedaz/mieszkanie/wroclaw?" in url for url in requested)
+    assert writer.add.call_count == 0
+    assert "krzyki" in DistrictResolver(tmp_path / "districts.json").districts("wroclaw")
+
+
+def test_learn_skips_non_bytes_bodies(tmp_path):
+    resolver = DistrictResolver(tmp_path / "districts.json")
+
+    assert resolver.learn(MagicMock()) == 0
+    assert resolver.learn(None) == 0
+    assert resolver.learn(LISTING_PAGE.read_text(encoding="utf-8")) > 0
+
+
+def test_learns_from_the_first_page_only(tmp_path):
+    resolver = DistrictResolver(tmp_path / "districts.json")
+
+    with patch.object(resolver, "learn", wraps=resolver.learn) as learn:
+        requested, _ = scrape(tmp_path, resolver, ["nowhere"])
+
+    assert len(requested) == 8
+    learn.assert_called_once()
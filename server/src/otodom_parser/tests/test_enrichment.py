@@ -0,0 +1,135 @@
+import json
+import pathlib
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+from otodom_parser.scraper.district_resolver import DistrictResolver
+from otodom_parser.scraper.enrichment import DetailEnricher
+from otodom_parser.scraper.filters import DistrictMatcher
+from otodom_parser.scraper.offer_parser import detail_request
+from otodom_parser.scraper.page_parser import offers_to_rows
+from otodom_parser.scraper.scraper import OtodomScraper
+
+FIXTURES = pathlib.Path(__file__).resolve().parent / "fixtures"
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def offer_without_area(offer_id, district="krzyki"):
+    return {
+        "id": offer_id,
+        "slug": f"mieszkanie-{offer_id}",
+        "totalPrice": {"value": 584000},
+        "roomsNumber": "THREE",
+        "location": {"address": {"city": {"name": "Wrocław"}},
+                     "reverseGeocoding": {"locations": [{"id": f"dolnoslaskie/wroclaw/wroclaw/wroclaw/{district}"}]}},
+    }
+
+
+def test_offers_without_area_become_detail_requests():
+    offers = [offer_without_area(1), offer_without_area(2, district="psie-pole"), {"id": 3, "totalPrice": 1}]
+    pending = []
+    assert offers_to_rows(offers, DistrictMatcher(["krzyki"]), pending) == []
+    # The filtered-out district and the offer without a slug are not fetched
+    assert [request.url for request in pending] == ["https://www.otodom.pl/pl/oferta/mieszkanie-1"]
+    assert detail_request({"href": "[lang]/ad/mieszkanie-ID4vAeN"}).url.endswith("/oferta/mieszkanie-ID4vAeN")
+
+
+def test_enricher_recovers_area_from_detail_page():
+    page = (FIXTURES / "sample_card.html").read_bytes()
+    records = []
+    enricher = DetailEnricher(lambda url: MagicMock(status_code=200, content=page),
+                              lambda city, request, record: records.append((city, record)), requests_per_second=0)
+    requests = [detail_request(offer_without_area(i)) for i in range(3)]
+    assert enricher.submit("wroclaw", requests + requests[:1]) == 3
+    assert enricher.close(timeout=5) == 0
+
+    assert len(records) == 3
+    city, record = records[0]
+    assert (city, record.area, record.price_per_sqm, record.rooms) == ("wroclaw", 58.4, 10000, 3)
+    stats = enricher.stats()
+    assert (stats["recovered"], stats["backlog"], stats["tiers"]) == (3, 0, {"json_ld": 3})
+
+
+def test_full_backlog_drops_instead_of_blocking():
+    release = threading.Event()
+
+    def slow_get(url):
+        release.wait(5)
+        return MagicMock(status_code=404, content=b"")
+
+    enricher = DetailEnricher(slow_get, lambda *args: None, workers=1, requests_per_second=0, max_backlog=2)
+    start = time.monotonic()
+    enricher.submit("lodz", [detail_request(offer_without_area(i)) for i in range(10)])
+    assert time.monotonic() - start < 1
+    stats = enricher.stats()
+    assert stats["dropped"] >= 7 and stats["backlog"] <= 3
+
+    # Whatever is still queued when the drain time runs out is abandoned
+    assert enricher.close(timeout=0) >= 1
+    release.set()
+
+
+def test_dropped_offers_can_be_queued_again():
+    release = threading.Event()
+
+    def slow_get(url):
+        release.wait(5)
+        return MagicMock(status_code=404, content=b"")
+
+    enricher = DetailEnricher(slow_get, lambda *args: None, workers=1, requests_per_second=0, max_backlog=1)
+    requests = [detail_request(offer_without_area(i)) for i in range(5)]
+    enricher.submit("lodz", requests)
+    assert enricher.stats()["dropped"] >= 3
+    release.set()
+    deadline = time.monotonic() + 5
+    while enricher.stats()["backlog"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # A later page listing the dropped offer queues it, offers that were fetched are still skipped
+    assert enricher.submit("lodz", requests[-1:]) == 1
+    assert enricher.submit("lodz", requests[:1]) == 0
+    enricher.close(timeout=5)
+
+
+def test_records_completing_after_close_are_dropped():
+    page = (FIXTURES / "sample_card.html").read_bytes()
+    fetching, release = threading.Event(), threading.Event()
+
+    def slow_get(url):
+        fetching.set()
+        release.wait(5)
+        return MagicMock(status_code=200, content=page)
+
+    records = []
+    enricher = DetailEnricher(slow_get, lambda *args: records.append(args), workers=1, requests_per_second=0)
+    enricher.submit("wroclaw", [detail_request(offer_without_area(1))])
+    assert fetching.wait(5)
+    # The page in flight outlives the drain time and the worker's join
+    enricher.close(timeout=0)
+    release.set()
+    deadline = time.monotonic() + 5
+    while enricher.stats()["backlog"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert records == []
+    assert (enricher.stats()["recovered"], enricher.stats()["abandoned"]) == (0, 1)
+
+
+def test_scraper_backfills_rows_from_detail_pages(tmp_path):
+    body = LISTING_PAGE.read_bytes().replace(b'"areaInSquareMeters":69.59', b'"areaInSquareMeters":null', 1)
+    detail = (FIXTURES / "sample_card.html").read_bytes()
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(preserve=True, city_filter=["wroclaw"], http_cache=False, max_pages=1)
+    scraper.writer = MagicMock()
+    scraper.district_resolver = DistrictResolver(tmp_path / "districts.json")
+    scraper._make_request = lambda url, max_retries=3, headers=None: MagicMock(
+        url=url, status_code=200, content=body, headers={})
+    scraper.enricher._get = lambda url: MagicMock(status_code=200, content=detail)
+    scraper.enricher.rate_limiter.requests_per_second = 0
+    assert scraper.start_scraping() is True
+
+    enriched = [call.kwargs for call in scraper.writer.add.call_args_list if call.kwargs["area"] == 58.4]
+    assert len(enriched) == 1 and enriched[0]["city"] == "wroclaw" and enriched[0]["offer_id"]
+    assert scraper.get_status()["enrichment"]["recovered"] == 1
+    json.dumps(scraper.get_status()["enrichment"])
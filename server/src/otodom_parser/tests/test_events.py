@@ -0,0 +1,96 @@
+import io
+import json
+import os
+import pathlib
+import time
+from unittest.mock import patch
+
+from otodom_parser.scraper.events import EventStream, open_event_stream
+from otodom_parser.scraper.http_session import PoolStats, latency_percentiles
+from otodom_parser.scraper.scraper import OtodomScraper
+from otodom_parser.scraper.storage import ListingWriter
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def read_events(buffer):
+    return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+
+def test_progress_events_are_throttled():
+    buffer = io.StringIO()
+    events = EventStream(buffer, interval_s=60)
+    calls = []
+
+    def snapshot():
+        calls.append(1)
+        return {"status": "x", "counters": {"pages": 10, "offers": 360, "rows_written": 300}, "elapsed_s": 2.0}
+
+    assert events.progress(snapshot) is True
+    # Skipped events never build the snapshot
+    assert [events.progress(snapshot) for _ in range(100)] == [False] * 100
+    assert len(calls) == 1
+    assert events.progress(snapshot, force=True) is True
+    events.emit("done", ok=True)
+
+    first, final, done = read_events(buffer)
+    assert first["type"] == "progress" and first["rates"] == {"pages_per_s": 5.0, "offers_per_s": 180.0, "rows_per_s": 150.0}
+    # No new pages since the previous event
+    assert final["rates"]["pages_per_s"] == 0.0
+    assert done["type"] == "done" and done["ok"] is True and "ts" in done
+
+
+def test_heartbeat_reports_progress_without_status_changes():
+    buffer = io.StringIO()
+    events = EventStream(buffer, interval_s=0.05)
+    events.start_heartbeat(lambda: {"status": "Enriching 3 offers", "counters": {}, "elapsed_s": 1.0})
+    time.sleep(0.3)
+    heartbeats = read_events(buffer)
+    events.close()
+    written = events.events_written
+
+    assert len(heartbeats) >= 2
+    assert all(event["status"] == "Enriching 3 offers" for event in heartbeats)
+    # Nothing is written once the stream is closed
+    time.sleep(0.1)
+    assert events.events_written == written
+
+
+def test_event_channel_on_file_descriptor():
+    read_fd, write_fd = os.pipe()
+    events = open_event_stream(write_fd)
+    events.emit("progress", status="Łódź - all districts p1")
+    events.close()
+    with os.fdopen(read_fd, encoding="utf-8") as reader:
+        assert json.loads(reader.readline())["status"] == "Łódź - all districts p1"
+    # Writing after the reader is gone is not an error for the scrape
+    assert events.emit("done") is False
+
+
+def test_latency_percentiles_and_retries():
+    assert latency_percentiles([]) == {"p50_ms": None, "p90_ms": None, "p99_ms": None}
+    assert latency_percentiles([i / 1000 for i in range(1, 101)]) == {"p50_ms": 50.0, "p90_ms": 90.0, "p99_ms": 99.0}
+    stats = PoolStats()
+    for ms in (10, 20, 300):
+        stats.record_request(ms / 1000)
+    stats.record_retry()
+    snapshot = stats.snapshot()
+    assert (snapshot["retries"], snapshot["p50_ms"], snapshot["p99_ms"]) == (1, 20.0, 300.0)
+
+
+def test_scrape_reports_metrics_through_events(tmp_path):
+    for page in (1, 2):
+        (tmp_path / f"wroclaw__{page}.html").write_bytes(LISTING_PAGE.read_bytes())
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(preserve=True, replay=tmp_path, max_pages=2)
+    scraper.writer = ListingWriter(tmp_path / "listings.db")
+    buffer = io.StringIO()
+    events = EventStream(buffer, interval_s=0)
+    assert scraper.start_scraping(callback=lambda *args: events.progress(scraper.get_metrics)) is True
+
+    final = read_events(buffer)[-1]
+    assert final["status"] == "Completed" and final["progress"] == 100
+    assert final["counters"]["pages"] == 2
+    assert final["counters"]["offers"] > 0 and final["counters"]["rows_written"] > 0
+    assert final["cities"] == {"wroclaw": {"progress": 100.0, "eta_s": 0.0}}
+    assert {"p50_ms", "p90_ms", "p99_ms", "retries"} <= set(final["http"])
@@ -0,0 +1,55 @@
+import re
+import pathlib
+
+from otodom_parser.html_area_extractor import (
+    extract_area, extract_area_from_html, TIER_JSON_LD, TIER_PARAMETERS, TIER_TEXT, TIER_TREE, TIER_DIV_SCAN
+)
+from otodom_parser.scraper.offer_parser import to_float
+
+SAMPLE_CARD = pathlib.Path(__file__).resolve().parent / "fixtures" / "sample_card.html"
+
+
+def without_json_ld(page):
+    return re.sub(r'<script type="application/ld\+json">.*?</script>', "", page, flags=re.DOTALL)
+
+
+def test_cheap_tiers_come_first():
+    page = SAMPLE_CARD.read_text(encoding="utf-8")
+    assert extract_area(page, to_float) == (58.4, TIER_JSON_LD)
+    assert extract_area(page.encode("utf-8"), to_float) == (58.4, TIER_JSON_LD)
+    assert extract_area_from_html(page, to_float) == 58.4
+
+    page = without_json_ld(page)
+    assert extract_area(page, to_float) == (58.4, TIER_PARAMETERS)
+    page = page.replace('data-testid="ad-parameters-item-area"', "")
+    assert extract_area(page, to_float) == (58.4, TIER_TEXT)
+
+
+def test_tree_and_div_scan_tiers():
+    table = "<html><body><table><tr><td>Powierzchnia</td><td>52</td></tr></table></body></html>"
+    assert extract_area(table, to_float) == (52.0, TIER_TREE)
+
+    # Number and unit are split over several tags, so only the joined div text has them
+    split = "<html><body><div><p>Opis</p><div><b>61</b><i>m</i><i>²</i></div></div></body></html>"
+    assert extract_area(split, to_float) == (61.0, TIER_DIV_SCAN)
+    assert extract_area(split, to_float, div_scan_budget_s=0) == (None, None)
+
+
+def test_pages_without_area():
+    assert extract_area("", to_float) == (None, None)
+    assert extract_area("<html><body><p>Brak danych</p></body></html>", to_float) == (None, None)
+    # Broken JSON-LD falls through to the next tiers
+    page = '<script type="application/ld+json">{"floorSize": </script><p>powierzchnia: 40 m</p>'
+    assert extract_area(page, to_float) == (40.0, TIER_TEXT)
+
+
+def test_json_ld_only_reads_floor_size_of_offers():
+    # Other numeric values, other nodes and other units are not areas
+    ld = ('{"@type": "Product", "size": 3, "offers": {"@type": "Offer", "value": 12, "area": 7, '
+          '"itemOffered": {"@type": "Apartment", "floorSize": {"value": 90, "unitCode": "FOT"}}}}')
+    page = f'<script type="application/ld+json">{ld}</script><p>powierzchnia: 41 m²</p>'
+    assert extract_area(page, to_float) == (41.0, TIER_TEXT)
+
+    ld = '{"@type": "Offer", "itemOffered": {"@type": "Apartment", "floorSize": 63.5}}'
+    page = f'<script type="application/ld+json">{ld}</script>'
+    assert extract_area(page, to_float) == (63.5, TIER_JSON_LD)
@@ -0,0 +1,74 @@
+import pathlib
+from unittest.mock import patch, MagicMock
+
+from otodom_parser.scraper.http_cache import PageCache
+from otodom_parser.scraper.scraper import OtodomScraper
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def make_response(url, status_code=200, body=b"", headers=None):
+    response = MagicMock()
+    response.url = url
+    response.status_code = status_code
+    response.content = body
+    response.text = body.decode("utf-8")
+    response.headers = headers or {}
+    return response
+
+
+def test_store_and_lookup_roundtrip(tmp_path):
+    """Stored validators come back as conditional request headers"""
+    cache = PageCache(tmp_path)
+    cache.store("https://example.com/a", b"body", etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    cache.save()
+
+    reloaded = PageCache(tmp_path)
+    entry = reloaded.lookup("https://example.com/a")
+    assert reloaded.read_body("https://example.com/a") == b"body"
+    assert reloaded.conditional_headers(entry) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+
+
+def test_lru_eviction(tmp_path):
+    """The least recently used entry is evicted once max_bytes is exceeded"""
+    cache = PageCache(tmp_path, max_bytes=25)
+    cache.store("https://example.com/1", b"x" * 10)
+    cache.store("https://example.com/2", b"y" * 10)
+    cache.record_hit("https://example.com/1")
+    cache.store("https://example.com/3", b"z" * 10)
+
+    assert cache.lookup("https://example.com/1") is not None
+    assert cache.lookup("https://example.com/2") is None
+    assert cache.lookup("https://example.com/3") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_not_modified_page_skips_parsing_and_insertion(tmp_path):
+    """With --preserve, a 304 replays the cached page outcome without inserting"""
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(preserve=True)
+    scraper.page_cache = PageCache(tmp_path)
+    body = LISTING_PAGE.read_bytes()
+    requested = []
+
+    def fake_request(request_url, max_retries=3, headers=None):
+        requested.append(headers)
+        if headers:
+            return make_response(request_url, status_code=304)
+        return make_response(request_url, body=body, headers={"ETag": '"v1"'})
+
+    scraper._make_request = fake_request
+    scraper.writer = MagicMock()
+    first = scraper.scrape_page("wroclaw", "", 1)
+    inserted_first = scraper.writer.add.call_count
+    scraper.writer.reset_mock()
+    second = scraper.scrape_page("wroclaw", "", 1)
+
+    assert inserted_first > 0
+    assert scraper.writer.add.call_count == 0
+    assert second == first
+    assert requested[1] == {"If-None-Match": '"v1"'}
+    assert scraper.page_cache.stats()["not_modified"] == 1
@@ -0,0 +1,75 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from otodom_parser.scraper.http_session import ScraperSession
+from otodom_parser.scraper.scraper import OtodomScraper
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    seen_encodings = []
+
+    def do_GET(self):
+        KeepAliveHandler.seen_encodings.append(self.headers.get("Accept-Encoding"))
+        body = b"<html>ok</html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_reuses_connections(server_url):
+    """Sequential requests share one kept-alive connection"""
+    session = ScraperSession({"User-Agent": "test"}, pool_size=2)
+    for page in range(5):
+        response = session.get(f"{server_url}/?page={page}")
+        assert response.status_code == 200
+
+    stats = session.stats.snapshot()
+    session.close()
+
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+
+
+def test_session_negotiates_compression(server_url):
+    """Every request advertises gzip support"""
+    KeepAliveHandler.seen_encodings.clear()
+    session = ScraperSession(pool_size=1)
+    session.get(server_url)
+    session.close()
+
+    assert "gzip" in KeepAliveHandler.seen_encodings[0]
+
+
+def test_session_counts_failures():
+    """Connection errors are counted and re-raised"""
+    session = ScraperSession(pool_size=1, connect_timeout=0.5, read_timeout=0.5)
+    with pytest.raises(Exception):
+        session.get("http://127.0.0.1:9/")
+
+    stats = session.stats.snapshot()
+    assert stats["requests"] == 1
+    assert stats["failures"] == 1
+    assert stats["reused_connections"] == 0
+
+
+def test_scraper_pool_covers_crawl_and_detail_workers():
+    scraper = OtodomScraper(concurrency=3, enrich_workers=2, http_cache=False)
+    assert scraper.session.session.get_adapter("https://www.otodom.pl")._pool_maxsize == 5
@@ -0,0 +1,167 @@
+import pathlib
+import sqlite3
+from unittest.mock import patch, MagicMock
+
+from otodom_parser.db import rebuild_listing_aggregates
+from otodom_parser.scraper.district_resolver import DistrictResolver
+from otodom_parser.scraper.http_cache import PageCache
+from otodom_parser.scraper.scraper import OtodomScraper
+from otodom_parser.scraper.storage import ListingWriter
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def aggregates(db_file):
+    conn = sqlite3.connect(db_file)
+    incremental = conn.execute("SELECT * FROM listing_aggregates ORDER BY 1, 2, 3, 4").fetchall()
+    rebuild_listing_aggregates(conn.cursor())
+    rebuilt = conn.execute("SELECT * FROM listing_aggregates ORDER BY 1, 2, 3, 4").fetchall()
+    conn.close()
+    assert [row[:5] for row in incremental] == [row[:5] for row in rebuilt]
+    return incremental
+
+
+def test_offers_are_upserted_by_id(tmp_path):
+    db_file = tmp_path / "listings.db"
+    writer = ListingWriter(db_file)
+    page = [("krakow", "podgorze", "podgorze", 50.0, 12000, 2, 2, "1"),
+            ("krakow", "podgorze", "podgorze", 40.0, 11000, 1, 1, "2")]
+    assert writer.write_page(page) == (2, 0)
+    assert writer.write_page(page) == (0, 2)
+    # Offer 2 changed its price, offer 3 is new and listed twice
+    page = [page[0], page[1][:4] + (10000,) + page[1][5:],
+            ("krakow", "nowa-huta", "nowa-huta", 60.0, 9000, 0, 3, "3"),
+            ("krakow", "nowa-huta", "nowa-huta", 60.0, 9000, 0, 3, "3")]
+    assert writer.write_page(page) == (2, 1)
+
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute("SELECT offer_id, price_per_sqm, active FROM listings ORDER BY offer_id").fetchall()
+    conn.close()
+    assert rows == [("1", 12000, 1), ("2", 10000, 1), ("3", 9000, 1)]
+    assert sum(row[4] for row in aggregates(db_file)) == 3
+    writer.close()
+
+
+def test_unseen_offers_are_deactivated_and_come_back(tmp_path):
+    db_file = tmp_path / "listings.db"
+    writer = ListingWriter(db_file)
+    writer.write_page([("lodz", "baluty", "baluty", 45.0, 8000, 0, 2, "1"),
+                       ("lodz", "baluty", "baluty", 45.0, 8500, 0, 3, "2")])
+    seen_since = "9999"
+    writer.write_page([("lodz", "baluty", "baluty", 45.0, 8000, 0, 2, "1")])
+
+    # Only listings matching the room filter of the scrape are considered
+    assert writer.deactivate_unseen("lodz", seen_since, rooms=[1]) == 0
+    assert writer.deactivate_unseen("lodz", seen_since) == 2
+    assert aggregates(db_file) == []
+
+    # A reappearing offer is active again, even with unchanged content
+    assert writer.write_page([("lodz", "baluty", "baluty", 45.0, 8500, 0, 3, "2")]) == (1, 0)
+    assert [row[4] for row in aggregates(db_file)] == [1]
+    writer.close()
+
+
+def test_legacy_table_is_migrated(tmp_path):
+    db_file = tmp_path / "listings.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE listings (id INTEGER PRIMARY KEY, city TEXT, district TEXT, district_parent TEXT, "
+                 "area REAL, price_per_sqm INTEGER, floor INTEGER, rooms INTEGER, scraped_at TEXT)")
+    conn.execute("INSERT INTO listings (city, district, district_parent, area, price_per_sqm, floor, rooms) "
+                 "VALUES ('gdansk', 'oliwa', 'oliwa', 60.0, 14000, 1, 2)")
+    conn.commit()
+    conn.close()
+
+    writer = ListingWriter(db_file)
+    assert writer.write_page([("gdansk", "oliwa", "oliwa", 60.0, 14000, 1, 2, "7")]) == (1, 0)
+    # Rows from before offer ids were stored were never seen by an incremental run
+    assert writer.deactivate_unseen("gdansk", "0") == 1
+    writer.close()
+    assert [row[4] for row in aggregates(db_file)] == [1]
+
+
+def make_scraper(tmp_path, db_file, pages, **kwargs):
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(**{"incremental": True, "city_filter": ["wroclaw"], "http_cache": False, "concurrency": 2,
+                                   **kwargs})
+    scraper.writer = ListingWriter(db_file)
+    scraper.district_resolver = DistrictResolver(tmp_path / "districts.json")
+    requested = []
+
+    def fake_request(url, max_retries=3, headers=None):
+        requested.append(url)
+        page = int(url.split("page=")[1].split("&")[0])
+        return MagicMock(url=url, status_code=200, content=pages(page), headers={})
+
+    scraper._make_request = fake_request
+    return scraper, requested
+
+
+def test_pagination_stops_at_the_first_page_of_known_offers(tmp_path):
+    db_file = tmp_path / "listings.db"
+    body = LISTING_PAGE.read_bytes()
+    scraper, requested = make_scraper(tmp_path, db_file, lambda page: body)
+    assert scraper.start_scraping() is True
+
+    # Every page of the fixture repeats the offers of page 1, so the first window ends the scrape
+    assert len(requested) == 3
+    assert all("by=LATEST&direction=DESC" in url for url in requested)
+    written = scraper.writer.rows_written
+    assert written > 0
+
+    scraper, requested = make_scraper(tmp_path, db_file, lambda page: body)
+    assert scraper.start_scraping() is True
+    assert len(requested) == 1
+    assert scraper.writer.rows_written == 0 and scraper.writer.rows_unchanged == written
+
+
+def test_completely_scraped_city_deactivates_vanished_offers(tmp_path):
+    db_file = tmp_path / "listings.db"
+    with ListingWriter(db_file) as writer:
+        writer.write_page([("wroclaw", "krzyki", "krzyki", 50.0, 11000, 1, 2, "sold")])
+    body = LISTING_PAGE.read_bytes()
+    # The results end after page 1
+    scraper, requested = make_scraper(tmp_path, db_file, lambda page: body if page == 1 else b"<html></html>")
+    assert scraper.start_scraping() is True
+
+    conn = sqlite3.connect(db_file)
+    inactive = conn.execute("SELECT offer_id FROM listings WHERE active = 0").fetchall()
+    active = conn.execute("SELECT COUNT(*) FROM listings WHERE active = 1").fetchone()[0]
+    conn.close()
+    assert inactive == [("sold",)]
+    assert active == scraper.writer.rows_written
+    assert sum(row[4] for row in aggregates(db_file)) == active
+
+
+def test_full_refresh_deactivates_offers_gone_since_the_last_run(tmp_path):
+    db_file = tmp_path / "listings.db"
+    body = LISTING_PAGE.read_bytes()
+    # Offer 66871141 is sold by the second run and a new one takes its place
+    later = body.replace(b'{"id":66871141,', b'{"id":11111111,', 1)
+
+    def active(offer_id):
+        conn = sqlite3.connect(db_file)
+        row = conn.execute("SELECT active FROM listings WHERE offer_id = ?", (offer_id,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    scraper, _ = make_scraper(tmp_path, db_file, lambda page: body)
+    assert scraper.start_scraping() is True
+    assert active("66871141") == 1
+
+    # A quick refresh stops at the first page of known offers and cannot tell what vanished
+    scraper, _ = make_scraper(tmp_path, db_file, lambda page: later, http_cache=True)
+    scraper.page_cache = PageCache(tmp_path / "cache")
+    assert scraper.start_scraping() is True
+    assert (active("66871141"), active("11111111")) == (1, 1)
+
+    # Page 1 is unchanged in the page cache, the full refresh parses it anyway
+    scraper, requested = make_scraper(tmp_path, db_file, lambda page: later, http_cache=True, full_refresh=True)
+    scraper.page_cache = PageCache(tmp_path / "cache")
+    assert scraper.start_scraping() is True
+    assert scraper.page_cache.stats()["hits"] >= 1
+    assert len(requested) == scraper.max_filtered_pages["wroclaw-"]
+    assert (active("66871141"), active("11111111")) == (0, 1)
+    conn = sqlite3.connect(db_file)
+    still_active = conn.execute("SELECT COUNT(*) FROM listings WHERE active = 1").fetchone()[0]
+    conn.close()
+    assert sum(row[4] for row in aggregates(db_file)) == still_active
@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+
+from otodom_parser.db import rebuild_listing_aggregates
+from otodom_parser.scraper.storage import ListingWriter
+
+
+def count_rows(path):
+    conn = sqlite3.connect(path)
+    count = conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_rows_buffered_until_flush(tmp_path):
+    """Nothing reaches the database before flush"""
+    db_file = tmp_path / "listings.db"
+    writer = ListingWriter(db_file, batch_size=100)
+    for i in range(10):
+        writer.add("warszawa", "mokotow", "mokotow", 50.0, 15000 + i, floor=2, rooms=2)
+
+    assert writer.flush() == 10
+    assert count_rows(db_file) == 10
+    assert writer.flush() == 0
+    writer.close()
+
+
+def test_automatic_flush_at_batch_size(tmp_path):
+    """Reaching batch_size writes the buffer without an explicit flush"""
+    db_file = tmp_path / "listings.db"
+    writer = ListingWriter(db_file, batch_size=5)
+    for i in range(12):
+        writer.add("krakow", "krowodrza", "krowodrza", 40.0, 12000)
+
+    assert count_rows(db_file) == 10
+    writer.close()
+    assert count_rows(db_file) == 12
+    assert writer.rows_written == 12
+
+
+def test_written_values(tmp_path):
+    db_file = tmp_path / "listings.db"
+    with ListingWriter(db_file) as writer:
+        writer.add("gdansk", "oliwa", "oliwa", 61.5, 14000, floor=0, rooms=None)
+
+    conn = sqlite3.connect(db_file)
+    row = conn.execute("SELECT city, district, district_parent, area, price_per_sqm, floor, rooms FROM listings").fetchone()
+    conn.close()
+    assert row == ("gdansk", "oliwa", "oliwa", 61.5, 14000, 0, None)
+
+
+def test_concurrent_writers_share_connection(tmp_path):
+    """Worker threads can add rows to one writer concurrently"""
+    db_file = tmp_path / "listings.db"
+    writer = ListingWriter(db_file, batch_size=7)
+
+    def worker():
+        for _ in range(50):
+            writer.add("lodz", "baluty", "baluty", 45.0, 8000)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.close()
+
+    assert count_rows(db_file) == 200
+
+
+def test_aggregates_follow_writes_and_match_rebuild(tmp_path):
+    """Incremental rollup updates equal a full recomputation from listings"""
+    db_file = tmp_path / "listings.db"
+    writer = ListingWriter(db_file, batch_size=4)
+    for i in range(30):
+        writer.add("warszawa", f"child-{i % 3}", "mokotow", 50.0, 10000 + 100 * i, rooms=[None, 0, 1, 2, 3, 5][i % 6])
+    writer.close()
+
+    conn = sqlite3.connect(db_file)
+    incremental = conn.execute("SELECT * FROM listing_aggregates ORDER BY 1, 2, 3, 4").fetchall()
+    rebuild_listing_aggregates(conn.cursor())
+    rebuilt = conn.execute("SELECT * FROM listing_aggregates ORDER BY 1, 2, 3, 4").fetchall()
+    n, total = conn.execute("SELECT SUM(n), SUM(sum_ppsm) FROM listing_aggregates").fetchone()
+    conn.close()
+
+    assert incremental == rebuilt
+    assert {row[3] for row in incremental} == {"unknown", "0", "1", "2", "3+"}
+    assert (n, total) == (30, sum(10000 + 100 * i for i in range(30)))
@@ -0,0 +1,70 @@
+import pathlib
+import json
+import logging
+from unittest.mock import patch
+
+from otodom_parser.scraper.offer_parser import OfferRecord, parse_offer, parse_offer_json
+
+FIXTURES = pathlib.Path(__file__).resolve().parent / "fixtures"
+
+
+def test_price_from_per_square_meter_fallback():
+    """Same offer as tests/test_price_fallback.py"""
+    offer = {
+        "pricePerSquareMeter": None,
+        "totalPrice": None,
+        "areaInSquareMeters": 50,
+        "priceFromPerSquareMeter": {"value": 18120, "currency": "PLN"},
+        "location": {"reverseGeocoding": {"locations": []}},
+        "id": "test_offer"
+    }
+    assert parse_offer_json(offer) == {
+        'area': 50.0, 'price_per_sqm': 18120, 'floor': 0, 'rooms': None,
+        'city': '', 'district': 'unknown', 'district_parent': 'unknown'
+    }
+
+
+def test_v4_offer_calculates_price_per_sqm():
+    """Same offer as tests/test_extract_format_v4.py"""
+    with open(FIXTURES / "next_data_v4.json", encoding="utf-8") as f:
+        data = json.load(f)
+    offer = data["props"]["pageProps"]["dehydratedState"]["queries"][0]["state"]["data"]["searchAds"]["results"][0]
+
+    record = parse_offer(offer)
+    assert isinstance(record, OfferRecord)
+    assert record.area == 42.0
+    assert record.price_per_sqm == round(500000 / 42.0)
+    assert record.floor == 3
+    assert (record.city, record.district) == ("warszawa", "mokotów")
+    assert parse_offer_json(offer) == record._asdict()
+
+
+def test_enum_fields_and_reverse_geocoding():
+    offer = {
+        "areaInSquareMeters": "48,5 m²",
+        "pricePerSquareMeter": {"value": "15 230"},
+        "floorNumber": "ABOVE_TENTH",
+        "roomsNumber": "STUDIO",
+        "location": {
+            "address": {"city": {"name": "Kraków"}},
+            "reverseGeocoding": {"locations": [{"id": "malopolskie/krakow/krakow/podgorze/zablocie"}]},
+        },
+    }
+    assert parse_offer(offer) == OfferRecord(48.5, 15230, 11, 0, "kraków", "zablocie", "podgorze")
+    assert parse_offer({"areaInSquareMeters": None, "price": 1}) is None
+    assert parse_offer({"areaInSquareMeters": 30}) is None
+
+
+def test_debug_messages_only_formatted_at_debug_level():
+    offer = {"areaInM2": 42.0, "price": 500000, "location": {"city": "Warszawa"}}
+    level = logging.root.level
+    try:
+        with patch("otodom_parser.scraper.offer_parser.logging.debug") as debug:
+            logging.root.setLevel(logging.INFO)
+            parse_offer(offer)
+            assert debug.call_count == 0
+            logging.root.setLevel(logging.DEBUG)
+            parse_offer(offer)
+            assert debug.call_count > 0
+    finally:
+        logging.root.setLevel(level)
@@ -0,0 +1,65 @@
+import pathlib
+import gzip
+from unittest.mock import patch, MagicMock
+
+from otodom_parser.scraper.district_resolver import DistrictResolver
+from otodom_parser.scraper.page_archive import PageArchive
+from otodom_parser.scraper.replay import ReplaySource
+from otodom_parser.scraper.scraper import OtodomScraper
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def test_pages_are_read_back_individually(tmp_path):
+    """Any page can be read without the others; the newest capture wins"""
+    archive = PageArchive(tmp_path, segment_bytes=1, codec="gz")
+    for page in range(1, 6):
+        archive.append("wroclaw", "", page, f"page {page}".encode() * 100)
+    archive.append("wroclaw", "", 3, b"page 3 again")
+    archive.close()
+
+    # Every frame went over the 1-byte segment limit, so each one started a new segment
+    assert len(list(tmp_path.glob("segment-*.gz"))) == 6
+    assert archive.read("wroclaw", "", 4) == b"page 4" * 100
+    assert archive.read("wroclaw", "", 3) == b"page 3 again"
+    first = archive.captures("wroclaw", "", 3)[0]
+    assert archive.read("wroclaw", "", 3, timestamp=first["ts"]) == b"page 3" * 100
+    assert archive.read("krakow", "", 1) is None
+    assert archive.stats()["pages"] == 6
+
+
+def test_archive_reopens_and_appends(tmp_path):
+    """The index is reloaded from disk and new pages go after the existing ones"""
+    archive = PageArchive(tmp_path, codec="gz")
+    archive.append("krakow", "podgorze", 1, b"first")
+    archive.close()
+    # A torn index line from a killed run is skipped
+    with open(tmp_path / "index.jsonl", "a") as f:
+        f.write('{"city": "kra')
+
+    archive = PageArchive(tmp_path, codec="gz")
+    archive.append("krakow", "podgorze", 2, b"second")
+    archive.flush()
+    assert archive.keys() == [("krakow", "podgorze", 1), ("krakow", "podgorze", 2)]
+    assert archive.read("krakow", "podgorze", 2) == b"second"
+    archive.close()
+    # Concatenated gzip members are one valid stream
+    assert gzip.decompress((tmp_path / "segment-00000.gz").read_bytes()) == b"firstsecond"
+
+
+def test_scraped_pages_are_archived_and_replayable(tmp_path):
+    body = LISTING_PAGE.read_bytes()
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(preserve=True, city_filter=["wroclaw"], http_cache=False, archive_dir=tmp_path / "archive")
+    scraper.writer = MagicMock()
+    scraper.district_resolver = DistrictResolver(tmp_path / "districts.json")
+    scraper._make_request = lambda url, max_retries=3, headers=None: MagicMock(
+        url=url, status_code=200, content=body, headers={})
+    assert scraper.start_scraping() is True
+
+    source = ReplaySource(tmp_path / "archive")
+    # The fixture reports 276 listings, i.e. 8 pages
+    assert len(source) == 8
+    assert source.cities() == ["wroclaw"]
+    assert source.read("wroclaw", "", 8) == body
+    assert scraper.page_archive.stats()["ratio"] > 1
@@ -0,0 +1,48 @@
+import json
+import pathlib
+
+from bs4 import BeautifulSoup
+
+from otodom_parser.scraper.page_extract import find_next_data, find_total_listings, find_max_pagination_page
+from otodom_parser.scraper.scraper import OtodomScraper
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def test_next_data_matches_soup_extraction():
+    """The byte slice decodes to the same JSON BeautifulSoup finds"""
+    raw = LISTING_PAGE.read_bytes()
+    soup = BeautifulSoup(raw.decode("utf-8"), "html.parser")
+    expected = json.loads(soup.find("script", id="__NEXT_DATA__").string)
+
+    assert json.loads(find_next_data(raw)) == expected
+
+
+def test_total_listings_from_meta_description():
+    """The listing count is read from the raw page"""
+    assert find_total_listings(LISTING_PAGE.read_bytes()) == 276
+
+
+def test_next_data_marker_inside_other_script_is_ignored():
+    """Only a script tag whose id is __NEXT_DATA__ is sliced"""
+    page = (b"<html><script>window.x = '__NEXT_DATA__';</script>"
+            b"<script id='__NEXT_DATA__' type='application/json'>{\"a\": 1}</script></html>")
+    assert json.loads(find_next_data(page)) == {"a": 1}
+
+
+def test_missing_next_data():
+    assert find_next_data(b"<html><body>nothing here</body></html>") is None
+
+
+def test_pagination_fallback():
+    page = b'<a class="pagination__page" href="#">1</a><a class="pagination__page" href="#">7</a>'
+    assert find_max_pagination_page(page) == 7
+    assert find_max_pagination_page(b"<html></html>") is None
+
+
+def test_legacy_initial_state_parsed_from_raw_html():
+    """extract_offers builds a soup from raw html only for the legacy strategy"""
+    scraper = OtodomScraper.__new__(OtodomScraper)
+    html = b'<html><script>window.__INITIAL_STATE__ = {"listing": {"ads": [{"id": 1}]}};</script></html>'
+
+    assert scraper.extract_offers({"props": {}}, html=html) == [{"id": 1}]
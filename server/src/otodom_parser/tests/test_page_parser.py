@@ -0,0 +1,60 @@
+import json
+import pathlib
+import runpy
+import sys
+from unittest.mock import patch, MagicMock
+
+from otodom_parser.scraper.page_extract import extract_offers, find_next_data
+from otodom_parser.scraper.page_parser import parse_page, offers_to_rows, NO_NEXT_DATA, NO_OFFERS
+from otodom_parser.scraper.district_resolver import DistrictResolver
+from otodom_parser.scraper.scraper import OtodomScraper
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+RUN_SCRAPER = pathlib.Path(__file__).resolve().parents[1] / "run_scraper.py"
+
+
+def test_parse_page_returns_compact_rows():
+    body = LISTING_PAGE.read_bytes()
+    error, total_pages, offer_count, rows, pending = parse_page(body)
+
+    offers = extract_offers(json.loads(find_next_data(body)))
+    assert error is None
+    assert total_pages == 8
+    assert offer_count == len(offers)
+    assert rows == offers_to_rows(offers)
+    assert all(isinstance(row, tuple) and len(row) == 7 for row in rows)
+    # Every offer on the fixture lists its area
+    assert pending == []
+
+
+def test_parse_page_reports_unusable_pages():
+    assert parse_page(b"<html></html>")[0] == NO_NEXT_DATA
+    empty = b'<script id="__NEXT_DATA__" type="application/json">{"props": {}}</script>'
+    assert parse_page(empty)[0] == NO_OFFERS
+
+
+def test_process_pool_mode_writes_the_same_rows(tmp_path):
+    """--parse-workers ships pages to worker processes and writes identical rows"""
+    body = LISTING_PAGE.read_bytes()
+    written = {}
+    for parse_workers in (0, 2):
+        with patch('otodom_parser.scraper.scraper.setup_database'):
+            scraper = OtodomScraper(preserve=True, city_filter=["wroclaw"], http_cache=False,
+                                    parse_workers=parse_workers)
+        scraper.writer = MagicMock()
+        scraper.district_resolver = DistrictResolver(tmp_path / "districts.json")
+        scraper._make_request = lambda url, max_retries=3, headers=None: MagicMock(
+            url=url, status_code=200, content=body, headers={})
+        assert scraper.start_scraping() is True
+        written[parse_workers] = sorted(map(repr, scraper.writer.add.call_args_list))
+
+    assert written[0] and written[0] == written[2]
+
+
+def test_worker_processes_do_not_rerun_the_script(monkeypatch):
+    """Spawned pool workers import the main module as __mp_main__, which must not start a scrape"""
+    monkeypatch.setattr(sys, "argv", ["run_scraper.py", "--parse-workers", "2"])
+    with patch('otodom_parser.scraper.OtodomScraper') as scraper_class:
+        namespace = runpy.run_path(str(RUN_SCRAPER), run_name="__mp_main__")
+    assert "main" in namespace
+    scraper_class.assert_not_called()
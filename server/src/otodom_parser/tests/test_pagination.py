@@ -0,0 +1,58 @@
+import pathlib
+import json
+import threading
+from unittest.mock import patch
+
+from otodom_parser.scraper.page_extract import find_next_data
+from otodom_parser.scraper.page_parser import count_pages
+from otodom_parser.scraper.pagination import (
+    find_pagination, plan_pages, should_continue_pagination, total_pages_from_pagination
+)
+from otodom_parser.scraper.scraper import OtodomScraper
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def test_page_count_comes_from_the_json_pagination():
+    raw = LISTING_PAGE.read_bytes()
+    data = json.loads(find_next_data(raw))
+    assert find_pagination(data)["totalItems"] == 276
+    assert count_pages(raw, data) == 8
+
+    page = ('<meta name="description" content="Zobacz 360 ogłoszeń"><script id="__NEXT_DATA__">'
+            '{"props": {"pageProps": {"data": {"searchAds": {"items": [], '
+            '"pagination": {"totalItems": 50, "itemsPerPage": 24}}}}}}</script>').encode("utf-8")
+    assert count_pages(page, json.loads(find_next_data(page))) == 3
+    # Without the JSON the meta description count is used
+    assert count_pages(page) == 10
+    assert total_pages_from_pagination({"currentPage": 1}) is None
+
+
+def test_plan_and_end_of_results():
+    assert plan_pages(8) == [2, 3, 4, 5, 6, 7, 8]
+    assert plan_pages(8, max_pages=3) == [2, 3]
+    assert plan_pages(8, last_available=1) == []
+    # Filtered-out offers do not end the results, an empty page does
+    assert should_continue_pagination("wroclaw", "", 2, 36, {}) is True
+    assert should_continue_pagination("wroclaw", "", 2, 0, {}) is False
+    assert should_continue_pagination("wroclaw", "", 8, 36, {"wroclaw-": 8}) is False
+
+
+def test_unknown_page_count_dispatches_windows_of_pages():
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(preserve=True, city_filter=["warszawa"], concurrency=3)
+    pages = []
+    lock = threading.Lock()
+
+    def fake_fetch(work):
+        with lock:
+            pages.append(work.page)
+        # No page count is ever announced and the results end after page 5
+        work.outcome = (work.page < 6, 36 if work.page < 6 else 0)
+        return work
+
+    scraper._fetch_stage = fake_fetch
+    assert scraper.start_scraping() is True
+
+    # Page 1, then windows 2-4 and 5-7; page 6 is empty so no further window is sent
+    assert sorted(pages) == [1, 2, 3, 4, 5, 6, 7]
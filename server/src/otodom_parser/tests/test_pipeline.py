@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from otodom_parser.scraper.pipeline import Pipeline, Stage
+
+
+def test_items_pass_through_every_stage():
+    with Pipeline([Stage("double", lambda x: x * 2, workers=3), Stage("inc", lambda x: x + 1)]) as pipeline:
+        futures = [pipeline.submit(i) for i in range(50)]
+        results = [future.result(timeout=5) for future in futures]
+    assert results == [i * 2 + 1 for i in range(50)]
+    metrics = pipeline.metrics()
+    assert metrics["double"]["processed"] == 50
+    assert metrics["inc"]["processed"] == 50
+    assert metrics["double"]["workers"] == 3
+
+
+def test_stage_errors_resolve_the_future():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    with Pipeline([Stage("check", fail_on_three), Stage("keep", lambda x: x)]) as pipeline:
+        futures = [pipeline.submit(i) for i in range(5)]
+        with pytest.raises(ValueError):
+            futures[3].result(timeout=5)
+        assert futures[4].result(timeout=5) == 4
+    assert pipeline.metrics()["check"]["failed"] == 1
+
+
+def test_bounded_queue_applies_backpressure():
+    """A blocked stage holds back upstream work instead of buffering it"""
+    release = threading.Event()
+
+    def slow(x):
+        release.wait()
+        return x
+
+    pipeline = Pipeline([Stage("fast", lambda x: x), Stage("slow", slow)], queue_size=2)
+    pipeline.start()
+    submitter = threading.Thread(target=lambda: [pipeline.submit(i) for i in range(20)])
+    submitter.start()
+    time.sleep(0.2)
+
+    metrics = pipeline.metrics()
+    assert submitter.is_alive()
+    assert metrics["slow"]["max_queue_depth"] <= 2
+    assert metrics["fast"]["processed"] <= 5
+
+    release.set()
+    submitter.join(timeout=5)
+    pipeline.close()
+    assert pipeline.metrics()["slow"]["processed"] == 20
+
+
+def test_network_and_write_time_overlap():
+    """Fetch and write latencies of different pages overlap rather than add up"""
+    def fetch(x):
+        time.sleep(0.02)
+        return x
+
+    def write(x):
+        time.sleep(0.02)
+        return x
+
+    start = time.perf_counter()
+    with Pipeline([Stage("fetch", fetch, workers=2), Stage("write", write)]) as pipeline:
+        for future in [pipeline.submit(i) for i in range(20)]:
+            future.result(timeout=5)
+    elapsed = time.perf_counter() - start
+
+    # Serially this takes 20 * 0.04s; pipelined the single writer is the bottleneck
+    assert elapsed < 0.6
@@ -0,0 +1,118 @@
+import cProfile
+import pathlib
+import pstats
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from otodom_parser.scraper.profiling import PROFILER, Profiler, SpanStats
+from otodom_parser.scraper.scraper import OtodomScraper
+from otodom_parser.scraper.storage import ListingWriter
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    # The same no-op span is handed out every time
+    assert profiler.span("a") is profiler.span("b")
+    with profiler.span("a"):
+        pass
+    assert profiler.summary() == []
+
+
+def test_spans_are_aggregated_across_threads():
+    profiler = Profiler()
+    profiler.start()
+
+    def work():
+        for _ in range(50):
+            with profiler.span("fast"):
+                pass
+        with profiler.span("slow"):
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    profiler.stop()
+
+    rows = {row["name"]: row for row in profiler.summary()}
+    assert rows["fast"]["count"] == 200 and rows["slow"]["count"] == 4
+    assert profiler.summary()[0]["name"] == "slow"
+    assert 10 <= rows["slow"]["p50_ms"] <= rows["slow"]["max_ms"]
+    assert "slow" in profiler.format_summary()
+
+
+def test_histogram_percentiles():
+    stats = SpanStats()
+    for ms in [1] * 90 + [100] * 10:
+        stats.add(ms / 1000)
+    # Bucket bounds are powers of two microseconds, capped at the maximum
+    assert stats.percentile(50) == 1024 / 1_000_000
+    assert stats.percentile(95) == 0.1
+
+
+def busy_thread_work():
+    return sum(range(1000))
+
+
+def test_threads_started_while_cprofile_runs():
+    profiler = Profiler()
+    errors = []
+    threading_excepthook = threading.excepthook
+    threading.excepthook = lambda args: errors.append(args.exc_value)
+    try:
+        profiler.start(cprofile=True)
+        thread = threading.Thread(target=busy_thread_work)
+        thread.start()
+        thread.join()
+        profiler.stop()
+    finally:
+        threading.excepthook = threading_excepthook
+
+    # Enabling a second profile on 3.12+ used to raise in every new thread
+    assert errors == []
+    assert "busy_thread_work" in {func[2] for func in profiler.pstats.stats}
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="profilers only exclude each other on sys.monitoring")
+def test_cprofile_already_active_is_not_fatal():
+    other = cProfile.Profile()
+    other.enable()
+    try:
+        profiler = Profiler()
+        profiler.start(cprofile=True)
+        with profiler.span("a"):
+            pass
+        profiler.stop()
+    finally:
+        other.disable()
+    assert profiler.pstats is None
+    assert [row["name"] for row in profiler.summary()] == ["a"]
+
+
+def test_profiled_scrape_writes_summary_and_pstats(tmp_path, caplog):
+    pages = tmp_path / "pages"
+    pages.mkdir()
+    for page in (1, 2):
+        (pages / f"wroclaw__{page}.html").write_bytes(LISTING_PAGE.read_bytes())
+    output = tmp_path / "run.pstats"
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(preserve=True, replay=pages, max_pages=2, profile=True, profile_output=output)
+    scraper.writer = ListingWriter(tmp_path / "listings.db")
+    with caplog.at_level("INFO"):
+        assert scraper.start_scraping() is True
+
+    assert not PROFILER.enabled
+    spans = {row["name"]: row["count"] for row in PROFILER.summary()}
+    assert spans["decode.json_loads"] == 2 and spans["parse.offers_to_rows"] == 2 and spans["write.sqlite"] == 2
+    assert "decode.json_loads" in caplog.text
+    # Pages 2..N are parsed on pipeline threads, which are profiled as well
+    functions = {func[2] for func in pstats.Stats(str(output)).stats}
+    assert "offers_to_rows" in functions
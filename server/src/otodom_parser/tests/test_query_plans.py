@@ -0,0 +1,82 @@
+import pytest
+
+from otodom_parser import db, db_scraper
+from otodom_parser.db_connection import connect
+from otodom_parser.db_scraper import ScraperDB
+
+
+@pytest.fixture
+def traced(tmp_path, monkeypatch):
+    """Temp database with both tables; yields the list of SELECT statements run against it"""
+    db_file = tmp_path / "plans.db"
+    monkeypatch.setattr(db, "db_path", db_file)
+    db.setup_database()
+    scraper_db = ScraperDB(db_file)
+    scraper_db.setup_database()
+
+    statements = []
+
+    def traced_connect(path, **kwargs):
+        conn = connect(path, **kwargs)
+        conn.set_trace_callback(lambda sql: statements.append(sql) if sql.lstrip().upper().startswith("SELECT") else None)
+        return conn
+
+    monkeypatch.setattr(db, "connect", traced_connect)
+    monkeypatch.setattr(db_scraper, "connect", traced_connect)
+    return db_file, scraper_db, statements
+
+
+# Raw tables that must never be scanned; the listing_aggregates rollup is O(groups) by design
+INDEXED_TABLES = ("listings", "offers")
+
+
+def full_scans(db_file, statements):
+    conn = connect(db_file)
+    scans = []
+    for sql in statements:
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall():
+            detail = row[-1]
+            if detail.split()[:2] in (["SCAN", table] for table in INDEXED_TABLES) and "INDEX" not in detail:
+                scans.append((sql, detail))
+    conn.close()
+    return scans
+
+
+def test_setup_database_is_idempotent_and_drops_obsolete_indexes(traced):
+    db_file, scraper_db, _ = traced
+    conn = connect(db_file)
+    conn.execute("CREATE INDEX idx_listings_obsolete ON listings (area)")
+    conn.commit()
+    conn.close()
+
+    db.setup_database()
+    scraper_db.setup_database()
+
+    conn = connect(db_file)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+    conn.close()
+    assert names == set(db.LISTINGS_INDEXES) | set(db_scraper.OFFERS_INDEXES)
+
+
+def test_dashboard_queries_use_indexes(traced):
+    db_file, _, statements = traced
+    db.get_all_cities()
+    db.get_last_updated_timestamp()
+    db.get_city_stats("warszawa")
+    db.get_city_district_stats("warszawa")
+
+    assert len(statements) >= 4
+    assert full_scans(db_file, statements) == []
+
+
+def test_offer_queries_use_indexes(traced):
+    db_file, scraper_db, statements = traced
+    scraper_db.get_recent_ids("2024-01-01T00:00:00")
+    scraper_db.clear_offers_scraped_before("2024-01-01T00:00:00")
+    scraper_db.get_offer("abc")
+    for city, district in ((None, None), ("warszawa", None), (None, "wola"), ("warszawa", "wola")):
+        scraper_db.count_offers(city=city, district=district)
+        scraper_db.get_offers(city=city, district=district)
+
+    assert len(statements) >= 10
+    assert full_scans(db_file, statements) == []
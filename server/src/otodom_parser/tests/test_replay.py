@@ -0,0 +1,73 @@
+import pathlib
+import sqlite3
+import tarfile
+from unittest.mock import patch
+
+import pytest
+
+from otodom_parser.scraper.replay import ReplaySource
+from otodom_parser.scraper.scraper import OtodomScraper
+from otodom_parser.scraper.storage import ListingWriter
+
+LISTING_PAGE = pathlib.Path(__file__).resolve().parents[1] / "scraper" / "fixtures" / "listing_page_1.html"
+
+
+def save_pages(directory, city, district, pages):
+    body = LISTING_PAGE.read_bytes()
+    for page in pages:
+        (directory / f"{city}_{district}_{page}.html").write_bytes(body)
+    (directory / f"{city}_{district}_1_data.json").write_text("[]")
+
+
+def replay(source, db_file, **kwargs):
+    with patch('otodom_parser.scraper.scraper.setup_database'):
+        scraper = OtodomScraper(preserve=True, replay=source, **kwargs)
+    scraper.writer = ListingWriter(db_file)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("replay must not touch the network")
+
+    scraper._make_request = no_network
+    assert scraper.start_scraping() is True
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute("SELECT city, district, district_parent, area, price_per_sqm, floor, rooms "
+                        "FROM listings ORDER BY 1, 2, 3, 4, 5, 6, 7").fetchall()
+    conn.close()
+    return rows
+
+
+def test_source_indexes_saved_pages(tmp_path):
+    save_pages(tmp_path, "wroclaw", "", [1, 2, 3])
+    save_pages(tmp_path, "krakow", "podgorze", [1])
+    source = ReplaySource(tmp_path)
+
+    assert len(source) == 4
+    assert source.cities() == ["krakow", "wroclaw"]
+    assert source.districts("krakow") == ["podgorze"]
+    assert source.last_page("wroclaw", "") == 3
+    assert source.read("wroclaw", "", 4) is None
+    assert source.read("wroclaw", "", 2) == LISTING_PAGE.read_bytes()
+
+
+def test_empty_source_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ReplaySource(tmp_path)
+
+
+def test_replay_directory_and_archive_store_the_same_rows(tmp_path):
+    pages_dir = tmp_path / "pages"
+    pages_dir.mkdir()
+    # Page 1 announces 8 pages, only the saved ones are replayed
+    save_pages(pages_dir, "wroclaw", "", [1, 2, 3])
+    archive = tmp_path / "pages.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(pages_dir, arcname="debug")
+
+    from_dir = replay(pages_dir, tmp_path / "dir.db")
+    from_archive = replay(archive, tmp_path / "archive.db")
+    one_page = replay(pages_dir, tmp_path / "one.db", max_pages=1)
+
+    assert from_dir and from_dir == from_archive
+    # Every saved page holds the same offers, which are stored once
+    assert from_dir == one_page
+    assert {row[0] for row in from_dir} == {"wroclaw"}
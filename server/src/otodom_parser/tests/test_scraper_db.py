@@ -0,0 +1,41 @@
+from otodom_parser.db_scraper import ScraperDB
+
+
+def make_offers(ids, scraped_at, price=500000.0):
+    return [{"id": str(i), "title": f"Offer {i}", "city": "warszawa", "district": "wola",
+             "price": price, "rooms": 2, "scraped_at": scraped_at} for i in ids]
+
+
+def test_upsert_inserts_and_updates_in_one_call(tmp_path):
+    scraper_db = ScraperDB(tmp_path / "offers.db")
+    assert scraper_db.upsert_offers(make_offers(range(100), 1.0)) == 100
+    # Half of them again with a new price, plus new ones
+    assert scraper_db.upsert_offers(make_offers(range(50, 150), 2.0, price=450000.0)) == 100
+
+    assert scraper_db.count_offers() == 150
+    assert scraper_db.get_offer("10")["price"] == 500000.0
+    assert scraper_db.get_offer("75")["price"] == 450000.0
+    assert scraper_db.get_offer("75")["title"] == "Offer 75"
+    assert scraper_db.insert_offer(make_offers([7], 3.0, price=1.0)[0]) is True
+    assert scraper_db.get_offer("7")["price"] == 1.0
+
+
+def test_failed_batch_writes_nothing(tmp_path):
+    scraper_db = ScraperDB(tmp_path / "offers.db")
+    offers = make_offers(range(10), 1.0) + [{"title": "no id"}]
+    assert scraper_db.upsert_offers(offers) == 0
+    assert scraper_db.count_offers() == 0
+
+
+def test_stale_offers_are_evicted(tmp_path):
+    scraper_db = ScraperDB(tmp_path / "offers.db")
+    scraper_db.upsert_offers(make_offers(range(40_000), 1.0))
+    # More kept ids than SQLite allows bound parameters in one statement
+    assert scraper_db.clear_old_offers(exclude_ids=[str(i) for i in range(35_000)] + ["missing"]) == 5_000
+    assert scraper_db.count_offers() == 35_000
+
+    # A new generation rewrites the offers it still sees and evicts the rest
+    scraper_db.upsert_offers(make_offers(range(30_000), 2.0))
+    assert scraper_db.clear_offers_scraped_before(2.0) == 5_000
+    assert scraper_db.count_offers() == 30_000
+    assert scraper_db.clear_old_offers() == 30_000
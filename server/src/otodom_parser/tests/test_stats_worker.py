@@ -0,0 +1,99 @@
+import io
+import sys
+import json
+import pathlib
+import sqlite3
+import subprocess
+
+import pytest
+
+from otodom_parser import stats_worker
+
+WORKER_SCRIPT = pathlib.Path(stats_worker.__file__)
+
+
+@pytest.fixture(autouse=True)
+def worker_db(tmp_path, monkeypatch):
+    """The worker imports db as a top-level module, so point that one at a temporary database too"""
+    db_file = tmp_path / "worker.db"
+    monkeypatch.setattr(stats_worker.db, "db_path", db_file)
+    monkeypatch.setattr(stats_worker, "_rollup_ready", False)
+    stats_worker.db.setup_database()
+    return db_file
+
+
+def run_worker(db_file, *args, requests=""):
+    return subprocess.run([sys.executable, str(WORKER_SCRIPT), "--db", str(db_file), *args],
+                          input=requests, capture_output=True, text=True, timeout=30)
+
+
+def test_handle_request_rejects_unknown_functions():
+    response = stats_worker.handle_request({"id": 7, "fn": "clear_listings", "args": []})
+    assert response == {"id": 7, "error": "Unknown function: clear_listings"}
+
+
+def test_serve_answers_each_line(monkeypatch):
+    monkeypatch.setattr(stats_worker.db, "get_all_cities", lambda: ["krakow", "warszawa"])
+    stdin = io.StringIO('{"id": 1, "fn": "get_all_cities"}\nnot json\n')
+    stdout = io.StringIO()
+
+    stats_worker.serve(stdin, stdout)
+
+    lines = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert lines[0] == {"ready": True}
+    assert lines[1] == {"id": 1, "result": ["krakow", "warszawa"]}
+    assert lines[2]["id"] is None and "Invalid request" in lines[2]["error"]
+
+
+def test_serve_survives_malformed_requests_and_results(monkeypatch):
+    monkeypatch.setattr(stats_worker.db, "get_all_cities", lambda: {"krakow"})
+    stdin = io.StringIO('[]\n1\n{"id": 3, "fn": "get_all_cities"}\n{"id": 4, "fn": "get_city_stats", "args": 5}\n')
+    stdout = io.StringIO()
+
+    stats_worker.serve(stdin, stdout)
+
+    lines = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert len(lines) == 5
+    assert lines[1]["id"] is None and "Invalid request" in lines[1]["error"]
+    assert lines[2]["id"] is None and "Invalid request" in lines[2]["error"]
+    # A set is not JSON serializable
+    assert lines[3]["id"] == 3 and "Unserializable result" in lines[3]["error"]
+    assert lines[4]["id"] == 4 and "error" in lines[4]
+
+
+def test_resident_worker_serves_many_requests(tmp_path):
+    """One worker process answers a stream of requests against the given database"""
+    db_file = tmp_path / "stats.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE listings (id INTEGER PRIMARY KEY, city TEXT, district TEXT, district_parent TEXT, "
+                 "area REAL, price_per_sqm REAL, floor INTEGER, rooms INTEGER, scraped_at TEXT)")
+    conn.executemany("INSERT INTO listings (city, district, district_parent, area, price_per_sqm, rooms) VALUES (?, ?, ?, ?, ?, ?)",
+                     [("warszawa", "wola", "wola", 40.0, 16000, 2), ("krakow", "podgorze", "podgorze", 50.0, 14000, 1)])
+    conn.commit()
+    conn.close()
+
+    # The rollup is built once, before the workers start
+    assert run_worker(db_file, "--setup").returncode == 0
+    requests = "".join(json.dumps({"id": i, "fn": "get_all_cities"}) + "\n" for i in range(20))
+    completed = run_worker(db_file, requests=requests)
+
+    lines = [json.loads(line) for line in completed.stdout.splitlines()]
+    assert lines[0] == {"ready": True}
+    assert [line["id"] for line in lines[1:]] == list(range(20))
+    assert all(line["result"] == ["krakow", "warszawa"] for line in lines[1:])
+
+
+def test_worker_does_not_migrate_the_database(tmp_path):
+    db_file = tmp_path / "old.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE listings (id INTEGER PRIMARY KEY, city TEXT)")
+    conn.close()
+
+    completed = run_worker(db_file, requests=json.dumps({"id": 1, "fn": "get_all_cities"}) + "\n")
+
+    lines = [json.loads(line) for line in completed.stdout.splitlines()]
+    assert lines[1]["id"] == 1 and "listing_aggregates" in lines[1]["error"]
+    conn = sqlite3.connect(db_file)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert tables == {"listings"}
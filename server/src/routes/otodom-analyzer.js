@@ -3,11 +3,15 @@ const { spawn } = require('child_process');
 const path = require('path');
 const sqlite3 = require('sqlite3').verbose();
 const fs = require('fs');
+const readline = require('readline');
 
 const router = express.Router();
 const DB_PATH = path.join(__dirname, '../otodom_parser/otodom.db');
 const LOG_PATH = path.resolve(process.cwd(), 'parser_errors.log');
 
+// The scraper writes NDJSON progress events to this inherited file descriptor
+const EVENTS_FD = 3;
+
 // Script paths
 const SCRIPT_DIR = path.resolve(__dirname, '../otodom_parser');
 const SCRIPT = path.join(__dirname, '../otodom_parser/run_scraper.py');
@@ -19,9 +23,125 @@ let scraperStatus = {
   progress: 0,
   error: false,
   lastStarted: null,
-  isRunning: false
+  isRunning: false,
+  metrics: null
 };
 
+// Apply one NDJSON event from the scraper's event channel to scraperStatus
+function handleScraperEvent(line) {
+  let event;
+  try {
+    event = JSON.parse(line);
+  } catch (error) {
+    console.error(`Invalid scraper event: ${line}`);
+    return;
+  }
+
+  if (event.type === 'progress') {
+    scraperStatus.status = event.status;
+    scraperStatus.progress = event.progress;
+    scraperStatus.error = event.error;
+    scraperStatus.metrics = {
+      elapsed_s: event.elapsed_s,
+      counters: event.counters,
+      rates: event.rates,
+      http: event.http,
+      cities: event.cities,
+      enrichment: event.enrichment
+    };
+  } else if (event.type === 'done') {
+    scraperStatus.status = event.status;
+    scraperStatus.error = event.error;
+  } else if (event.type === 'error') {
+    scraperStatus.error = true;
+    scraperStatus.status = `Failed: ${event.message}`;
+  }
+}
+
+// Stats are read from the listing_aggregates rollup maintained by the scraper.
+// The raw listings queries are only used for databases that predate the rollup.
+const CITY_STATS_QUERY = `
+  SELECT city,
+         ROUND(SUM(sum_ppsm) / SUM(n), 0) AS avg_price_sqm,
+         SUM(n) AS listing_count
+  FROM listing_aggregates
+  GROUP BY city
+  ORDER BY avg_price_sqm DESC
+`;
+
+const LEGACY_CITY_STATS_QUERY = `
+  SELECT city,
+         ROUND(AVG(price_per_sqm), 0) AS avg_price_sqm,
+         COUNT(*) AS listing_count
+  FROM listings
+  GROUP BY city
+  ORDER BY avg_price_sqm DESC
+`;
+
+const DISTRICT_STATS_QUERY = `
+  SELECT 
+    city,
+    district,
+    MAX(district_parent) AS district_parent,
+    ROUND(SUM(sum_ppsm) / SUM(n), 0) AS avg_ppsqm,
+    SUM(n) AS count
+  FROM listing_aggregates
+  GROUP BY city, district
+  ORDER BY avg_ppsqm DESC
+`;
+
+const LEGACY_DISTRICT_STATS_QUERY = `
+  SELECT 
+    city,
+    district,
+    district_parent,
+    ROUND(AVG(price_per_sqm), 0) AS avg_ppsqm,
+    COUNT(*) AS count
+  FROM listings
+  GROUP BY city, district
+  ORDER BY avg_ppsqm DESC
+`;
+
+// Studios (bucket '0') and unknown room counts are left out, as before
+const ROOM_STATS_QUERY = `
+  SELECT 
+    city,
+    district,
+    room_bucket AS room_category,
+    ROUND(SUM(sum_ppsm) / SUM(n), 0) AS avg_ppsqm,
+    SUM(n) AS count
+  FROM listing_aggregates
+  WHERE room_bucket IN ('1', '2', '3+')
+  GROUP BY city, district, room_bucket
+`;
+
+const LEGACY_ROOM_STATS_QUERY = `
+  SELECT 
+    city,
+    district,
+    CASE 
+      WHEN rooms >= 3 THEN '3+'
+      WHEN rooms = 2 THEN '2'
+      WHEN rooms = 1 THEN '1'
+      ELSE 'unknown'
+    END AS room_category,
+    ROUND(AVG(price_per_sqm), 0) AS avg_ppsqm,
+    COUNT(*) AS count
+  FROM listings
+  WHERE rooms IS NOT NULL
+  GROUP BY city, district, room_category
+`;
+
+// Run a rollup query, falling back to the raw listings query when the rollup table does not exist yet
+function allFromRollup(db, query, legacyQuery, callback) {
+  db.all(query, [], (err, rows) => {
+    if (err && err.message.includes('no such table: listing_aggregates')) {
+      return db.all(legacyQuery, [], callback);
+    }
+    callback(err, rows);
+  });
+}
+
 // Function to read error logs
 function readErrorLogs() {
   try {
@@ -48,41 +168,27 @@ router.post('/start-scrape', (req, res) => {
     }
 
     // Start the scraper process
-    scraperProcess = spawn('python', [SCRIPT], { env: { ...process.env } });
+    // stdout only carries log output; status and metrics arrive as NDJSON on a pipe of their own
+    const stdio = ['ignore', 'pipe', 'pipe'];
+    stdio[EVENTS_FD] = 'pipe';
+    scraperProcess = spawn('python', [SCRIPT, '--events-fd', String(EVENTS_FD)], {
+      env: { ...process.env },
+      stdio
+    });
     scraperStatus = {
       status: "Starting...",
       progress: 0,
       error: false,
       lastStarted: new Date().toISOString(),
-      isRunning: true
+      isRunning: true,
+      metrics: null
     };
 
+    // readline reassembles lines split across chunks
+    readline.createInterface({ input: scraperProcess.stdio[EVENTS_FD] }).on('line', handleScraperEvent);
+
     scraperProcess.stdout.on('data', (data) => {
-      const output = data.toString();
-      
-      // Parse status updates
-      if (output.includes('STATUS:')) {
-        const statusMatch = output.match(/STATUS: (.+)/);
-        if (statusMatch) {
-          scraperStatus.status = statusMatch[1];
-        }
-      }
-      
-      if (output.includes('PROGRESS:')) {
-        const progressMatch = output.match(/PROGRESS: ([0-9.]+)/);
-        if (progressMatch) {
-          scraperStatus.progress = parseFloat(progressMatch[1]);
-        }
-      }
-      
-      if (output.includes('ERROR:')) {
-        const errorMatch = output.match(/ERROR: ([01])/);
-        if (errorMatch) {
-          scraperStatus.error = errorMatch[1] === '1';
-        }
-      }
-      
-      console.log(`Scraper output: ${output}`);
+      console.log(`Scraper output: ${data}`);
     });
 
     scraperProcess.stderr.on('data', (data) => {
@@ -126,16 +232,7 @@ router.get('/data', (req, res) => {
       return res.status(500).json({ error: 'Failed to connect to database' });
     }
 
-    const query = `
-      SELECT city,
-             ROUND(AVG(price_per_sqm), 0) AS avg_price_sqm,
-             COUNT(*) AS listing_count
-      FROM listings
-      GROUP BY city
-      ORDER BY avg_price_sqm DESC
-    `;
-    
-    db.all(query, [], (err, rows) => {
+    allFromRollup(db, CITY_STATS_QUERY, LEGACY_CITY_STATS_QUERY, (err, rows) => {
       db.close();
       
       if (err) {
@@ -157,19 +254,7 @@ router.get('/district-rooms', (req, res) => {
     }
 
     // First get all districts with their stats
-    const query = `
-      SELECT 
-        city,
-        district,
-        district_parent,
-        ROUND(AVG(price_per_sqm), 0) AS avg_ppsqm,
-        COUNT(*) AS count
-      FROM listings
-      GROUP BY city, district
-      ORDER BY avg_ppsqm DESC
-    `;
-    
-    db.all(query, [], (err, districts) => {
+    allFromRollup(db, DISTRICT_STATS_QUERY, LEGACY_DISTRICT_STATS_QUERY, (err, districts) => {
       if (err) {
         console.error(err.message);
         db.close();
@@ -177,24 +262,7 @@ router.get('/district-rooms', (req, res) => {
       }
       
       // Now get rooms data for each district
-      const roomQuery = `
-        SELECT 
-          city,
-          district,
-          CASE 
-            WHEN rooms >= 3 THEN '3+'
-            WHEN rooms = 2 THEN '2'
-            WHEN rooms = 1 THEN '1'
-            ELSE 'unknown'
-          END AS room_category,
-          ROUND(AVG(price_per_sqm), 0) AS avg_ppsqm,
-          COUNT(*) AS count
-        FROM listings
-        WHERE rooms IS NOT NULL
-        GROUP BY city, district, room_category
-      `;
-      
-      db.all(roomQuery, [], (err, roomStats) => {
+      allFromRollup(db, ROOM_STATS_QUERY, LEGACY_ROOM_STATS_QUERY, (err, roomStats) => {
         db.close();
         
         if (err) {
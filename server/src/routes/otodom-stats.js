@@ -1,55 +1,12 @@
 const express = require('express');
-const { spawn } = require('child_process');
-const path = require('path');
+const { PythonStatsPool } = require('../lib/python-stats-pool');
 const router = express.Router();
 
-// Execute a Python function and return its result
-const executePythonFunction = (functionName, args = []) => {
-  return new Promise((resolve, reject) => {
-    // Create a script that imports the db module and calls the requested function
-    const pythonCode = `
-import sys
-import json
-sys.path.append('${path.resolve(__dirname, '../otodom_parser')}')
-import db
+// Resident Python workers answering db.py queries, instead of one interpreter per request
+const statsPool = new PythonStatsPool(parseInt(process.env.STATS_WORKER_POOL_SIZE || '2', 10));
 
-try:
-    result = db.${functionName}(${args.map(arg => JSON.stringify(arg)).join(', ')})
-    print(json.dumps(result))
-except Exception as e:
-    print(json.dumps({"error": str(e)}))
-    sys.exit(1)
-`;
-
-    const pythonProcess = spawn('python', ['-c', pythonCode]);
-    let outputData = '';
-    let errorData = '';
-
-    pythonProcess.stdout.on('data', (data) => {
-      outputData += data.toString();
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      errorData += data.toString();
-    });
-
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        return reject(new Error(`Python process exited with code ${code}: ${errorData}`));
-      }
-
-      try {
-        const result = JSON.parse(outputData);
-        if (result && result.error) {
-          return reject(new Error(result.error));
-        }
-        resolve(result);
-      } catch (err) {
-        reject(new Error(`Failed to parse Python output: ${err.message}`));
-      }
-    });
-  });
-};
+// Execute a Python db function on a pooled worker and return its result
+const executePythonFunction = (functionName, args = []) => statsPool.call(functionName, args);
 
 // Get all cities endpoint
 router.get('/cities', async (req, res) => {